@@ -6,17 +6,26 @@ Asset Cache maintains lists of assets
 :license    : GPLv3
 '''
 
+import re
+
 from uuid import UUID
+from time import monotonic
 from typing import Self
 from typing import TypeVar
+from collections.abc import AsyncIterator
 from logging import Logger
 from logging import getLogger
 from datetime import UTC
 from datetime import datetime
 from datetime import timedelta
 
+import orjson
+
 from fastapi.encoders import jsonable_encoder
 
+from redis.commands.search.query import Query
+from redis.commands.search.field import Field
+
 from prometheus_client import Counter
 from prometheus_client import Gauge
 
@@ -37,6 +46,10 @@ from byoda.util.api_client.data_api_client import DataApiClient
 from byoda.util.api_client.api_client import HttpResponse
 
 from byoda.datacache.searchable_cache import SearchableCache
+from byoda.datacache.memory_cache import MemoryCache
+from byoda.datacache.single_flight import SingleFlight
+from byoda.datacache.asset_compressor import AssetCompressor
+from byoda.datacache.asset_compressor import UnknownDictionaryError
 
 from byoda import config
 
@@ -61,36 +74,139 @@ class AssetCache(SearchableCache, Metrics):
     # Threshold for adding assets to the 'recent_uploads' list
     RECENT_THRESHOLD: timedelta = timedelta(days=7)
 
+    # Default for how many seconds pages of lists cached in process memory
+    # may lag behind the lists in Redis
+    HOT_LISTS_LAG: float = 2.0
+    # Assets expiring from Redis do not change the version of the lists
+    # they are in, so pages are dropped from memory after this many seconds
+    HOT_LISTS_MAX_AGE: float = 60.0
+
+    # Lists for categories, keywords and annotations are only stored as
+    # sorted sets when they are popular. Other lists are answered using the
+    # search index. This hash has the query parameters for those lists
+    LIST_DEFINITIONS_KEY: str = 'list_definitions'
+    # The set of lists that are stored as sorted sets
+    MATERIALIZED_LISTS_KEY: str = 'materialized_lists'
+    # Hash with the lists that are being promoted to sorted sets and the
+    # timestamp of when the promotion started. Assets get added to the
+    # sorted sets of these lists but readers still use the search index
+    PROMOTING_LISTS_KEY: str = 'promoting_lists'
+    MATERIALIZED_LISTS_REFRESH: float = 60.0
+    # Sorted sets with the number of reads per list per time window
+    LIST_READS_KEY_PREFIX: str = 'list_reads:'
+    LIST_READS_WINDOW: int = 60 * 60
+    LIST_READS_FLUSH_INTERVAL: float = 10.0
+    MAX_TRACKED_LISTS: int = 10000
+    # Minimum number of reads in a time window for a list to be popular.
+    # Lists get demoted when their reads drop below half of this value
+    POPULAR_LIST_THRESHOLD: int = 100
+    # Number of assets added to a list when it gets promoted
+    MATERIALIZED_LIST_BACKFILL: int = 500
+    # Number of assets read from Redis at a time when exporting a list
+    EXPORT_CHUNK_SIZE: int = 500
+    # Number of assets used to train the dictionary for compressing assets
+    COMPRESSION_SAMPLES: int = 200
+
     '''
     Stores assets in a cache and provides methods to search for them.
     '''
 
-    def __init__(self, connection_string: str) -> None:
+    def __init__(self, connection_string: str, hot_lists_size: int = 0,
+                 hot_lists_lag: float = HOT_LISTS_LAG,
+                 compress_assets: bool = False) -> None:
         '''
         Initialize the AssetCache class.
 
         :param connection_string: The connection string to the Redis server.
+        :param hot_lists_size: the maximum number of pages of lists to keep
+        in process memory, 0 to disable caching pages in memory
+        :param hot_lists_lag: the maximum number of seconds that a page
+        in process memory may lag behind the list in Redis
+        :param compress_assets: store the fields of assets that are not
+        indexed as compressed string. Assets are decompressed when read,
+        regardless of this setting
         :return: None
         :raises: None
         '''
 
         super().__init__(connection_string)
 
+        self.hot_lists_lag: float = hot_lists_lag
+
+        self.compress_assets: bool = compress_assets
+        self.compressor: AssetCompressor = AssetCompressor(
+            AssetCache.get_indexed_fields()
+        )
+
+        # Pages of lists, keyed by the parameters for the page, with the
+        # version of the list that the page was read from
+        self.hot_pages: MemoryCache | None = None
+
+        # The versions of the lists, as last read from Redis
+        self.hot_list_versions: MemoryCache | None = None
+
+        # Concurrent requests for the same page of a list share a single
+        # call to Redis
+        self.list_page_flights: SingleFlight = SingleFlight()
+
+        # The lists for which a sorted set is maintained and the lists that
+        # are being promoted to sorted sets
+        self.materialized_lists: set[str] | None = None
+        self.promoting_lists: set[str] = set()
+        self.materialized_lists_read_at: float = 0.0
+
+        # The definitions of lists answered by the search index, an empty
+        # dict means that a list is not answered by the search index
+        self.list_definitions: MemoryCache = MemoryCache(
+            AssetCache.MAX_TRACKED_LISTS,
+            ttl=AssetCache.MATERIALIZED_LISTS_REFRESH
+        )
+
+        # Reads per list that have not yet been added to Redis
+        self.list_reads: dict[str, int] = {}
+        self.list_reads_flushed_at: float = monotonic()
+
+        if hot_lists_size:
+            self.hot_pages = MemoryCache(
+                hot_lists_size, ttl=AssetCache.HOT_LISTS_MAX_AGE
+            )
+            self.hot_list_versions = MemoryCache(
+                hot_lists_size, ttl=hot_lists_lag
+            )
+
     @staticmethod
     async def setup(connection_string: str,
-                    lua_functions_file: str = LUA_FUNCTIONS_FILE) -> Self:
+                    lua_functions_file: str = LUA_FUNCTIONS_FILE,
+                    hot_lists_size: int = 0,
+                    hot_lists_lag: float = HOT_LISTS_LAG,
+                    compress_assets: bool = False) -> Self:
         '''
         Setup the cache and return an instance.
 
         :param connection_string: The connection string to the Redis server.
+        :param lua_functions_file: the file with the Lua script for paging
+        through lists
+        :param hot_lists_size: the maximum number of pages of lists to keep
+        in process memory, 0 to disable caching pages in memory
+        :param hot_lists_lag: the maximum number of seconds that a page
+        in process memory may lag behind the list in Redis
+        :param compress_assets: store the fields of assets that are not
+        indexed as compressed string
         :return: An instance of the AssetCache class.
         :raises: None
         '''
 
-        self: AssetCache = AssetCache(connection_string)
+        self: AssetCache = AssetCache(
+            connection_string, hot_lists_size=hot_lists_size,
+            hot_lists_lag=hot_lists_lag, compress_assets=compress_assets
+        )
         await self.create_search_index()
         await self.load_functions(lua_functions_file)
 
+        await self.compressor.load(self.client)
+        if compress_assets and not self.compressor.dictionary_id:
+            await self.train_compression_dictionary()
+
         self.metrics_setup()
 
         return self
@@ -109,12 +225,172 @@ class AssetCache(SearchableCache, Metrics):
         :raises: None
         '''
 
-        metrics: dict[str, Gauge | Counter] = config.metrics
+        materialized_lists: set[str] = await self.get_materialized_lists(
+            include_promoting=True
+        )
+
+        prepared: tuple[set[AssetList], dict[str, dict], dict, float] | None
+        prepared = self._prepare_asset(
+            member_id, asset, materialized_lists, expires_at
+        )
+        if not prepared:
+            return False
+
+        asset_lists: set[AssetList]
+        query_lists: dict[str, dict[str, str | bool | None]]
+        asset_data: dict[str, any]
+        expires_in: float
+        asset_lists, query_lists, asset_data, expires_in = prepared
+
+        await self.json_set(
+            asset_lists, AssetCache.ASSET_KEY_PREFIX, asset_data,
+            expires_in=expires_in
+        )
+        await self._record_query_lists(
+            [(asset_data, query_lists, expires_in)]
+        )
+
+        await self.update_creators_list(
+            member_id, asset_data['node']['creator']
+        )
+
+        await self._update_lists_metadata(asset_lists, query_lists)
+
+        _LOGGER.debug(
+            'Added asset to cache', extra={
+                'asset_id': asset_data['node']['asset_id'],
+                'member_id': member_id,
+                'lists': len(asset_lists)
+            }
+        )
+
+        return True
+
+    async def add_newest_assets(
+        self, assets: list[tuple[UUID, dict]],
+        expires_at: datetime | int | float | None = None
+    ) -> int:
+        '''
+        Adds a batch of assets to the cache using a fixed number of
+        round-trips to Redis, for use when importing many assets at once
+
+        :param assets: list of the member that originated the asset and
+        the asset
+        :param expires_at: the timestamp at which the assets expire
+        :returns: the number of assets that were added or refreshed
+        :raises: None
+        '''
+
+        materialized_lists: set[str] = await self.get_materialized_lists(
+            include_promoting=True
+        )
+
+        batch: list[tuple[set[AssetList], dict, float]] = []
+        batch_query_lists: list[tuple[dict, dict[str, dict], float]] = []
+        all_lists: set[AssetList] = set()
+        all_query_lists: dict[str, dict[str, str | bool | None]] = {}
+        creators: set[tuple[UUID, str]] = set()
+
+        member_id: UUID
+        asset: dict
+        for member_id, asset in assets:
+            prepared: tuple[set[AssetList], dict[str, dict], dict, float] \
+                | None = self._prepare_asset(
+                    member_id, asset, materialized_lists, expires_at
+                )
+            if not prepared:
+                continue
+
+            asset_lists: set[AssetList]
+            query_lists: dict[str, dict[str, str | bool | None]]
+            asset_data: dict[str, any]
+            expires_in: float
+            asset_lists, query_lists, asset_data, expires_in = prepared
+
+            batch.append((asset_lists, asset_data, expires_in))
+            batch_query_lists.append((asset_data, query_lists, expires_in))
+            all_lists |= asset_lists
+            all_query_lists |= query_lists
+            creators.add((member_id, asset_data['node']['creator']))
+
+        if not batch:
+            return 0
+
+        await self.json_set_many(batch, AssetCache.ASSET_KEY_PREFIX)
+        await self._record_query_lists(batch_query_lists)
+
+        creator: str
+        for member_id, creator in creators:
+            await self.update_creators_list(member_id, creator)
+
+        await self._update_lists_metadata(all_lists, all_query_lists)
+
+        _LOGGER.debug(
+            'Added batch of assets to cache', extra={
+                'assets': len(batch), 'lists': len(all_lists)
+            }
+        )
+
+        return len(batch)
+
+    async def _record_query_lists(
+        self, assets: list[tuple[dict, dict[str, dict], float]]
+    ) -> None:
+        '''
+        Records the lists answered by the search index that assets are in,
+        together with the lists stored as sorted sets. When the sweep
+        removes an asset from the cache, it then also changes the version
+        of these lists, so that pages of these lists cached by readers are
+        refreshed
+
+        :param assets: the data of the assets as stored in the cache, the
+        lists of the asset answered by the search index and the number of
+        seconds until the asset expires
+        '''
+
+        if not any(query_lists for _, query_lists, _ in assets):
+            return
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            asset_data: dict[str, any]
+            query_lists: dict[str, dict[str, str | bool | None]]
+            expires_in: float
+            for asset_data, query_lists, expires_in in assets:
+                if not query_lists:
+                    continue
+
+                lists_key: str = self.get_asset_lists_key(
+                    self.annotate_key(
+                        AssetCache.ASSET_KEY_PREFIX, asset_data['cursor']
+                    )
+                )
+                pipe.sadd(lists_key, *query_lists)
+                pipe.expire(
+                    lists_key,
+                    int(expires_in) + AssetCache.ASSET_LISTS_GRACE
+                )
+
+            await pipe.execute()
+
+    def _prepare_asset(
+        self, member_id: UUID, asset: dict, materialized_lists: set[str],
+        expires_at: datetime | int | float | None
+    ) -> tuple[set[AssetList], dict[str, dict], dict, float] | None:
+        '''
+        Prepares an asset for storage in the cache
+
+        :returns: the lists the asset should be added to, the lists of the
+        asset that are answered by the search index, the data to store and
+        the number of seconds until the asset expires, or None if the asset
+        should not be stored
+        '''
 
         asset_model: Asset = Asset(**asset)
 
-        asset_lists: set[AssetList] = self.get_asset_lists(
-            member_id, asset_model
+        asset_lists: set[AssetList]
+        query_lists: dict[str, dict[str, str | bool | None]]
+        asset_lists, query_lists = self.get_asset_lists(
+            member_id, asset_model, materialized_lists
         )
 
         if expires_at is None:
@@ -139,58 +415,113 @@ class AssetCache(SearchableCache, Metrics):
         }
         if not asset_model.creator:
             _LOGGER.debug('Not adding asset with no creator', extra=log_data)
-            return False
+            return None
 
-        # We replace UUIDs with strings and datetimes with timestamps. The
-        # get_asset() method will cast to Pydantic model and that will return
-        # the values in their proper type
+        # We replace UUIDs and datetimes with strings, the same as the APIs
+        # return them, so that pages of assets can be returned without
+        # decoding the assets
         asset_data: dict[str, any] = jsonable_encoder(asset_edge)
 
-        # We want to store timestamp as a number so people can sort and
-        # filter on it
-        asset_data['node']['created_timestamp'] = \
+        # We also store the timestamps as numbers so people can sort and
+        # filter on them
+        asset_data['created_timestamp'] = \
             asset_edge.node.created_timestamp.timestamp()
 
-        asset_data['node']['published_timestamp'] = \
+        asset_data['published_timestamp'] = \
             asset_edge.node.published_timestamp.timestamp()
 
-        await self.json_set(
-            asset_lists, AssetCache.ASSET_KEY_PREFIX, asset_data,
-            expires_in=expires_at - datetime.now(tz=UTC).timestamp()
+        asset_data[AssetCache.ETAG_FIELD] = AssetCache.get_etag(
+            asset_data['node']
         )
 
-        await self.update_creators_list(member_id, asset_model.creator)
+        if self.compress_assets:
+            self.compressor.compress(asset_data)
+            metrics: dict[str, Gauge | Counter] = config.metrics
+            metric: str = 'assetcache_assets_compressed'
+            if metrics and metric in metrics:
+                metrics[metric].inc()
+
+        expires_in: float = expires_at - datetime.now(tz=UTC).timestamp()
+
+        return asset_lists, query_lists, asset_data, expires_in
+
+    async def _update_lists_metadata(
+        self, asset_lists: set[AssetList],
+        query_lists: dict[str, dict[str, str | bool | None]]
+    ) -> None:
+        '''
+        Updates the definitions of the lists answered by the search index
+        and the list of lists after assets have been added to the cache
+        '''
+
+        metrics: dict[str, Gauge | Counter] = config.metrics
+
+        await self.store_list_definitions(query_lists)
 
-        await self.update_list_of_lists(asset_lists)
+        # The pages of lists answered by the search index change when
+        # assets are added to the search index
+        if query_lists:
+            async with self.client.pipeline(transaction=False) as pipe:
+                list_name: str
+                for list_name in query_lists:
+                    version_key: str = AssetList.get_version_key(list_name)
+                    pipe.incr(version_key)
+                    pipe.expire(version_key, AssetList.DEFAULT_EXPIRATION)
+
+                await pipe.execute()
+
+        await self.update_list_of_lists(
+            asset_lists | set(
+                AssetList(list_name, redis=self.client)
+                for list_name in query_lists
+            )
+        )
         metric: str = 'assetcache_total_lists'
         if metrics and metric in metrics:
             metrics[metric].set(len(asset_lists))
 
-        log_data['lists'] = len(asset_lists)
-        _LOGGER.debug('Added asset to cache', extra=log_data)
-
-        return True
-
-    def get_asset_lists(self, member_id: UUID, asset_model: Asset
-                        ) -> set[AssetList]:
+    def get_asset_lists(self, member_id: UUID, asset_model: Asset,
+                        materialized_lists: set[str] | None = None
+                        ) -> tuple[set[AssetList],
+                                   dict[str, dict[str, str | bool | None]]]:
         '''
         The various lists that this asset should be added to
 
         :param member_id: The member that originated the asset.
         :param asset: The asset to add.
-        :returns: set of asset lists
+        :param materialized_lists: the lists for categories, keywords and
+        annotations that are stored as sorted sets. If None, the asset gets
+        added to the sorted sets of all its lists
+        :returns: set of asset lists to add the asset to and the definitions
+        of the lists of the asset that are answered by the search index
         '''
 
+        short_append: str = AssetCache.get_short_appendix(asset_model)
+
+        definitions: dict[str, dict[str, str | bool | None]] = \
+            AssetCache.get_list_definitions(asset_model, short_append)
+
         list_permutations: set[str] = AssetCache.get_list_permutations(
-            member_id, asset_model
+            member_id, asset_model, short_append=short_append,
+            definitions=definitions
         )
+
+        query_lists: dict[str, dict[str, str | bool | None]] = {}
+        if materialized_lists is not None:
+            query_lists = {
+                list_name: definition
+                for list_name, definition in definitions.items()
+                if list_name not in materialized_lists
+            }
+
         asset_lists: set[AssetList] = set()
         for list_name in list_permutations:
-            asset_lists.add(
-                AssetList(list_name, redis=self.client)
-            )
+            if list_name not in query_lists:
+                asset_lists.add(
+                    AssetList(list_name, redis=self.client)
+                )
 
-        return asset_lists
+        return asset_lists, query_lists
 
     async def in_cache(self, member_id: UUID, asset_id: UUID) -> bool:
         '''
@@ -234,10 +565,25 @@ class AssetCache(SearchableCache, Metrics):
         if metrics and metric in metrics:
             metrics[metric].inc()
 
+        asset_data = await self.get_response_edge(asset_data)
         asset_data['node'] = Asset(**asset_data['node'])
         edge = Edge(**asset_data)
         return edge
 
+    async def get_asset_etag(self, asset_key: str) -> str | None:
+        '''
+        Gets the hash of the content of an asset, without reading the asset
+
+        :param asset_key: the key or the cursor of the asset
+        :returns: the hash or None if the asset is not in the cache or
+        was stored without a hash
+        '''
+
+        if not asset_key.startswith(AssetCache.ASSET_KEY_PREFIX):
+            asset_key = AssetCache.ASSET_KEY_PREFIX + asset_key
+
+        return await self.get_etag_by_key(asset_key)
+
     async def search(self, query: str, offset: int = 0, num: int = 10
                      ) -> list[Edge]:
         '''
@@ -257,11 +603,39 @@ class AssetCache(SearchableCache, Metrics):
             ingest_status: str = item['node']['ingest_status']
             if (ingest_status in (IngestStatus.EXTERNAL.value,
                                   IngestStatus.PUBLISHED.value)):
+                item = await self.get_response_edge(item)
                 item['node'] = Asset(**item['node'])
                 results.append(Edge(**item))
 
         return results
 
+    async def search_page(self, query: str, num: int = 10,
+                          after: str | None = None
+                          ) -> tuple[list[Edge], str | None]:
+        '''
+        Searches for the text in the asset cache, newest assets first,
+        using a continuation token to page through the results
+
+        :param query: The query to perform
+        :param num: The maximum number of search results to return
+        :param after: the continuation token returned for the previous page
+        :returns: a list of assets and the continuation token for the next
+        page, or None if there are no more results
+        :raises: ValueError if the continuation token is invalid
+        '''
+
+        data: list[dict[str, str | dict[str, any]]]
+        token: str | None
+        data, token = await super().search_page(query, num, after)
+
+        results: list[Edge] = []
+        for item in data:
+            item = await self.get_response_edge(item)
+            item['node'] = Asset(**item['node'])
+            results.append(Edge(**item))
+
+        return results, token
+
     async def get_asset_expiration(self, edge: str | Edge) -> int:
         '''
         Gets the expiration time of an asset
@@ -337,24 +711,717 @@ class AssetCache(SearchableCache, Metrics):
                 'filter_value': filter_value
             }
         )
-        data: list[dict] = await self.get_list_values(
-            asset_list, AssetCache.ASSET_KEY_PREFIX, first=first, after=after,
+        page: str = await self.fetch_list_page(
+            asset_list, first=first, after=after,
             filter_name=filter_name, filter_value=filter_value
         )
+        data: list[dict] = orjson.loads(page)['edges']
 
         results: list[Edge] = []
         for item in data:
-            asset: Asset = Asset(**item['node'])
-            if type(asset.created_timestamp) in (int, float):
-                asset.created_timestamp = \
-                    datetime.fromtimestamp(asset.created_timestamp)
-                asset.published_timestamp = \
-                    datetime.fromtimestamp(asset.published_timestamp)
-            item['node'] = asset
+            item['node'] = Asset(**item['node'])
             results.append(Edge(**item))
 
         return results
 
+    async def get_list_page(self, asset_list: str = DEFAULT_ASSET_LIST,
+                            first: int = 20, after: str | None = None,
+                            filter_name: str | None = None,
+                            filter_value: str | None = None) -> str:
+        '''
+        Get a page worth of assets from a list as a JSON-encoded
+        QueryResponseModel, without building models for the assets. Assets
+        are validated by add_newest_asset() before they are stored so the
+        data can be returned to the client without parsing it again.
+
+        If caching of hot lists is enabled, the page is served from process
+        memory as long as the version of the list has not changed
+
+        :param asset_list: the name of the list to get the assets from
+        :param first: the number of assets to get
+        :param after: the end_cursor of the previous page or the cursor of
+        the asset to start after
+        :param filter_name: the name of the field to filter on
+        :param filter_value: the value of the field to filter on
+        :returns: the JSON-encoded page
+        '''
+
+        metrics: dict[str, Gauge | Counter] = config.metrics
+
+        log_data: dict[str, any] = {
+            'asset_list': asset_list,
+            'first': first,
+            'after': after,
+            'filter_name': filter_name,
+            'filter_value': filter_value
+        }
+        _LOGGER.debug('Getting page of assets', extra=log_data)
+
+        if self.hot_pages is None:
+            return await self.fetch_list_page(
+                asset_list, first=first, after=after,
+                filter_name=filter_name, filter_value=filter_value
+            )
+
+        version: int = await self.get_hot_list_version(asset_list)
+
+        page_key: tuple = (
+            asset_list, after, first, filter_name, filter_value
+        )
+        cached: tuple[int, str] | None = self.hot_pages.get(page_key)
+        metric: str
+        if cached and cached[0] == version:
+            metric = 'assetcache_hot_list_page_hits'
+            if metrics and metric in metrics:
+                metrics[metric].inc()
+
+            return cached[1]
+
+        metric = 'assetcache_hot_list_page_misses'
+        if metrics and metric in metrics:
+            metrics[metric].inc()
+
+        page: str = await self.fetch_list_page(
+            asset_list, first=first, after=after,
+            filter_name=filter_name, filter_value=filter_value
+        )
+        self.hot_pages.set(page_key, (version, page))
+
+        return page
+
+    async def fetch_list_page(self, asset_list: str, first: int = 20,
+                              after: str | None = None,
+                              filter_name: str | None = None,
+                              filter_value: str | None = None) -> str:
+        '''
+        Gets a page of a list from Redis. If the same page is already being
+        fetched by another request then we wait for and return the result
+        of that request
+
+        :param asset_list: the name of the list to get the assets from
+        :param first: the number of assets to get
+        :param after: the end_cursor of the previous page or the cursor of
+        the asset to start after
+        :param filter_name: the name of the field to filter on
+        :param filter_value: the value of the field to filter on
+        :returns: the JSON-encoded page
+        '''
+
+        metrics: dict[str, Gauge | Counter] = config.metrics
+
+        page_key: tuple = (
+            asset_list, after, first, filter_name, filter_value
+        )
+        page: str
+        shared: bool
+        page, shared = await self.list_page_flights.run(
+            page_key, self._fetch_list_page, asset_list, first=first,
+            after=after, filter_name=filter_name, filter_value=filter_value
+        )
+
+        metric: str = 'assetcache_list_pages_coalesced'
+        if shared and metrics and metric in metrics:
+            metrics[metric].inc()
+
+        return page
+
+    async def _fetch_list_page(self, asset_list: str, first: int = 20,
+                               after: str | None = None,
+                               filter_name: str | None = None,
+                               filter_value: str | None = None) -> str:
+        '''
+        Gets a page of a list from Redis, either from the sorted set of the
+        list or, for lists that are not stored as sorted set, from the
+        search index
+
+        :param asset_list: the name of the list to get the assets from
+        :param first: the number of assets to get
+        :param after: the end_cursor of the previous page or the cursor of
+        the asset to start after
+        :param filter_name: the name of the field to filter on
+        :param filter_value: the value of the field to filter on
+        :returns: the JSON-encoded page
+        '''
+
+        metrics: dict[str, Gauge | Counter] = config.metrics
+
+        definition: dict[str, str | bool | None] | None = \
+            await self.get_query_list_definition(asset_list)
+
+        page: str
+        compressed: bool
+        if not definition:
+            page, compressed = await self.get_list_page_values(
+                asset_list, AssetCache.ASSET_KEY_PREFIX, first=first,
+                after=after, filter_name=filter_name,
+                filter_value=filter_value
+            )
+        else:
+            metric: str = 'assetcache_query_list_pages'
+            if metrics and metric in metrics:
+                metrics[metric].inc()
+
+            page, compressed = await self.get_query_page_values(
+                AssetCache.get_list_query(
+                    definition, filter_name, filter_value
+                ),
+                AssetCache.ASSET_KEY_PREFIX, first=first, after=after
+            )
+
+        # Pages are stored in the format returned by the APIs so they only
+        # need to be decoded to restore compressed fields
+        if compressed:
+            page = await self.get_response_page(page)
+
+        return page
+
+    async def export_list(self, asset_list: str,
+                          chunk_size: int = EXPORT_CHUNK_SIZE,
+                          filter_name: str | None = None,
+                          filter_value: str | None = None
+                          ) -> AsyncIterator[str]:
+        '''
+        Gets all assets of a list as newline-delimited JSON, for consumers
+        that need a copy of the whole list instead of a page of it
+
+        :param asset_list: the name of the list
+        :param chunk_size: the number of assets to read from Redis at a time
+        :param filter_name: the name of the field to filter on
+        :param filter_value: the value of the field to filter on
+        :returns: chunks of newline-delimited JSON assets
+        '''
+
+        metrics: dict[str, Gauge | Counter] = config.metrics
+
+        metric: str = 'assetcache_list_exports'
+        if metrics and metric in metrics:
+            metrics[metric].inc()
+
+        definition: dict[str, str | bool | None] | None = \
+            await self.get_query_list_definition(asset_list)
+
+        chunks: AsyncIterator[tuple[str, bool]]
+        if definition:
+            chunks = self.export_query_values(
+                AssetCache.get_list_query(
+                    definition, filter_name, filter_value
+                ),
+                AssetCache.ASSET_KEY_PREFIX, chunk_size=chunk_size
+            )
+        else:
+            chunks = self.export_list_values(
+                asset_list, AssetCache.ASSET_KEY_PREFIX,
+                chunk_size=chunk_size, filter_name=filter_name,
+                filter_value=filter_value
+            )
+
+        chunk: str
+        compressed: bool
+        async for chunk, compressed in chunks:
+            if compressed:
+                chunk = await self.get_response_lines(chunk)
+
+            yield chunk
+
+    async def get_response_edge(self, asset_data: dict[str, any]
+                                ) -> dict[str, any]:
+        '''
+        Converts an edge of an asset as stored in Redis to the edge as
+        returned by the APIs: the fields only used by the cache are removed
+        and the compressed fields are restored. If the asset was compressed
+        with a dictionary created by another process then the dictionaries
+        are reloaded from Redis
+
+        :param asset_data: the edge of the asset as stored in Redis, which
+        is modified in place
+        :returns: the edge
+        :raises: UnknownDictionaryError if the dictionary does not exist
+        '''
+
+        try:
+            return self._get_response_edge(asset_data)
+        except UnknownDictionaryError:
+            await self.compressor.load(self.client)
+            return self._get_response_edge(asset_data)
+
+    async def get_response_page(self, page: str) -> str:
+        '''
+        Restores the compressed fields of the edges in a JSON-encoded page
+        of assets
+
+        :param page: the page as returned by the Lua functions or the search
+        index
+        :returns: the page
+        :raises: UnknownDictionaryError if the dictionary does not exist
+        '''
+
+        data: dict[str, any] = orjson.loads(page)
+        edge: dict[str, any]
+        for edge in data['edges']:
+            await self.get_response_edge(edge)
+
+        return orjson.dumps(data).decode('utf-8')
+
+    async def get_response_lines(self, chunk: str) -> str:
+        '''
+        Restores the compressed fields of newline-delimited JSON edges of
+        assets
+
+        :param chunk: the newline-delimited JSON assets
+        :returns: the newline-delimited JSON assets
+        :raises: UnknownDictionaryError if the dictionary does not exist
+        '''
+
+        lines: list[str] = []
+        line: str
+        for line in chunk.splitlines():
+            edge: dict[str, any] = await self.get_response_edge(
+                orjson.loads(line)
+            )
+            lines.append(orjson.dumps(edge).decode('utf-8'))
+
+        return '\n'.join(lines) + '\n'
+
+    def _get_response_edge(self, asset_data: dict[str, any]
+                           ) -> dict[str, any]:
+        # The hash of the content is only used for the ETag header and
+        # the numeric timestamps only for sorting and filtering
+        field: str
+        for field in AssetCache.CACHE_FIELDS:
+            asset_data.pop(field, None)
+
+        self.compressor.decompress(asset_data)
+
+        return asset_data
+
+    async def train_compression_dictionary(
+            self, samples: int = COMPRESSION_SAMPLES) -> int:
+        '''
+        Creates a new dictionary for compressing assets from the newest
+        assets in the cache. Assets already in the cache remain readable
+        as the old dictionaries are kept in Redis
+
+        :param samples: the number of assets to use for training
+        :returns: the ID of the dictionary used for compressing assets
+        '''
+
+        asset_keys: list[str] = await self.client.zrange(
+            AssetList.get_key(AssetCache.ALL_ASSETS_LIST), 0, samples - 1,
+            desc=True
+        )
+        if not asset_keys:
+            _LOGGER.debug('No assets available to train compression')
+            return self.compressor.dictionary_id
+
+        values: list[dict[str, any] | None] = await self.client.json().mget(
+            asset_keys, '.'
+        )
+
+        nodes: list[dict[str, any]] = []
+        value: dict[str, any] | None
+        for value in values:
+            if value:
+                value = await self.get_response_edge(value)
+                nodes.append(value['node'])
+
+        dictionary_id: int = await self.compressor.train(self.client, nodes)
+
+        _LOGGER.info(
+            'Using dictionary for compressing assets', extra={
+                'dictionary_id': dictionary_id,
+                'samples': len(nodes)
+            }
+        )
+
+        return dictionary_id
+
+    @staticmethod
+    def get_indexed_fields() -> set[str]:
+        '''
+        Gets the fields of the node of assets that are used by the search
+        index, and so by the Lua functions, and can not be compressed
+
+        :returns: the names of the fields
+        '''
+
+        fields: set[str] = set()
+        field: Field
+        for field in AssetCache.get_index_schema():
+            if field.name.startswith('$.node.'):
+                fields.add(
+                    field.name[len('$.node.'):].removesuffix('[*]')
+                )
+
+        return fields
+
+    async def get_query_list_definition(self, asset_list: str
+                                        ) -> dict[str, str | bool | None]:
+        '''
+        Gets the definition for a list that is answered by the search index
+
+        :param asset_list: the name of the list
+        :returns: the definition or an empty dict if the list is stored as
+        a sorted set
+        '''
+
+        materialized_lists: set[str] = await self.get_materialized_lists()
+        if asset_list in materialized_lists:
+            return {}
+
+        definition: dict[str, str | bool | None] | None = \
+            self.list_definitions.get(asset_list)
+
+        if definition is None:
+            data: str | None = await self.client.hget(
+                AssetCache.LIST_DEFINITIONS_KEY, asset_list
+            )
+            definition = orjson.loads(data) if data else {}
+            self.list_definitions.set(asset_list, definition)
+
+        return definition
+
+    async def get_materialized_lists(self, include_promoting: bool = False
+                                     ) -> set[str]:
+        '''
+        Gets the lists for categories, keywords and annotations that are
+        stored as sorted sets. The lists are read from Redis at most once
+        per MATERIALIZED_LISTS_REFRESH seconds
+
+        :param include_promoting: also include the lists that are being
+        promoted to sorted sets. Assets must be added to the sorted sets of
+        these lists but the lists can not be read from the sorted sets yet
+        :returns: the names of the lists
+        '''
+
+        now: float = monotonic()
+        if (self.materialized_lists is None
+                or now - self.materialized_lists_read_at
+                > AssetCache.MATERIALIZED_LISTS_REFRESH):
+            materialized_lists: set[str]
+            promoting_lists: list[str]
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.smembers(AssetCache.MATERIALIZED_LISTS_KEY)
+                pipe.hkeys(AssetCache.PROMOTING_LISTS_KEY)
+                materialized_lists, promoting_lists = await pipe.execute()
+
+            self.materialized_lists = set(materialized_lists)
+            self.promoting_lists = set(promoting_lists)
+            self.materialized_lists_read_at = now
+
+        if include_promoting:
+            return self.materialized_lists | self.promoting_lists
+
+        return self.materialized_lists
+
+    async def store_list_definitions(
+        self, definitions: dict[str, dict[str, str | bool | None]]
+    ) -> None:
+        '''
+        Stores the definitions of lists answered by the search index so
+        that readers can translate the name of a list to a query
+
+        :param definitions: the lists and their definitions
+        '''
+
+        new_definitions: dict[str, bytes] = {
+            list_name: orjson.dumps(definition)
+            for list_name, definition in definitions.items()
+            if self.list_definitions.get(list_name) != definition
+        }
+        if not new_definitions:
+            return
+
+        await self.client.hset(
+            AssetCache.LIST_DEFINITIONS_KEY, mapping=new_definitions
+        )
+        for list_name, definition in definitions.items():
+            self.list_definitions.set(list_name, definition)
+
+    @staticmethod
+    def get_list_query(definition: dict[str, str | bool | None],
+                       filter_name: str | None = None,
+                       filter_value: str | None = None) -> str:
+        '''
+        Generates the query for the search index to get the assets of
+        a list
+
+        :param definition: the definition of the list
+        :param filter_name: the name of the field to filter on
+        :param filter_value: the value of the field to filter on
+        :returns: the query for FT.SEARCH
+        :raises: ValueError if filtering on the field is not supported
+        '''
+
+        category: str = AssetCache._escape_tag(definition['category'])
+        query: list[str] = [f'@category_tags:{{{category}}}']
+        for field in ('keyword', 'annotation'):
+            if definition.get(field):
+                query.append(
+                    f'@{field}_tags:'
+                    f'{{{AssetCache._escape_tag(definition[field])}}}'
+                )
+
+        # Must match AssetCache.get_short_appendix()
+        if definition.get('short'):
+            query.append('@duration:[-inf 60]')
+        else:
+            query.append('@duration:[(60 +inf]')
+
+        if filter_name and filter_name != 'ingest_status':
+            if filter_name not in ('locale', 'asset_id', 'cursor'):
+                raise ValueError(f'Can not filter lists on {filter_name}')
+
+            query.append(
+                f'@{filter_name}:{{{AssetCache._escape_tag(filter_value)}}}'
+            )
+
+        if filter_name == 'ingest_status':
+            query.append(
+                f'@ingest_status:{{{AssetCache._escape_tag(filter_value)}}}'
+            )
+        else:
+            query.append(
+                f'@ingest_status:{{{IngestStatus.PUBLISHED.value}'
+                f'|{IngestStatus.EXTERNAL.value}}}'
+            )
+
+        return ' '.join(query)
+
+    @staticmethod
+    def _escape_tag(value: str) -> str:
+        '''
+        Escapes punctuation and whitespace in a value for a tag query
+        '''
+
+        return re.sub(r'(\W)', r'\\\1', str(value))
+
+    async def record_list_read(self, asset_list: str) -> None:
+        '''
+        Counts a read of a list. The counts are added to Redis at most once
+        per LIST_READS_FLUSH_INTERVAL seconds and are used to decide which
+        lists are stored as sorted sets
+
+        :param asset_list: the name of the list
+        '''
+
+        if (asset_list in self.list_reads
+                or len(self.list_reads) < AssetCache.MAX_TRACKED_LISTS):
+            self.list_reads[asset_list] = \
+                self.list_reads.get(asset_list, 0) + 1
+
+        now: float = monotonic()
+        if now - self.list_reads_flushed_at < \
+                AssetCache.LIST_READS_FLUSH_INTERVAL:
+            return
+
+        list_reads: dict[str, int] = self.list_reads
+        self.list_reads = {}
+        self.list_reads_flushed_at = now
+
+        reads_key: str = AssetCache.get_list_reads_key()
+        async with self.client.pipeline(transaction=False) as pipe:
+            for list_name, reads in list_reads.items():
+                pipe.zincrby(reads_key, reads, list_name)
+            pipe.expire(reads_key, 2 * AssetCache.LIST_READS_WINDOW)
+            await pipe.execute()
+
+    @staticmethod
+    def get_list_reads_key(windows_ago: int = 0) -> str:
+        '''
+        Gets the key for the sorted set with the reads of lists
+
+        :param windows_ago: 0 for the current time window, 1 for the
+        previous time window
+        :returns: the key
+        '''
+
+        window: int = int(
+            datetime.now(tz=UTC).timestamp() / AssetCache.LIST_READS_WINDOW
+        ) - windows_ago
+        return f'{AssetCache.LIST_READS_KEY_PREFIX}{window}'
+
+    async def review_materialized_lists(
+        self, threshold: int = POPULAR_LIST_THRESHOLD,
+        backfill: int = MATERIALIZED_LIST_BACKFILL
+    ) -> tuple[int, int]:
+        '''
+        Promotes popular lists to sorted sets and demotes lists that are no
+        longer popular, based on the reads of the lists in the previous time
+        window.
+
+        Promotion takes two reviews. Processes adding assets to the cache
+        only learn that a list is being promoted after up to
+        MATERIALIZED_LISTS_REFRESH seconds. The sorted set is backfilled
+        from the search index once that time has passed, so that assets
+        added in the mean time are not missing from the list. Readers switch
+        to the sorted set after that
+
+        :param threshold: the minimum number of reads for a popular list
+        :param backfill: the number of assets to add to a promoted list
+        :returns: the number of promoted and demoted lists
+        '''
+
+        metrics: dict[str, Gauge | Counter] = config.metrics
+
+        reads_key: str = AssetCache.get_list_reads_key(windows_ago=1)
+        popular_lists: set[str] = set(
+            await self.client.zrangebyscore(reads_key, threshold, '+inf')
+        )
+        materialized_lists: set[str] = set(
+            await self.client.smembers(AssetCache.MATERIALIZED_LISTS_KEY)
+        )
+        promoting_lists: dict[str, str] = await self.client.hgetall(
+            AssetCache.PROMOTING_LISTS_KEY
+        )
+
+        now: float = datetime.now(tz=UTC).timestamp()
+
+        promoted: int = 0
+        list_name: str
+        promoting_since: str
+        for list_name, promoting_since in promoting_lists.items():
+            if (now - float(promoting_since)
+                    <= AssetCache.MATERIALIZED_LISTS_REFRESH):
+                continue
+
+            data: str | None = await self.client.hget(
+                AssetCache.LIST_DEFINITIONS_KEY, list_name
+            )
+            if data:
+                await self._materialize_list(
+                    list_name, orjson.loads(data), backfill
+                )
+                await self.client.sadd(
+                    AssetCache.MATERIALIZED_LISTS_KEY, list_name
+                )
+                materialized_lists.add(list_name)
+                promoted += 1
+
+            await self.client.hdel(AssetCache.PROMOTING_LISTS_KEY, list_name)
+
+        for list_name in popular_lists - materialized_lists \
+                - set(promoting_lists):
+            # Lists for channels and recent uploads are always stored as
+            # sorted sets and do not have a definition
+            if await self.client.hexists(
+                    AssetCache.LIST_DEFINITIONS_KEY, list_name):
+                await self.client.hset(
+                    AssetCache.PROMOTING_LISTS_KEY, list_name, str(now)
+                )
+
+        demoted: int = 0
+        for list_name in materialized_lists - popular_lists:
+            if list_name in promoting_lists:
+                # Promoted during this review
+                continue
+
+            reads: float | None = await self.client.zscore(
+                reads_key, list_name
+            )
+            if (reads or 0) >= threshold / 2:
+                continue
+
+            # Readers switch to the search index before we delete the list
+            await self.client.srem(
+                AssetCache.MATERIALIZED_LISTS_KEY, list_name
+            )
+            asset_list = AssetList(list_name, redis=self.client)
+            await asset_list.delete()
+            await asset_list.bump_version()
+            demoted += 1
+
+        metric: str = 'assetcache_materialized_lists'
+        if metrics and metric in metrics:
+            metrics[metric].set(len(materialized_lists) - demoted)
+
+        _LOGGER.debug(
+            'Reviewed materialized lists', extra={
+                'promoted': promoted, 'demoted': demoted
+            }
+        )
+
+        return promoted, demoted
+
+    async def _materialize_list(self, list_name: str,
+                                definition: dict[str, str | bool | None],
+                                backfill: int) -> None:
+        '''
+        Creates the sorted set for a list from the search index
+
+        :param list_name: the name of the list
+        :param definition: the definition of the list
+        :param backfill: the number of assets to add to the list
+        '''
+
+        query: Query = Query(AssetCache.get_list_query(definition)).sort_by(
+            'published_timestamp', asc=False
+        ).paging(0, backfill).timeout(5 * 1000)
+        results = await self.client.ft(self.index_name).search(query)
+
+        items: dict[str, float] = {
+            doc_id: doc_data['published_timestamp']
+            for doc_id, doc_data in self._parse_search_results(results)
+            if 'published_timestamp' in doc_data
+        }
+
+        asset_list = AssetList(list_name, redis=self.client)
+        if items:
+            await self.client.zadd(asset_list.redis_key, items)
+            await asset_list.set_expiration()
+
+            # Record the membership so the sweeper removes the assets from
+            # this list when they expire
+            async with self.client.pipeline(transaction=False) as pipe:
+                for asset_key in items:
+                    lists_key: str = self.get_asset_lists_key(asset_key)
+                    pipe.sadd(lists_key, list_name)
+                    pipe.expire(
+                        lists_key,
+                        AssetCache.DEFAULT_EXPIRATION
+                        + AssetCache.ASSET_LISTS_GRACE, nx=True
+                    )
+                await pipe.execute()
+
+        await asset_list.bump_version()
+
+        _LOGGER.debug(
+            'Materialized list', extra={
+                'asset_list': list_name, 'assets': len(items)
+            }
+        )
+
+    async def get_list_version(self, asset_list: str) -> int:
+        '''
+        Gets the version of a list. The version changes when assets
+        get added to or removed from the list
+
+        :param asset_list: the name of the list
+        :returns: the version of the list
+        '''
+
+        if self.hot_list_versions is not None:
+            return await self.get_hot_list_version(asset_list)
+
+        return await AssetList(asset_list, redis=self.client).get_version()
+
+    async def get_hot_list_version(self, asset_list: str) -> int:
+        '''
+        Gets the version of a list. The version is read from Redis
+        at most once per 'hot_lists_lag' seconds
+
+        :param asset_list: the name of the list
+        :returns: the version of the list
+        '''
+
+        version: int | None = self.hot_list_versions.get(asset_list)
+        if version is None:
+            version = await AssetList(
+                asset_list, redis=self.client
+            ).get_version()
+            self.hot_list_versions.set(asset_list, version)
+
+        return version
+
     async def update_creators_list(self, member_id: UUID, creator: str
                                    ) -> None:
         '''
@@ -479,6 +1546,9 @@ class AssetCache(SearchableCache, Metrics):
         if metrics and metric in metrics:
             metrics[metric].inc()
 
+        # The sweeper removes the asset from the lists it was added to
+        await self.mark_stale(asset_key)
+
         return await self.client.delete(asset_key)
 
     async def refresh_asset(self, edge: Edge, asset_class_name: str,
@@ -529,6 +1599,13 @@ class AssetCache(SearchableCache, Metrics):
             metric = 'assetcache_refreshable_asset_not_found'
             if metrics and metric in metrics:
                 metrics[metric].inc()
+
+            # The asset was deleted by the member so it is not worth
+            # keeping in the cache until it expires
+            await self.mark_stale(
+                AssetCache.ASSET_KEY_PREFIX
+                + self.get_cursor(member_id, asset_id)
+            )
             return None
 
         if data['total_count'] > 1:
@@ -616,24 +1693,22 @@ class AssetCache(SearchableCache, Metrics):
             return ''
 
     @staticmethod
-    def get_list_permutations(member_id: UUID, asset_model: Asset,
-                              max_lists: int = 32) -> set[str]:
+    def get_list_definitions(asset_model: Asset, short_append: str,
+                             max_lists: int = 32
+                             ) -> dict[str, dict[str, str | bool | None]]:
         '''
-        Generate the names of the lists that this asset should be added to
+        Generate the names of the lists for the categories, keywords and
+        annotations of the asset, with the parameters to find the assets of
+        each list in the search index
 
         :param asset_model: the (pydantic) asset to generate the lists for
+        :param short_append: the appendix for lists of short assets
+        :param max_lists: the maximum number of lists for an asset
+        :returns: the lists with, for each list, the category, keyword,
+        annotation and whether the list is for short assets
         '''
-        # We use short_append to make sure vertically oriented assets
-        # go to separate lists from horizontally oriented assets.
-        short_append: str = AssetCache.get_short_appendix(asset_model)
 
-        log_data: dict[str, any] = {
-            'short_append': short_append,
-            'member_id': member_id,
-            'asset_id': asset_model.asset_id,
-            'creator': asset_model.creator,
-        }
-        lists_set: set[str] = set()
+        definitions: dict[str, dict[str, str | bool | None]] = {}
 
         categories: list[str] | None = sorted(
             [
@@ -656,6 +1731,8 @@ class AssetCache(SearchableCache, Metrics):
             ]
         )[:4]
 
+        short: bool = bool(short_append)
+
         # Create the lists that we will add the asset to.
         # Structure is: <category>-<keyword>-<annotation>-<short>
         category: str
@@ -663,23 +1740,69 @@ class AssetCache(SearchableCache, Metrics):
         annotation: str
         for category in categories:
             list_name: str = category + short_append
-            lists_set.add(list_name)
+            definitions[list_name] = {
+                'category': category, 'keyword': None, 'annotation': None,
+                'short': short
+            }
 
             for keyword in keywords:
                 list_name: str = category + '-' + keyword + short_append
-                lists_set.add(list_name)
+                definitions[list_name] = {
+                    'category': category, 'keyword': keyword,
+                    'annotation': None, 'short': short
+                }
 
                 for annotation in annotations:
                     list_name = (
                         category + '-' + keyword + '-' + annotation +
                         short_append
                     )
-                    lists_set.add(list_name)
+                    definitions[list_name] = {
+                        'category': category, 'keyword': keyword,
+                        'annotation': annotation, 'short': short
+                    }
 
         # We don't want too many lists
         list_permutations: int = max_lists - 2
-        if len(lists_set) > list_permutations:
-            lists_set = set((list(lists_set))[:list_permutations])
+        if len(definitions) > list_permutations:
+            definitions = dict(list(definitions.items())[:list_permutations])
+
+        return definitions
+
+    @staticmethod
+    def get_list_permutations(member_id: UUID, asset_model: Asset,
+                              max_lists: int = 32,
+                              short_append: str | None = None,
+                              definitions: dict[str, dict] | None = None
+                              ) -> set[str]:
+        '''
+        Generate the names of the lists that this asset should be added to
+
+        :param asset_model: the (pydantic) asset to generate the lists for
+        :param max_lists: the maximum number of lists for an asset
+        :param short_append: the appendix for lists of short assets, if
+        already known
+        :param definitions: the output of get_list_definitions(), if
+        already known
+        '''
+        # We use short_append to make sure vertically oriented assets
+        # go to separate lists from horizontally oriented assets.
+        if short_append is None:
+            short_append = AssetCache.get_short_appendix(asset_model)
+
+        log_data: dict[str, any] = {
+            'short_append': short_append,
+            'member_id': member_id,
+            'asset_id': asset_model.asset_id,
+            'creator': asset_model.creator,
+        }
+
+        if definitions is None:
+            definitions = AssetCache.get_list_definitions(
+                asset_model, short_append, max_lists
+            )
+
+        lists_set: set[str] = set(definitions)
 
         # Add the asset to the list for the creator
         if asset_model.creator:
@@ -767,3 +1890,40 @@ class AssetCache(SearchableCache, Metrics):
         metrics[metric] = Counter(
             metric, 'Multiple assets found in pod when refreshing'
         )
+
+        metric = 'assetcache_hot_list_page_hits'
+        metrics[metric] = Counter(
+            metric, 'Pages of lists served from process memory'
+        )
+
+        metric = 'assetcache_hot_list_page_misses'
+        metrics[metric] = Counter(
+            metric, 'Pages of lists not available in process memory'
+        )
+
+        metric = 'assetcache_list_pages_coalesced'
+        metrics[metric] = Counter(
+            metric, 'Requests for pages of lists that shared the result of '
+            'a concurrent request for the same page'
+        )
+
+        metric = 'assetcache_list_exports'
+        metrics[metric] = Counter(
+            metric, 'Exports of lists as newline-delimited JSON'
+        )
+
+        metric = 'assetcache_assets_compressed'
+        metrics[metric] = Counter(
+            metric, 'Assets stored with their non-indexed fields compressed'
+        )
+
+        metric = 'assetcache_query_list_pages'
+        metrics[metric] = Counter(
+            metric, 'Pages of lists answered by the search index'
+        )
+
+        metric = 'assetcache_materialized_lists'
+        metrics[metric] = Gauge(
+            metric, 'Lists of categories, keywords and annotations stored '
+            'as sorted sets'
+        )
@@ -0,0 +1,264 @@
+'''
+Compression of the JSON documents of assets in the asset cache. The fields
+of an asset that are not used by the search index or by the Lua scripts are
+stored as a single compressed string instead of as JSON. RedisJSON uses a
+lot of memory for each element of a document so this significantly reduces
+the memory needed for assets with thumbnails, chapters and monetizations.
+
+The fields are compressed with deflate using a dictionary built from the
+fragments of JSON that the assets in the cache have in common. The
+dictionaries are stored in Redis so that all processes reading from the
+cache can decompress the assets.
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import re
+import zlib
+
+from base64 import b64encode
+from base64 import b64decode
+from logging import Logger
+from logging import getLogger
+from collections import Counter
+
+import orjson
+
+from redis import Redis
+
+_LOGGER: Logger = getLogger(__name__)
+
+
+class UnknownDictionaryError(LookupError):
+    '''
+    Raised when a document was compressed with a dictionary that has not
+    been loaded from Redis
+    '''
+    pass
+
+
+class AssetCompressor:
+    # Hash with the base64-encoded dictionaries, keyed by their ID
+    DICTIONARIES_KEY: str = 'asset_compression_dictionaries'
+    DICTIONARY_ID_KEY: str = 'asset_compression_dictionary_id'
+
+    # The field in the document with the compressed fields of the node
+    BLOB_FIELD: str = 'compressed'
+
+    # Deflate only uses the last 32KB of the dictionary
+    MAX_DICTIONARY_SIZE: int = 32 * 1024
+    # Serialized assets are split into fragments after the separators of
+    # JSON and of URLs. Fragments shorter than this save little when
+    # deflate finds them in the dictionary
+    RX_FRAGMENT: re.Pattern[bytes] = re.compile(rb'[^,:{}\[\]/]*[,:{}\[\]/]?')
+    MIN_FRAGMENT_LENGTH: int = 4
+    COMPRESSION_LEVEL: int = 9
+    # Raw deflate stream, without zlib header and checksum
+    WBITS: int = -15
+
+    def __init__(self, kept_fields: set[str]) -> None:
+        '''
+        Constructor
+
+        :param kept_fields: the fields of the node that must remain stored
+        as JSON
+        '''
+
+        self.kept_fields: set[str] = kept_fields
+
+        # Dictionary ID 0 is used for compression without a dictionary
+        self.dictionaries: dict[int, bytes] = {0: b''}
+        self.dictionary_id: int = 0
+
+    async def load(self, redis: Redis) -> int:
+        '''
+        Loads the dictionaries from Redis. New documents get compressed with
+        the most recent dictionary
+
+        :param redis: the Redis client
+        :returns: the ID of the most recent dictionary
+        '''
+
+        data: dict[str, str] = await redis.hgetall(
+            AssetCompressor.DICTIONARIES_KEY
+        )
+
+        dictionary_id: str
+        dictionary: str
+        for dictionary_id, dictionary in data.items():
+            self.dictionaries[int(dictionary_id)] = b64decode(dictionary)
+
+        self.dictionary_id = max(self.dictionaries)
+
+        _LOGGER.debug(
+            'Loaded compression dictionaries', extra={
+                'dictionaries': len(data),
+                'dictionary_id': self.dictionary_id
+            }
+        )
+
+        return self.dictionary_id
+
+    async def train(self, redis: Redis, samples: list[dict[str, any]]
+                    ) -> int:
+        '''
+        Creates a new dictionary from sample assets and stores it in Redis
+
+        :param redis: the Redis client
+        :param samples: the nodes of uncompressed assets
+        :returns: the ID of the new dictionary, or of the current dictionary
+        if there were no samples
+        '''
+
+        dictionary: bytes = self.build_dictionary(
+            [self._serialize_compressible(node) for node in samples]
+        )
+        if not dictionary:
+            return self.dictionary_id
+
+        dictionary_id: int = await redis.incr(
+            AssetCompressor.DICTIONARY_ID_KEY
+        )
+        await redis.hset(
+            AssetCompressor.DICTIONARIES_KEY, str(dictionary_id),
+            b64encode(dictionary).decode('utf-8')
+        )
+
+        self.dictionaries[dictionary_id] = dictionary
+        self.dictionary_id = dictionary_id
+
+        _LOGGER.debug(
+            'Trained compression dictionary', extra={
+                'dictionary_id': dictionary_id,
+                'samples': len(samples),
+                'size': len(dictionary)
+            }
+        )
+
+        return dictionary_id
+
+    @staticmethod
+    def build_dictionary(samples: list[bytes]) -> bytes:
+        '''
+        Builds a dictionary for deflate from the fragments that occur in
+        more than one sample. Field names, thumbnail URL prefixes and
+        monetization boilerplate are shared by many assets and end up in
+        the dictionary, while titles and IDs that are unique to an asset do
+        not. Deflate encodes matches close to the end of the dictionary
+        with fewer bits, so the fragments that save the most bytes over
+        all samples are put last
+
+        :param samples: the serialized samples
+        :returns: the dictionary, which is empty if the samples have no
+        fragments in common
+        '''
+
+        # We count in how many samples each fragment occurs
+        occurrences: Counter[bytes] = Counter()
+        sample: bytes
+        for sample in samples:
+            fragments: set[bytes] = set(
+                AssetCompressor.RX_FRAGMENT.findall(sample)
+            )
+            occurrences.update(
+                fragment for fragment in fragments
+                if len(fragment) >= AssetCompressor.MIN_FRAGMENT_LENGTH
+            )
+
+        shared: list[bytes] = sorted(
+            (
+                fragment for fragment, count in occurrences.items()
+                if count > 1
+            ),
+            key=lambda fragment: occurrences[fragment] * len(fragment),
+            reverse=True
+        )
+
+        selected: list[bytes] = []
+        size: int = 0
+        fragment: bytes
+        for fragment in shared:
+            if size + len(fragment) > AssetCompressor.MAX_DICTIONARY_SIZE:
+                break
+
+            selected.append(fragment)
+            size += len(fragment)
+
+        return b''.join(reversed(selected))
+
+    def compress(self, asset_data: dict[str, any]) -> dict[str, any]:
+        '''
+        Moves the fields of the node that do not need to be stored as JSON
+        to a compressed string
+
+        :param asset_data: the JSON-serializable edge of the asset, which
+        is modified in place
+        :returns: the modified asset_data
+        '''
+
+        node: dict[str, any] = asset_data['node']
+        compressible: dict[str, any] = {
+            key: node.pop(key) for key in list(node)
+            if key not in self.kept_fields
+        }
+        if not compressible:
+            return asset_data
+
+        compressor = zlib.compressobj(
+            AssetCompressor.COMPRESSION_LEVEL, zlib.DEFLATED,
+            AssetCompressor.WBITS,
+            zdict=self.dictionaries[self.dictionary_id]
+        )
+        data: bytes = compressor.compress(orjson.dumps(compressible))
+        data += compressor.flush()
+
+        asset_data[AssetCompressor.BLOB_FIELD] = (
+            f'{self.dictionary_id}:{b64encode(data).decode("utf-8")}'
+        )
+
+        return asset_data
+
+    def decompress(self, asset_data: dict[str, any]) -> dict[str, any]:
+        '''
+        Restores the compressed fields of the node of an asset
+
+        :param asset_data: the edge of the asset as stored in the cache,
+        which is modified in place
+        :returns: the modified asset_data
+        :raises: UnknownDictionaryError if the dictionary used to compress
+        the asset has not been loaded
+        '''
+
+        blob: str | None = asset_data.get(AssetCompressor.BLOB_FIELD)
+        if not blob:
+            return asset_data
+
+        dictionary_id: str
+        data: str
+        dictionary_id, data = blob.split(':', 1)
+        dictionary: bytes | None = self.dictionaries.get(int(dictionary_id))
+        if dictionary is None:
+            raise UnknownDictionaryError(
+                f'Compression dictionary {dictionary_id} not loaded'
+            )
+
+        decompressor = zlib.decompressobj(
+            AssetCompressor.WBITS, zdict=dictionary
+        )
+        fields: bytes = decompressor.decompress(b64decode(data))
+        fields += decompressor.flush()
+
+        del asset_data[AssetCompressor.BLOB_FIELD]
+        asset_data['node'].update(orjson.loads(fields))
+
+        return asset_data
+
+    def _serialize_compressible(self, node: dict[str, any]) -> bytes:
+        return orjson.dumps(
+            {
+                key: value for key, value in node.items()
+                if key not in self.kept_fields
+            }
+        )
@@ -19,6 +19,8 @@ from byoda import config
 class AssetList:
     IN_HEAD_LIST_LEN: int = 20
     LISTS_KEY_PREFIX: str = 'lists:'
+    # Counter that is incremented whenever the assets in a list change
+    VERSION_KEY_PREFIX: str = 'list_versions:'
     DEFAULT_EXPIRATION: int = 90 * 86400
 
     def __init__(self, list_name: str, is_internal: bool = False,
@@ -166,7 +168,8 @@ class AssetList:
         metrics: dict[str, Counter | Gauge] = config.metrics
         metrics['asset_list_delete_asset'].inc()
 
-        await self.redis.zrem(self.redis_key, cursor)
+        if await self.redis.zrem(self.redis_key, cursor):
+            await self.bump_version()
 
     async def in_head(self, creator: str) -> bool:
         '''
@@ -232,4 +235,42 @@ class AssetList:
         :returns: The length of the list
         '''
 
-        return await self.redis.zcard(self.redis_key)
\ No newline at end of file
+        return await self.redis.zcard(self.redis_key)
+
+    @staticmethod
+    def get_version_key(list_name: str) -> str:
+        '''
+        Get the Redis key for the version counter of the list
+
+        :param list_name: The name of the list of assets
+        :returns: The Redis key for the version counter
+        '''
+
+        return f'{AssetList.VERSION_KEY_PREFIX}{list_name}'
+
+    async def bump_version(self) -> int:
+        '''
+        Increments the version of the list. Readers that cache pages of
+        the list use the version to find out whether their copy is stale
+
+        :returns: The new version of the list
+        '''
+
+        version_key: str = AssetList.get_version_key(self.name)
+        version: int = await self.redis.incr(version_key)
+        await self.redis.expire(version_key, AssetList.DEFAULT_EXPIRATION)
+
+        return version
+
+    async def get_version(self) -> int:
+        '''
+        Gets the version of the list
+
+        :returns: The version of the list, 0 if the list has never changed
+        '''
+
+        version: str | None = await self.redis.get(
+            AssetList.get_version_key(self.name)
+        )
+
+        return int(version or 0)
@@ -8,7 +8,10 @@ Asset Cache maintains lists of channels
 
 import base64
 
+import orjson
+
 from uuid import UUID
+from uuid import uuid4
 from typing import Self
 from logging import Logger
 from logging import getLogger
@@ -17,6 +20,7 @@ from datetime import datetime
 from datetime import timedelta
 
 from redis import Redis
+from redis.commands.core import AsyncScript
 
 from fastapi.encoders import jsonable_encoder
 
@@ -31,11 +35,45 @@ from byoda.models.data_api_models import EdgeResponse as Edge
 
 from byoda.datacache.searchable_cache import SearchableCache
 from byoda.datacache.asset_list import AssetList
+from byoda.datacache.redis_pool import TrackedKeys
 
 from byoda import config
 
 _LOGGER: Logger = getLogger(__name__)
 
+# Atomically claims the channels that are due for a refresh by moving them
+# in the sorted set of all creators to the time when their lease expires
+# and recording the lease token of the claim in the hash of leases.
+# Channels that are not acknowledged or released before the lease expires
+# will be claimed again by the next call
+CLAIM_CHANNELS_SCRIPT: str = '''
+local entries = redis.call(
+    'ZRANGE', KEYS[1], '-inf', ARGV[1], 'BYSCORE', 'LIMIT', 0, ARGV[2],
+    'WITHSCORES'
+)
+for i = 1, #entries, 2 do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[3], entries[i])
+    redis.call('HSET', KEYS[2], entries[i], ARGV[4])
+end
+return entries
+'''
+
+# Atomically moves a claimed channel in the sorted set of all creators,
+# but only if the lease token matches the token of the latest claim of
+# the channel. This prevents a worker whose lease expired from releasing
+# or acknowledging a channel that has since been claimed by another worker
+RELEASE_CHANNEL_SCRIPT: str = '''
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+'''
+
 
 class ChannelCache(SearchableCache, Metrics):
     '''
@@ -52,34 +90,68 @@ class ChannelCache(SearchableCache, Metrics):
     '''
     CHANNEL_SHORTCUT_PREFIX: str = 'channel_shortcuts'
     CHANNEL_SHORTCUT_EXPIRATION: int = 2 * 365 * 24 * 60 * 60
+    # Hashes, keyed by shortcut, with the channel as rendered by the
+    # '/channel' API and its ETag, so that the channel can be served
+    # for a shortcut without having to look up and serialize the channel
+    CHANNEL_PAGE_PREFIX: str = 'channel_pages'
+    # Hash with the lease token of the latest claim of each channel
+    CHANNEL_LEASES_KEY: str = 'channel_leases'
 
-    def __init__(self, connection_string: str) -> None:
+    def __init__(self, connection_string: str, track_keys: bool = False
+                 ) -> None:
         '''
         Constructor for the ChannelCache class
 
         :param connection_string: the connection string for the
         Read/Write-enabled cache
+        :param track_keys: keep shortcuts, channels and pre-rendered
+        channels in process memory, with Redis notifying us when they
+        change. The caller must run
+        self.tracked_keys.listen() in a task
         '''
 
         super().__init__(connection_string)
 
+        self.tracked_keys: TrackedKeys | None = None
+        if track_keys:
+            self.tracked_keys = TrackedKeys(
+                connection_string, [
+                    f'{ChannelCache.CHANNEL_SHORTCUT_PREFIX}:',
+                    f'{ChannelCache.CHANNEL_KEY_PREFIX}:',
+                    f'{ChannelCache.CHANNEL_PAGE_PREFIX}:'
+                ]
+            )
+
         self.setup_metrics()
 
         self.channel_list: AssetList = AssetList(
             ChannelCache.ALL_CREATORS, False, self.client
         )
 
+        self.claim_script: AsyncScript = self.client.register_script(
+            CLAIM_CHANNELS_SCRIPT
+        )
+        self.release_script: AsyncScript = self.client.register_script(
+            RELEASE_CHANNEL_SCRIPT
+        )
+
     @staticmethod
-    async def setup(connection_string: str) -> Self:
+    async def setup(connection_string: str, track_keys: bool = False
+                    ) -> Self:
         '''
         Factory for the ChannelCache class
 
         :param connection_string: the connection string for the cache
+        :param track_keys: keep shortcuts, channels and pre-rendered
+        channels in process memory,
+        with Redis notifying us when they change
         :returns: instance of ChannelCache
         :raises: (none)
         '''
 
-        self: ChannelCache = ChannelCache(connection_string)
+        self: ChannelCache = ChannelCache(
+            connection_string, track_keys=track_keys
+        )
 
         await self.create_search_index()
 
@@ -211,7 +283,10 @@ class ChannelCache(SearchableCache, Metrics):
 
     async def get_oldest_channel(self) -> Edge[Channel] | None:
         '''
-        Removes and returns the oldest channel in the cache
+        Removes and returns the oldest channel in the cache. The channel is
+        lost if the caller does not call add_oldest_channel_back(), use
+        claim_oldest_channels() when the caller may fail or when multiple
+        workers refresh channels
 
         :returns: None if no channels are in the list, Edge[Channel] if a
         channel is in the list
@@ -326,6 +401,147 @@ class ChannelCache(SearchableCache, Metrics):
             }
         )
 
+    async def claim_oldest_channels(
+        self, count: int, lease: int
+    ) -> list[tuple[Edge[Channel], float, str]]:
+        '''
+        Claims a batch of the oldest channels in the list of channels. The
+        channels remain in the list but they will not be claimed again
+        until the lease expires, so multiple workers can refresh channels
+        concurrently. Each claimed channel must be acknowledged with
+        ack_channel() or returned with release_channel() before the lease
+        expires, after that the channel can be claimed by another worker
+
+        :param count: the maximum number of channels to claim
+        :param lease: the number of seconds before the claim expires
+        :returns: the claimed channels, the timestamps with which they
+        were in the list of channels and the lease token of the claim
+        '''
+
+        all_creators_key: str = ChannelCache.get_all_creators_key()
+        now: float = datetime.now(tz=UTC).timestamp()
+        token: str = uuid4().hex
+
+        data: list[str] = await self.claim_script(
+            keys=[all_creators_key, ChannelCache.CHANNEL_LEASES_KEY],
+            args=[now, count, now + lease, token]
+        )
+        if not data:
+            _LOGGER.debug('No channels in the cache')
+            return []
+
+        claims: list[tuple[UUID, str, str, float]] = []
+        for index in range(0, len(data) - 1, 2):
+            key_name: str = data[index]
+            try:
+                member_id: UUID
+                creator: str
+                member_id, creator = ChannelCache.parse_channel_key(key_name)
+            except Exception as exc:
+                _LOGGER.warning(f'Invalid channel key {key_name}: {exc}')
+                await self.client.zrem(all_creators_key, key_name)
+                await self.client.hdel(
+                    ChannelCache.CHANNEL_LEASES_KEY, key_name
+                )
+                continue
+
+            score: float = float(data[index + 1])
+            claims.append((member_id, creator, key_name, score))
+
+        if not claims:
+            return []
+
+        keys: list[str] = [key_name for _, _, key_name, _ in claims]
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key_name in keys:
+                pipe.ttl(key_name)
+            ttls: list[int] = await pipe.execute()
+
+        values: list = await self.client.json().mget(keys, '$.node')
+
+        now = datetime.now(tz=UTC).timestamp()
+        results: list[tuple[Edge[Channel], float, str]] = []
+        for (member_id, creator, _, score), ttl, value in zip(
+                claims, ttls, values):
+            if isinstance(value, list):
+                value = value[0] if value else None
+
+            # Channels without data in the cache get placeholder data so
+            # that the worker will refresh them right away
+            channel: Channel = Channel(creator=creator)
+            expires_at: int = 0
+            if value and ttl >= 0:
+                channel = Channel(**value)
+                expires_at = int(now) + ttl
+
+            edge: Edge[Channel] = Edge(
+                cursor=ChannelCache.get_cursor(member_id, creator),
+                node=channel, origin=member_id, expires_at=expires_at
+            )
+            results.append((edge, score, token))
+
+        _LOGGER.debug(
+            'Claimed channels', extra={
+                'all_creators_key': all_creators_key,
+                'channels': len(results),
+                'lease': lease,
+            }
+        )
+
+        return results
+
+    async def release_channel(self, member_id: UUID, creator: str,
+                              timestamp: float, token: str) -> bool:
+        '''
+        Returns a claimed channel to the list of channels
+
+        :param member_id: the member that originated the channel
+        :param creator: the name of the creator/channel
+        :param timestamp: the timestamp after which the channel can be claimed
+        again, use the timestamp returned by claim_oldest_channels() to put
+        the channel back in its original position
+        :param token: the lease token returned by claim_oldest_channels()
+        :returns: whether the channel was still claimed with the lease token
+        and in the list of channels
+        '''
+
+        metrics: dict[str, Counter | Gauge] = config.metrics
+
+        all_creators_key: str = ChannelCache.get_all_creators_key()
+        key_name: str = ChannelCache.get_channel_key(member_id, creator)
+
+        result: int = await self.release_script(
+            keys=[all_creators_key, ChannelCache.CHANNEL_LEASES_KEY],
+            args=[key_name, token, timestamp]
+        )
+
+        if not result:
+            _LOGGER.debug(
+                'Lease of channel expired or channel no longer exists',
+                extra={'member_id': member_id, 'creator': creator}
+            )
+            metric: str = 'channelcache_leases_lost'
+            if metrics and metric in metrics:
+                metrics[metric].inc()
+
+        return bool(result)
+
+    async def ack_channel(self, member_id: UUID, creator: str, token: str
+                          ) -> bool:
+        '''
+        Acknowledges that a claimed channel has been refreshed, which moves
+        the channel to the end of the list of channels
+
+        :param member_id: the member that originated the channel
+        :param creator: the name of the creator/channel
+        :param token: the lease token returned by claim_oldest_channels()
+        :returns: whether the channel was still claimed with the lease token
+        and in the list of channels
+        '''
+
+        now: float = datetime.now(tz=UTC).timestamp()
+        return await self.release_channel(member_id, creator, now, token)
+
     async def get_channel(self, member_id: UUID, creator: str
                           ) -> Edge[Channel] | None:
         '''
@@ -345,6 +561,28 @@ class ChannelCache(SearchableCache, Metrics):
         cursor: str = ChannelCache.get_cursor(member_id, creator)
         return await self.get_channel_by_cursor(cursor)
 
+    async def get_channel_etag(self, member_id: UUID, creator: str
+                               ) -> str | None:
+        '''
+        Gets the hash of the content of a channel, without reading the
+        channel
+
+        :param member_id: the member that originated the channel
+        :param creator: the name of the channel
+        :returns: the hash or None if the channel is not in the cache or was
+        stored without a hash
+        '''
+
+        cursor: str = ChannelCache.get_cursor(member_id, creator)
+        key_name: str = ChannelCache.get_channel_key_for_cursor(cursor)
+
+        if self.tracked_keys:
+            node_data: dict[str, any] | None = self.tracked_keys.get(key_name)
+            if node_data:
+                return node_data.get(ChannelCache.ETAG_FIELD)
+
+        return await self.get_etag_by_key(key_name)
+
     async def get_channel_by_cursor(self, cursor: str) -> Edge[Channel] | None:
         '''
         Get a channel from the cache based on its cursor
@@ -362,9 +600,19 @@ class ChannelCache(SearchableCache, Metrics):
 
         _LOGGER.debug('Getting channel data for cursor', extra=log_data)
 
-        node_data: dict[str, any] | None = await self.client.json().get(
-            key_name
-        )
+        node_data: dict[str, any] | None = None
+        if self.tracked_keys:
+            node_data = self.tracked_keys.get(key_name)
+
+        if not node_data:
+            generation: int | None = None
+            if self.tracked_keys:
+                generation = self.tracked_keys.generation
+
+            node_data = await self.client.json().get(key_name)
+
+            if self.tracked_keys:
+                self.tracked_keys.set(key_name, node_data, generation)
 
         if not node_data:
             return None
@@ -448,11 +696,13 @@ class ChannelCache(SearchableCache, Metrics):
 
         channel_data: dict[str, any] = jsonable_encoder(channel)
         cursor: str = ChannelCache.get_cursor(member_id, channel.creator)
+        etag: str = ChannelCache.get_etag(channel_data)
 
         edge_data: dict[str, any] = {
             'cursor': cursor,
             'origin': str(member_id),
-            'node': channel_data
+            'node': channel_data,
+            ChannelCache.ETAG_FIELD: etag
         }
 
         _LOGGER.debug(f'Setting channel data for key: {key}')
@@ -468,8 +718,102 @@ class ChannelCache(SearchableCache, Metrics):
 
         await self.set_shortcut(member_id, channel.creator)
 
+        await self.set_channel_page(member_id, channel, etag)
+
         return True
 
+    @staticmethod
+    def get_channel_page_key(shortcut: str) -> str:
+        '''
+        Gets the cache key for the pre-rendered channel
+
+        :param shortcut: the shortcut of the channel
+        :returns: the key
+        '''
+
+        return f'{ChannelCache.CHANNEL_PAGE_PREFIX}:{shortcut}'
+
+    @staticmethod
+    def render_channel(member_id: UUID, channel: Channel) -> str:
+        '''
+        Renders the channel as the '/channel' API returns it
+
+        :param member_id: the member that originated the channel
+        :param channel: the channel
+        :returns: the JSON-encoded EdgeResponse[Channel]
+        '''
+
+        edge: Edge[Channel] = Edge[Channel](
+            cursor=ChannelCache.get_cursor(member_id, channel.creator),
+            origin=member_id, node=channel
+        )
+
+        return orjson.dumps(jsonable_encoder(edge)).decode('utf-8')
+
+    async def set_channel_page(self, member_id: UUID, channel: Channel,
+                               etag: str) -> None:
+        '''
+        Stores the pre-rendered channel under the shortcut of the channel.
+        The pre-rendered channel expires together with the channel data
+
+        :param member_id: the member that originated the channel
+        :param channel: the channel
+        :param etag: the hash of the channel data
+        '''
+
+        shortcut: str = ChannelCache.get_shortcut_value(
+            member_id, channel.creator
+        )
+        page_key: str = ChannelCache.get_channel_page_key(shortcut)
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                page_key, mapping={
+                    ChannelCache.ETAG_FIELD: etag,
+                    'edge': ChannelCache.render_channel(member_id, channel)
+                }
+            )
+            pipe.expire(page_key, self.DEFAULT_EXPIRATION)
+            await pipe.execute()
+
+    async def get_channel_page(self, shortcut: str
+                               ) -> tuple[str, str] | None:
+        '''
+        Gets the pre-rendered channel for a shortcut with a single read
+        from Redis
+
+        :param shortcut: the shortcut of the channel
+        :returns: the JSON-encoded EdgeResponse[Channel] and its ETag, or
+        None if there is no pre-rendered channel for the shortcut
+        '''
+
+        page_key: str = ChannelCache.get_channel_page_key(shortcut)
+
+        page: tuple[str, str] | None = None
+        if self.tracked_keys:
+            page = self.tracked_keys.get(page_key)
+
+        if page:
+            return page
+
+        generation: int | None = None
+        if self.tracked_keys:
+            generation = self.tracked_keys.generation
+
+        edge: str | None
+        etag: str
+        edge, etag = await self.client.hmget(
+            page_key, ['edge', ChannelCache.ETAG_FIELD]
+        )
+        if not edge:
+            return None
+
+        page = (edge, etag)
+        if self.tracked_keys:
+            self.tracked_keys.set(page_key, page, generation)
+
+        return page
+
     @staticmethod
     def get_shortcut_value(member_id: UUID, creator: str) -> str:
         '''
@@ -536,14 +880,37 @@ class ChannelCache(SearchableCache, Metrics):
         shortcut_key: str = \
             f'{ChannelCache.CHANNEL_SHORTCUT_PREFIX}:{shortcut}'
 
-        value: any = await self.client.get(shortcut_key)
-
-        # If a shortcut is being used then we extend its expiration
-        await self.client.expire(
-            shortcut_key, time=timedelta(
-                seconds=self.CHANNEL_SHORTCUT_EXPIRATION
+        value: any = None
+        if self.tracked_keys:
+            value = self.tracked_keys.get(shortcut_key)
+
+        if value is None and self.tracked_keys:
+            generation: int = self.tracked_keys.generation
+
+            # Extending the expiration changes the key, which would make
+            # Redis invalidate the key that we just read, so we only do
+            # that when half of the expiration period has passed
+            ttl: int
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.get(shortcut_key)
+                pipe.ttl(shortcut_key)
+                value, ttl = await pipe.execute()
+
+            if value and 0 <= ttl < self.CHANNEL_SHORTCUT_EXPIRATION / 2:
+                await self.client.expire(
+                    shortcut_key, self.CHANNEL_SHORTCUT_EXPIRATION
+                )
+            else:
+                self.tracked_keys.set(shortcut_key, value, generation)
+        elif value is None:
+            value = await self.client.get(shortcut_key)
+
+            # If a shortcut is being used then we extend its expiration
+            await self.client.expire(
+                shortcut_key, time=timedelta(
+                    seconds=self.CHANNEL_SHORTCUT_EXPIRATION
+                )
             )
-        )
 
         log_data: dict[str, any] = {
             'shortcut': shortcut,
@@ -588,6 +955,12 @@ class ChannelCache(SearchableCache, Metrics):
             metric, 'Total number of channels in the cache'
         )
 
+        metric = 'channelcache_leases_lost'
+        metrics[metric] = Counter(
+            metric, 'Claimed channels released or acknowledged after the '
+            'lease expired'
+        )
+
     async def in_cache(self, member_id: UUID, creator: str) -> bool:
         '''
         Check if an asset is in the cache.
@@ -13,10 +13,10 @@ from logging import getLogger
 
 import orjson
 
-import redis.asyncio as redis
-
 from byoda.datatypes import CacheType
 
+from byoda.datacache.redis_pool import get_redis_client
+
 from .kv_cache import KVCache
 
 _LOGGER: Logger = getLogger(__name__)
@@ -59,7 +59,7 @@ class KVRedis(KVCache):
         )
 
         self.connection_string = connection_string
-        self.driver = await redis.from_url(connection_string)
+        self.driver = get_redis_client(connection_string)
 
         await self.driver.ping()
 
@@ -369,3 +369,94 @@ class KVRedis(KVCache):
             value = 0
 
         return int(value)
+
+    async def stream_add(self, key: str, fields: dict[str, str],
+                         maxlen: int | None = None) -> str:
+        '''
+        Appends an entry to a stream
+
+        :param key: the key of the stream
+        :param fields: the fields of the entry
+        :param maxlen: the approximate maximum number of entries to keep
+        in the stream
+        :returns: the ID of the new entry
+        '''
+
+        key = self.get_annotated_key(key)
+
+        entry_id: bytes | str = await self.driver.xadd(
+            key, fields, maxlen=maxlen, approximate=True
+        )
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode('utf-8')
+
+        _LOGGER.debug(f'Added entry {entry_id} to stream for key {key}')
+
+        return entry_id
+
+    async def stream_read(self, key: str, after: str, count: int
+                          ) -> list[tuple[str, dict[str, str]]]:
+        '''
+        Reads the entries of a stream after the specified entry ID
+
+        :param key: the key of the stream
+        :param after: the ID of the last entry that was already read
+        :param count: the maximum number of entries to read
+        :returns: list of entry ID and the fields of the entry
+        '''
+
+        key = self.get_annotated_key(key)
+
+        data: list = await self.driver.xread({key: after}, count=count)
+
+        entries: list[tuple[str, dict[str, str]]] = []
+        if data:
+            # With RESP2, the data is a list of [key, entries] and with
+            # RESP3 a dict with the key as key
+            stream_entries: list = \
+                data[0][1] if isinstance(data, list) else \
+                list(data.values())[0][0]
+            for entry_id, fields in stream_entries:
+                entries.append(
+                    (
+                        self._decode(entry_id),
+                        {
+                            self._decode(name): self._decode(value)
+                            for name, value in fields.items()
+                        }
+                    )
+                )
+
+        _LOGGER.debug(f'Read {len(entries)} entries from stream {key}')
+
+        return entries
+
+    async def stream_range_id(self, key: str, last: bool = False
+                              ) -> str | None:
+        '''
+        Gets the ID of the first or last entry of a stream
+
+        :param key: the key of the stream
+        :param last: get the ID of the last entry instead of the first
+        :returns: the entry ID or None if the stream is empty
+        '''
+
+        key = self.get_annotated_key(key)
+
+        entries: list
+        if last:
+            entries = await self.driver.xrevrange(key, count=1)
+        else:
+            entries = await self.driver.xrange(key, count=1)
+
+        if not entries:
+            return None
+
+        return self._decode(entries[0][0])
+
+    @staticmethod
+    def _decode(value: bytes | str) -> str:
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+
+        return value
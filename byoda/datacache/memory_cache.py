@@ -0,0 +1,109 @@
+'''
+Bounded in-process cache with least-recently-used eviction and an
+optional time-to-live per entry. The cache is not shared between
+processes so it is only suitable for data where a bounded amount of
+staleness is acceptable
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+from time import monotonic
+from typing import Hashable
+from collections import OrderedDict
+
+
+class MemoryCache:
+    def __init__(self, max_items: int, ttl: float | None = None) -> None:
+        '''
+        Constructor
+
+        :param max_items: the maximum number of entries in the cache. When
+        the cache is full, the least recently used entry is evicted
+        :param ttl: the default number of seconds that an entry remains
+        valid, or None if entries do not expire
+        :raises: ValueError if max_items is not a positive integer
+        '''
+
+        if not isinstance(max_items, int) or max_items <= 0:
+            raise ValueError('max_items must be an integer > 0')
+
+        self.max_items: int = max_items
+        self.ttl: float | None = ttl
+
+        self.data: OrderedDict[Hashable, tuple[float | None, object]] = \
+            OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Hashable) -> object | None:
+        '''
+        Gets an entry from the cache
+
+        :param key: the key of the entry
+        :returns: the value or None if the entry is not in the cache or
+        has expired
+        '''
+
+        entry: tuple[float | None, object] | None = self.data.get(key)
+        if entry is None:
+            return None
+
+        expires_at: float | None
+        value: object
+        expires_at, value = entry
+        if expires_at is not None and expires_at < monotonic():
+            del self.data[key]
+            return None
+
+        self.data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: object, ttl: float | None = None
+            ) -> None:
+        '''
+        Adds or replaces an entry in the cache
+
+        :param key: the key of the entry
+        :param value: the value to store, must not be None
+        :param ttl: the number of seconds the entry remains valid, if not
+        specified then the default TTL of the cache is used
+        '''
+
+        if value is None:
+            raise ValueError('Can not store None in the cache')
+
+        if ttl is None:
+            ttl = self.ttl
+
+        expires_at: float | None = None
+        if ttl is not None:
+            expires_at = monotonic() + ttl
+
+        self.data[key] = (expires_at, value)
+        self.data.move_to_end(key)
+
+        while len(self.data) > self.max_items:
+            self.data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> bool:
+        '''
+        Removes an entry from the cache
+
+        :param key: the key of the entry
+        :returns: whether the entry was in the cache
+        '''
+
+        return self.data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        '''
+        Removes all entries from the cache
+        '''
+
+        self.data.clear()
@@ -0,0 +1,293 @@
+'''
+Process-wide registry of Redis connection pools, so that all caches and
+stores that connect to the same Redis server share one pool of
+connections instead of each creating their own, and an in-process cache
+for small, read-mostly keys that Redis invalidates using client-side
+caching ('CLIENT TRACKING')
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+from asyncio import AbstractEventLoop
+from asyncio import get_running_loop
+from weakref import WeakKeyDictionary
+from logging import Logger
+from logging import getLogger
+
+from anyio import sleep
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+import redis.asyncio as redis
+
+from redis.asyncio.connection import ConnectionPool
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.asyncio.connection import AbstractConnection
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+
+from byoda.datacache.memory_cache import MemoryCache
+
+from byoda import config
+
+_LOGGER: Logger = getLogger(__name__)
+
+# Connections can not be used across event loops so we keep the pools
+# per event loop. In the servers and workers there is a single event loop
+_POOLS: WeakKeyDictionary[
+    AbstractEventLoop, dict[tuple[str, bool, int], ConnectionPool]
+] = WeakKeyDictionary()
+
+# Maximum number of connections per pool, None for no limit
+MAX_CONNECTIONS: int | None = None
+
+
+def get_redis_client(connection_string: str, decode_responses: bool = False,
+                     protocol: int = 2) -> Redis:
+    '''
+    Gets a Redis client that uses the connection pool for the Redis server.
+    Closing the client does not close the connections of the pool
+
+    :param connection_string: the URL for the Redis server
+    :param decode_responses: whether the client returns str instead of bytes
+    :param protocol: the version of the Redis protocol, 2 or 3
+    :returns: the Redis client
+    '''
+
+    try:
+        loop: AbstractEventLoop = get_running_loop()
+    except RuntimeError:
+        # Without a running event loop, we can not share connections
+        return redis.from_url(
+            connection_string, decode_responses=decode_responses,
+            protocol=protocol
+        )
+
+    pools: dict[tuple[str, bool, int], ConnectionPool] = \
+        _POOLS.setdefault(loop, {})
+
+    key: tuple[str, bool, int] = (
+        connection_string, decode_responses, protocol
+    )
+    pool: ConnectionPool | None = pools.get(key)
+    if pool is None:
+        # With a limit on the number of connections, requests wait for a
+        # connection to become available instead of failing
+        pool_class: type[ConnectionPool] = ConnectionPool
+        if MAX_CONNECTIONS:
+            pool_class = BlockingConnectionPool
+
+        pool = pool_class.from_url(
+            connection_string, decode_responses=decode_responses,
+            protocol=protocol, max_connections=MAX_CONNECTIONS
+        )
+        pools[key] = pool
+        _LOGGER.debug(
+            'Created Redis connection pool', extra={
+                'decode_responses': decode_responses,
+                'protocol': protocol,
+                'pools': len(pools)
+            }
+        )
+
+    return redis.Redis(connection_pool=pool)
+
+
+async def close_pools() -> None:
+    '''
+    Closes the connections of all the pools of the current event loop
+    '''
+
+    pools: dict[tuple[str, bool, int], ConnectionPool] = _POOLS.pop(
+        get_running_loop(), {}
+    )
+
+    pool: ConnectionPool
+    for pool in pools.values():
+        await pool.disconnect()
+
+
+class TrackedKeys:
+    '''
+    In-process cache for keys that Redis notifies us about when they
+    change. The listen() method must run in a task for the cache to be
+    used. If the connection for the notifications fails then the cache
+    is not used until the connection has been restored
+    '''
+
+    INVALIDATION_CHANNEL: str = '__redis__:invalidate'
+    RECONNECT_INTERVAL: float = 5.0
+
+    def __init__(self, connection_string: str, prefixes: list[str],
+                 max_items: int = 10000, ttl: float = 300.0) -> None:
+        '''
+        Constructor
+
+        :param connection_string: the URL for the Redis server
+        :param prefixes: the prefixes of the keys to cache
+        :param max_items: the maximum number of keys in the cache
+        :param ttl: the maximum number of seconds a key remains cached,
+        which limits how stale a key can be if a notification is lost
+        '''
+
+        self.connection_string: str = connection_string
+        self.prefixes: list[str] = prefixes
+
+        self.cache: MemoryCache = MemoryCache(max_items, ttl)
+
+        # Incremented whenever keys get invalidated, so that a value read
+        # from Redis while an invalidation arrives does not get cached
+        self.generation: int = 0
+
+        self.is_tracking: bool = False
+
+        self.setup_metrics()
+
+    def setup_metrics(self) -> None:
+        metrics: dict[str, Counter | Gauge] = config.metrics
+
+        metric: str = 'redis_tracked_keys_hits'
+        if metric in metrics:
+            return
+
+        metrics[metric] = Counter(
+            metric, 'Reads of tracked keys served from process memory'
+        )
+
+        metric = 'redis_tracked_keys_misses'
+        metrics[metric] = Counter(
+            metric, 'Reads of tracked keys not available in process memory'
+        )
+
+        metric = 'redis_tracked_keys_invalidations'
+        metrics[metric] = Counter(
+            metric, 'Tracked keys invalidated by Redis'
+        )
+
+    def get(self, key: str) -> object | None:
+        '''
+        Gets the value of a key from the cache
+
+        :param key: the key
+        :returns: the value or None if the key is not in the cache or the
+        cache can not be used
+        '''
+
+        metrics: dict[str, Counter | Gauge] = config.metrics
+
+        value: object | None = None
+        if self.is_tracking:
+            value = self.cache.get(key)
+
+        metric: str = 'redis_tracked_keys_misses'
+        if value is not None:
+            metric = 'redis_tracked_keys_hits'
+
+        if metrics and metric in metrics:
+            metrics[metric].inc()
+
+        return value
+
+    def set(self, key: str, value: object, generation: int) -> None:
+        '''
+        Adds the value of a key read from Redis to the cache
+
+        :param key: the key
+        :param value: the value
+        :param generation: the value of self.generation before the key was
+        read from Redis
+        '''
+
+        if self.is_tracking and value is not None \
+                and generation == self.generation:
+            self.cache.set(key, value)
+
+    async def listen(self) -> None:
+        '''
+        Receives the notifications from Redis for changes to the tracked
+        keys and removes those keys from the cache. Reconnects to Redis
+        when the connection fails. Runs until cancelled.
+        '''
+
+        while True:
+            try:
+                await self._listen()
+            except (RedisError, OSError) as exc:
+                _LOGGER.warning(
+                    'Lost connection for key invalidations',
+                    extra={'exception': str(exc)}
+                )
+
+            self.is_tracking = False
+            self.cache.clear()
+            await sleep(TrackedKeys.RECONNECT_INTERVAL)
+
+    async def _listen(self) -> None:
+        pool: ConnectionPool = ConnectionPool.from_url(
+            self.connection_string, decode_responses=True, protocol=2
+        )
+        connection: AbstractConnection = pool.make_connection()
+        try:
+            await connection.connect()
+            await connection.send_command('CLIENT', 'ID')
+            client_id: int = await connection.read_response()
+
+            # In protocol version 2, the notifications are sent as messages
+            # to a connection that is subscribed to the invalidation channel
+            args: list[str] = [
+                'CLIENT', 'TRACKING', 'ON', 'REDIRECT', str(client_id),
+                'BCAST'
+            ]
+            prefix: str
+            for prefix in self.prefixes:
+                args.extend(['PREFIX', prefix])
+
+            await connection.send_command(*args)
+            await connection.read_response()
+
+            await connection.send_command(
+                'SUBSCRIBE', TrackedKeys.INVALIDATION_CHANNEL
+            )
+            await connection.read_response()
+
+            self.cache.clear()
+            self.is_tracking = True
+            _LOGGER.debug(
+                'Tracking keys', extra={'prefixes': self.prefixes}
+            )
+
+            while True:
+                message: list = await connection.read_response(timeout=None)
+                if message and message[0] == 'message':
+                    self.invalidate(message[2])
+        finally:
+            self.is_tracking = False
+            await connection.disconnect()
+
+    def invalidate(self, keys: list[str] | None) -> None:
+        '''
+        Removes keys from the cache
+
+        :param keys: the keys to remove, None to remove all keys
+        '''
+
+        metrics: dict[str, Counter | Gauge] = config.metrics
+
+        self.generation += 1
+
+        if keys is None:
+            # Redis sends a null value when the database was flushed
+            self.cache.clear()
+            return
+
+        key: str
+        for key in keys:
+            self.cache.delete(key)
+
+        metric: str = 'redis_tracked_keys_invalidations'
+        if metrics and metric in metrics:
+            metrics[metric].inc(len(keys))
@@ -16,6 +16,7 @@ are stored in keys starting with that prefix.
 :license    : GPLv3
 '''
 
+from math import isfinite
 from uuid import UUID
 from typing import Self
 from hashlib import sha256
@@ -25,14 +26,15 @@ from logging import getLogger
 from datetime import UTC
 from datetime import datetime
 from datetime import timedelta
+from collections.abc import AsyncIterator
 
 import orjson
 
+from anyio import sleep
+
 from redis import Redis
 from redis.commands.core import Script
 
-import redis.asyncio as redis
-
 from redis.exceptions import ResponseError
 from redis.commands.search.index_definition import IndexType
 from redis.commands.search.index_definition import IndexDefinition
@@ -50,6 +52,11 @@ from prometheus_client import Gauge
 from byoda.datatypes import IngestStatus
 from byoda.models.data_api_models import DEFAULT_PAGE_LENGTH
 
+from byoda.util.token_bucket import TokenBucket
+
+from byoda.datacache.redis_pool import get_redis_client
+from byoda.datacache.asset_compressor import AssetCompressor
+
 from byoda import config
 
 from .asset_list import AssetList
@@ -67,9 +74,39 @@ class SearchableCache:
     ALL_CREATORS: str = 'all_creators'
     CHANNEL_KEY_PREFIX: str = 'channels'
 
+    # Field in the JSON docs with the hash of the node, used as ETag
+    ETAG_FIELD: str = 'etag'
+    # Fields stored as numbers next to the node so that lists and search
+    # results can be sorted and filtered on them. The node keeps the
+    # ISO-8601 strings returned by the APIs
+    TIMESTAMP_FIELDS: tuple[str, ...] = (
+        'created_timestamp', 'published_timestamp'
+    )
+    # Fields of the JSON docs that are only used by the cache and that are
+    # not part of the edges returned by the APIs
+    CACHE_FIELDS: tuple[str, ...] = (ETAG_FIELD, *TIMESTAMP_FIELDS)
+
     DEFAULT_EXPIRATION: int = 86400             # seconds
     DEFAULT_EXPIRATION_LISTS: int = 90 * 86400  # days
 
+    # Set per asset with the names of the lists the asset was added to, so
+    # that the sweeper can remove the asset from those lists
+    ASSET_LISTS_KEY_PREFIX: str = 'asset_lists:'
+    # The sets outlive the asset so the sweeper can still read them
+    ASSET_LISTS_GRACE: int = 7 * 86400
+    # Sorted set of the keys of assets, scored by when they expire. Assets
+    # that must be removed before they expire get a score of 0
+    SWEEP_KEY: str = 'asset_sweep'
+    SWEEP_BATCH_SIZE: int = 100
+    SWEEP_MAX_ASSETS: int = 10000
+    # Maximum number of assets per second that the sweeper processes
+    SWEEP_RATE: float = 500.0
+
+    # Maximum number of search results read for a page sorted by the
+    # publication timestamp. Pages with more documents with the same
+    # timestamp as the last document of the page are truncated
+    SEARCH_MAX_SCANNED: int = 1000
+
     '''
     Data is arranged in Redis:
     - individual assets as JSON docs under 'assets:<cursor>'
@@ -98,7 +135,7 @@ class SearchableCache:
         :param connection_string: connection string for the Redis server
         '''
 
-        self.client: Redis[any] = redis.from_url(
+        self.client: Redis[any] = get_redis_client(
             connection_string, decode_responses=True
         )
 
@@ -138,6 +175,27 @@ class SearchableCache:
                 )
             )
 
+        metric = 'searchable_cache_assets_swept'
+        if metric not in metrics:
+            metrics[metric] = Counter(
+                metric, 'Expired or stale assets removed by the sweeper'
+            )
+
+        metric = 'searchable_cache_assets_sweep_rescheduled'
+        if metric not in metrics:
+            metrics[metric] = Counter(
+                metric, 'Assets checked by the sweeper that were refreshed'
+            )
+
+        metric = 'searchable_cache_truncated_pages'
+        if metric not in metrics:
+            metrics[metric] = Counter(
+                metric, (
+                    'Pages of search results truncated because too many '
+                    'documents have the same publication timestamp'
+                )
+            )
+
     @staticmethod
     async def setup(connection_string: str,
                     lua_functions_file: str = LUA_FUNCTIONS_FILE) -> Self:
@@ -155,14 +213,75 @@ class SearchableCache:
 
     async def create_search_index(self) -> None:
         try:
-            await self.client.ft(self.index_name).info()
-            _LOGGER.debug('Found existing search index so no action needed')
+            info: dict[str, any] = await self.client.ft(self.index_name).info()
+            _LOGGER.debug('Found existing search index')
         except ResponseError as exc:
             if 'Unknown index name' not in str(exc):
                 raise
 
             await self.create_index(SearchableCache.ASSET_KEY_PREFIX)
             _LOGGER.debug('Created search index')
+            return
+
+        existing: dict[str, str] = SearchableCache._get_index_attributes(info)
+
+        # Fields may have moved to another path in the JSON docs after the
+        # index was created. We recreate the index without deleting the
+        # documents, Redis then indexes the existing documents again
+        moved: list[str] = [
+            field.as_name for field in SearchableCache.get_index_schema()
+            if field.as_name in existing
+            and existing[field.as_name] != field.name
+        ]
+        if moved:
+            await self.client.ft(self.index_name).dropindex(
+                delete_documents=False
+            )
+            await self.create_index(SearchableCache.ASSET_KEY_PREFIX)
+            _LOGGER.info(
+                'Recreated search index', extra={'fields': moved}
+            )
+            return
+
+        # Fields may have been added to the schema after the index was
+        # created
+        missing: list[Field] = [
+            field for field in SearchableCache.get_index_schema()
+            if field.as_name not in existing
+        ]
+        if missing:
+            await self.client.ft(self.index_name).alter_schema_add(missing)
+            _LOGGER.debug(
+                'Added fields to search index', extra={
+                    'fields': [field.as_name for field in missing]
+                }
+            )
+
+    @staticmethod
+    def _get_index_attributes(info: dict[str, any]) -> dict[str, str]:
+        '''
+        Gets the names of the attributes of an existing search index and
+        the paths in the JSON docs that they index
+
+        :param info: the output of FT.INFO
+        :returns: the paths, keyed by the names of the attributes
+        '''
+
+        attributes: dict[str, str] = {}
+        for attribute in info.get('attributes', []):
+            if not isinstance(attribute, dict):
+                # Redis response protocol v2: list of key/value pairs
+                values: list = [
+                    value.decode('utf-8') if isinstance(value, bytes)
+                    else value
+                    for value in attribute
+                ]
+                attribute = dict(zip(values[0::2], values[1::2]))
+
+            attributes[attribute.get('attribute')] = \
+                attribute.get('identifier')
+
+        return attributes
 
     async def load_functions(self, lua_functions_file: str) -> None:
         try:
@@ -225,6 +344,39 @@ class SearchableCache:
 
         return cursor
 
+    @staticmethod
+    def get_etag(node: dict[str, any]) -> str:
+        '''
+        Calculates the hash of the content of a node, which we store with
+        the JSON doc of the node so that we can answer conditional requests
+        without reading the doc
+
+        :param node: the node, as it will be stored in the cache
+        :returns: the hash as 32 hexadecimal characters
+        '''
+
+        return sha256(
+            orjson.dumps(node, option=orjson.OPT_SORT_KEYS),
+            usedforsecurity=False
+        ).hexdigest()[0:32]
+
+    async def get_etag_by_key(self, key: str) -> str | None:
+        '''
+        Gets the hash of the content of a JSON doc in the cache
+
+        :param key: the key of the JSON doc
+        :returns: the hash or None if the doc does not exist or if it was
+        stored without a hash
+        '''
+
+        values: list[str] | None = await self.client.json().get(
+            key, f'$.{SearchableCache.ETAG_FIELD}'
+        )
+        if not values:
+            return None
+
+        return values[0]
+
     def annotate_key(self, key_prefix: str, cursor: str) -> str:
         '''
         Annotates the key with the cursor for storage in the cache
@@ -233,15 +385,15 @@ class SearchableCache:
 
         return f'{key_prefix.rstrip(":")}:{cursor}'
 
-    async def create_index(self, key_prefix: str) -> None:
+    @staticmethod
+    def get_index_schema() -> tuple[Field]:
         '''
-        Creates a Full Text index for assets as defined in the service
-        schema for 'byotube'
+        The fields of the search index for assets
 
-        :param key_prefix: The key prefix to use for the index
+        :returns: the fields for FT.CREATE
         '''
 
-        schema: tuple[Field] = (
+        return (
             TagField('$.cursor', as_name='cursor'),
             TextField('$.node.title', as_name='title', weight=4.0),
             TextField('$.node.subject', as_name='subject', weight=2.0),
@@ -254,15 +406,31 @@ class SearchableCache:
             TagField('$.node.asset_id', as_name='asset_id'),
             TagField('$.node.locale', as_name='locale'),
             NumericField(
-                '$.node.created_timestamp', as_name='created_timestamp',
+                '$.created_timestamp', as_name='created_timestamp',
                 sortable=True
             ),
             NumericField(
-                '$.node.published_timestamp', as_name='published_timestamp',
+                '$.published_timestamp', as_name='published_timestamp',
                 sortable=True
             ),
+            # The tag fields are used to answer queries for lists that
+            # are not stored as a sorted set
+            TagField('$.node.categories[*]', as_name='category_tags'),
+            TagField('$.node.keywords[*]', as_name='keyword_tags'),
+            TagField('$.node.annotations[*]', as_name='annotation_tags'),
+            NumericField('$.node.duration', as_name='duration'),
         )
 
+    async def create_index(self, key_prefix: str) -> None:
+        '''
+        Creates a Full Text index for assets as defined in the service
+        schema for 'byotube'
+
+        :param key_prefix: The key prefix to use for the index
+        '''
+
+        schema: tuple[Field] = SearchableCache.get_index_schema()
+
         key_prefix = key_prefix.rstrip(':') + ':'
         definition: IndexDefinition = IndexDefinition(
             prefix=[key_prefix], index_type=IndexType.JSON, language='English'
@@ -306,10 +474,145 @@ class SearchableCache:
         query = Query(query).paging(offset, num).timeout(5 * 1000)
         results: Result = await self.client.ft(self.index_name).search(query)
 
+        data: list[dict[str, any]] = [
+            doc_data for _, doc_data in self._parse_search_results(results)
+            if doc_data['node']['ingest_status'] in (
+                IngestStatus.PUBLISHED.value, IngestStatus.EXTERNAL.value
+            )
+        ]
+
+        metrics['searchable_cache_search_results_found'].set(len(data))
+        _LOGGER.debug(
+            'Found assets for query',
+            extra={'query': query, 'items': len(data)}
+        )
+
+        return data
+
+    async def search_page(self, query: str, num: int = 10,
+                          after: str | None = None
+                          ) -> tuple[list[dict[str, any]], str | None]:
+        '''
+        Perform a search in the cache, with the results sorted by
+        publication timestamp, newest first. Instead of an offset, pages are
+        located using a filter on the publication timestamp so each page
+        costs the same, regardless of how deep into the results it is.
+
+        :param query: The query to perform
+        :param num: The maximum number of search results to return
+        :param after: the continuation token returned for the previous page
+        :returns: a list of assets matching the query and the continuation
+        token for the next page, or None if there are no more results
+        :raises: ValueError if the continuation token is invalid
+        '''
+
+        metrics: dict[str, Counter | Gauge] = config.metrics
+
+        if num <= 0 or num > 100:
+            num = 10
+
+        search_text: str = (
+            f'({query}) @ingest_status:{{{IngestStatus.PUBLISHED.value}'
+            f'|{IngestStatus.EXTERNAL.value}}}'
+        )
+
+        after_score: float | None = None
+        after_key: str | None = None
+        if after:
+            after_score, after_key = SearchableCache._parse_search_token(
+                after
+            )
+
+        _LOGGER.debug(
+            'Received search query for page', extra={
+                'query': query, 'num': num, 'after': after
+            }
+        )
+
+        # We ask for one more result so we know whether there is a next page
+        docs: list[tuple[str, float, dict[str, any]]] = \
+            await self._search_newest(
+                search_text, num + 1, after_score, after_key
+            )
+
+        has_next_page: bool = len(docs) > num
+        docs = docs[:num]
+
+        metrics['searchable_cache_search_results_found'].set(len(docs))
+        _LOGGER.debug(
+            'Found assets for page of query',
+            extra={'query': query, 'items': len(docs)}
+        )
+
+        data: list[dict[str, any]] = [doc for _, _, doc in docs]
+        if not has_next_page:
+            return data, None
+
+        doc_id: str
+        timestamp: float
+        doc_id, timestamp, _ = docs[-1]
+
+        return data, f'{timestamp!r}:{doc_id}'
+
+    @staticmethod
+    def _parse_search_token(token: str) -> tuple[float, str]:
+        '''
+        Parses a continuation token for searches
+
+        :param token: the continuation token, '<timestamp>:<key>' of the
+        last search result of the previous page
+        :returns: the publication timestamp and the key of the last search
+        result of the previous page
+        :raises: ValueError if the token is invalid
+        '''
+
+        timestamp: str
+        key: str
+        timestamp, _, key = token.partition(':')
+        if not key:
+            raise ValueError('Invalid continuation token')
+
+        try:
+            score: float = float(timestamp)
+        except ValueError as exc:
+            raise ValueError(f'Invalid continuation token: {exc}')
+
+        if not isfinite(score):
+            raise ValueError('Invalid timestamp in continuation token')
+
+        return score, key
+
+    @staticmethod
+    def _parse_search_results(results: Result | dict
+                              ) -> list[tuple[str, dict[str, any]]]:
+        '''
+        Extracts the documents from the results of FT.SEARCH
+
+        :param results: the results returned by redis-py
+        :returns: the keys and the decoded documents
+        :raises: RuntimeError if the results could not be parsed
+        '''
+
+        return [
+            (doc_id, orjson.loads(doc))
+            for doc_id, doc in SearchableCache._get_raw_search_results(results)
+        ]
+
+    @staticmethod
+    def _get_raw_search_results(results: Result | dict
+                                ) -> list[tuple[str, str]]:
+        '''
+        Extracts the JSON-encoded documents from the results of FT.SEARCH
+
+        :param results: the results returned by redis-py
+        :returns: the keys and the JSON-encoded documents
+        :raises: RuntimeError if the results could not be parsed
+        '''
+
         # The data structure returned depends on the version of the response
         # protocol of the Redis APIs: v2 vs v3, which is configured in
         # config.yml
-        result_data: dict[str, any]
+        result_data: list
         if isinstance(results, dict):
             # Redis response protocol v3
             result_data = results.get('results')
@@ -321,31 +624,278 @@ class SearchableCache:
                 'Could not locate search results in data structure'
             )
 
-        data: list[dict[str, any]] = []
-        doc_data: dict[str, dict[str, any]]
+        data: list[tuple[str, str]] = []
         for doc in result_data:
             if isinstance(doc, dict):
                 # Redis response protocol v3
                 if ('extra_attributes' not in doc
                         or '$' not in doc['extra_attributes']):
                     continue
-                doc_data = orjson.loads(doc['extra_attributes']['$'])
+                data.append((doc.get('id'), doc['extra_attributes']['$']))
             else:
                 # Redis response protocol v2
-                doc_data = orjson.loads(doc.json)
+                data.append((doc.id, doc.json))
 
-            if (doc_data['node']['ingest_status'] in (
-                    IngestStatus.PUBLISHED.value,
-                    IngestStatus.EXTERNAL.value)):
-                data.append(doc_data)
+        return data
 
-        metrics['searchable_cache_search_results_found'].set(len(data))
-        _LOGGER.debug(
-            'Found assets for query',
-            extra={'query': query, 'items': len(data)}
+    async def get_query_page_values(self, search_text: str, key_prefix: str,
+                                    first: int = DEFAULT_PAGE_LENGTH,
+                                    after: str | None = None
+                                    ) -> tuple[str, bool]:
+        '''
+        Gets a page of the documents matching a search query, newest first,
+        serialized as QueryResponseModel. The cursors in the page are
+        compatible with the cursors for pages of lists so a list can be
+        paged through regardless of whether it is stored as a sorted set or
+        whether it is answered by the search index.
+
+        :param search_text: the FT.SEARCH query
+        :param key_prefix: The key prefix of the documents
+        :param first: The maximum number of documents to return
+        :param after: The 'end_cursor' returned for the previous page or the
+        cursor of the asset to start after
+        :returns: the JSON-encoded page and whether any of the edges in the
+        page have compressed fields
+        '''
+
+        if not isinstance(first, int) or first <= 0:
+            raise ValueError('first must be a integer > 0')
+
+        docs: list[str]
+        has_next_page: bool
+        end_cursor: str | None
+        compressed: bool
+        docs, has_next_page, end_cursor, compressed = \
+            await self._get_query_docs(search_text, key_prefix, first, after)
+
+        return (
+            SearchableCache.render_page(docs, has_next_page, end_cursor),
+            compressed
         )
 
-        return data
+    async def export_query_values(self, search_text: str, key_prefix: str,
+                                  chunk_size: int = 500
+                                  ) -> AsyncIterator[tuple[str, bool]]:
+        '''
+        Gets all documents matching a search query, newest first, as
+        newline-delimited JSON. The documents are read from the search index
+        in chunks so memory usage does not depend on the number of matching
+        documents
+
+        :param search_text: the FT.SEARCH query
+        :param key_prefix: The key prefix of the documents
+        :param chunk_size: the number of documents to read per query
+        :returns: chunks of newline-delimited JSON documents and whether
+        any of the documents in the chunk have compressed fields
+        '''
+
+        after: str | None = None
+        has_next_page: bool = True
+        while has_next_page:
+            docs: list[str]
+            compressed: bool
+            docs, has_next_page, after, compressed = \
+                await self._get_query_docs(
+                    search_text, key_prefix, chunk_size, after
+                )
+            if docs:
+                yield '\n'.join(docs) + '\n', compressed
+
+    async def _get_query_docs(self, search_text: str, key_prefix: str,
+                              first: int, after: str | None
+                              ) -> tuple[list[str], bool, str | None, bool]:
+        '''
+        Gets a page of the documents matching a search query, newest first
+
+        :returns: the JSON-encoded edges, whether there is a next page,
+        the cursor for the next page and whether any of the edges have
+        compressed fields
+        '''
+
+        after_score: float | None = None
+        after_key: str | None = None
+        if after:
+            after_score, after_key = await self._get_cursor_position(
+                after, key_prefix
+            )
+
+        docs: list[tuple[str, float, dict[str, any]]] = \
+            await self._search_newest(
+                search_text, first + 1, after_score, after_key
+            )
+
+        has_next_page: bool = len(docs) > first
+        docs = docs[:first]
+
+        end_cursor: str | None = None
+        if docs:
+            doc_id: str
+            timestamp: float
+            doc_id, timestamp, _ = docs[-1]
+            end_cursor = f'{timestamp!r}:{doc_id[len(key_prefix):]}'
+
+        edges: list[str] = []
+        compressed: bool = False
+        edge: dict[str, any]
+        for _, _, edge in docs:
+            compressed = compressed or AssetCompressor.BLOB_FIELD in edge
+            edges.append(orjson.dumps(edge).decode('utf-8'))
+
+        return edges, has_next_page, end_cursor, compressed
+
+    async def _search_newest(self, search_text: str, num: int,
+                             after_score: float | None = None,
+                             after_key: str | None = None
+                             ) -> list[tuple[str, float, dict[str, any]]]:
+        '''
+        Gets the documents matching a search query, newest first. Documents
+        with the same publication timestamp are ordered by their key in
+        reverse order, the same as the assets in the sorted sets of lists,
+        so that pages can be located with the timestamp and the key of the
+        last document of the previous page.
+
+        At most SEARCH_MAX_SCANNED search results are read. If more
+        documents have the timestamp of the last document of the page then
+        the page is truncated to the documents read and some of the
+        documents with that timestamp may not be returned on any page
+
+        :param search_text: the FT.SEARCH query
+        :param num: the maximum number of documents to return
+        :param after_score: the publication timestamp of the document to
+        start after
+        :param after_key: the key of the document to start after
+        :returns: the keys, publication timestamps and the edges of the
+        documents, without the fields that are only used by the cache
+        '''
+
+        if after_score is not None:
+            search_text += f' @published_timestamp:[-inf {after_score!r}]'
+
+        # The search index does not order documents with the same timestamp
+        # by their key so we read until we have all documents with the
+        # timestamp of the last document of the page. Each read asks for
+        # as many documents as were read before, so the number of reads
+        # grows with the logarithm of the number of documents read
+        docs: list[tuple[str, float, dict[str, any]]] = []
+        offset: int = 0
+        while True:
+            if offset >= self.SEARCH_MAX_SCANNED:
+                _LOGGER.warning(
+                    'Truncating page, too many documents with the same '
+                    'publication timestamp', extra={
+                        'search_text': search_text, 'scanned': offset
+                    }
+                )
+                metrics: dict[str, Counter | Gauge] = config.metrics
+                metric: str = 'searchable_cache_truncated_pages'
+                if metrics and metric in metrics:
+                    metrics[metric].inc()
+                break
+
+            batch_size: int = min(
+                max(num, offset), self.SEARCH_MAX_SCANNED - offset
+            )
+            query: Query = Query(search_text).sort_by(
+                'published_timestamp', asc=False
+            ).paging(offset, batch_size).timeout(5 * 1000)
+            results: Result = await self.client.ft(self.index_name).search(
+                query
+            )
+            batch: list[tuple[str, str]] = self._get_raw_search_results(
+                results
+            )
+            offset += len(batch)
+
+            timestamp: float | None = None
+            doc_id: str
+            doc: str
+            for doc_id, doc in batch:
+                data: dict[str, any] = orjson.loads(doc)
+                timestamp = data.get('published_timestamp')
+                if timestamp is None:
+                    # Documents stored before the timestamps were stored
+                    # next to the node are left out until they expire
+                    continue
+
+                # Documents with the same timestamp as the document to start
+                # after were on the previous page if their key is not lower
+                if (after_key is not None and timestamp == after_score
+                        and doc_id >= after_key):
+                    continue
+
+                docs.append(
+                    (
+                        doc_id, timestamp, {
+                            key: value for key, value in data.items()
+                            if key not in self.CACHE_FIELDS
+                        }
+                    )
+                )
+
+            if len(batch) < batch_size:
+                break
+
+            # Documents without the timestamp are sorted last
+            if timestamp is None:
+                break
+
+            if len(docs) >= num and timestamp < docs[num - 1][1]:
+                break
+
+        docs.sort(key=lambda item: (item[1], item[0]), reverse=True)
+
+        return docs[:num]
+
+    async def _get_cursor_position(self, cursor: str, key_prefix: str
+                                   ) -> tuple[float | None, str | None]:
+        '''
+        Gets the publication timestamp and the key of the asset for a cursor
+        of a page of a list
+
+        :param cursor: either '<score>:<asset cursor>' or an asset cursor
+        :param key_prefix: the key prefix for the assets
+        :returns: the timestamp and the key or None, None if the timestamp
+        could not be found
+        '''
+
+        if ':' in cursor:
+            score: str
+            asset_cursor: str
+            score, asset_cursor = cursor.split(':', 1)
+            try:
+                return float(score), key_prefix + asset_cursor
+            except ValueError:
+                return None, None
+
+        values: list[float] | None = await self.client.json().get(
+            key_prefix + cursor, '$.published_timestamp'
+        )
+        if not values:
+            return None, None
+
+        return values[0], key_prefix + cursor
+
+    @staticmethod
+    def render_page(edges: list[str], has_next_page: bool,
+                    end_cursor: str | None) -> str:
+        '''
+        Assembles a JSON-encoded QueryResponseModel from edges that are
+        already serialized to JSON
+
+        :param edges: the JSON-encoded edges
+        :param has_next_page: whether there are more edges after this page
+        :param end_cursor: the cursor of the last edge in the page
+        :returns: the JSON-encoded page
+        '''
+
+        page_info: str = orjson.dumps(
+            {'has_next_page': has_next_page, 'end_cursor': end_cursor}
+        ).decode('utf-8')
+
+        return (
+            f'{{"total_count":{len(edges)},"edges":[{",".join(edges)}],'
+            f'"page_info":{page_info}}}'
+        )
 
     async def get_list_values(self, asset_list: str | AssetList,
                               key_prefix: str,
@@ -363,6 +913,37 @@ class SearchableCache:
         :returns: A list of assets
         '''
 
+        page: str
+        page, _ = await self.get_list_page_values(
+            asset_list, key_prefix, first=first, after=after,
+            filter_name=filter_name, filter_value=filter_value
+        )
+
+        return orjson.loads(page)['edges']
+
+    async def get_list_page_values(self, asset_list: str | AssetList,
+                                   key_prefix: str,
+                                   first: int = DEFAULT_PAGE_LENGTH,
+                                   after: str = None,
+                                   filter_name: str | None = None,
+                                   filter_value: any = None
+                                   ) -> tuple[str, bool]:
+        '''
+        Gets a page of assets in a list, serialized as QueryResponseModel.
+        The Lua function assembles the edges from the nodes as they are
+        stored in the cache, without the fields only used by the cache.
+        Assets are validated when they are added to the cache so they can
+        be passed on as-is, unless their fields are compressed.
+
+        :param asset_list: The name of the list of assets, including the list
+        prefix
+        :param first: The maximum number of assets to return
+        :param after: The 'end_cursor' returned for the previous page or the
+        cursor of the asset to start after
+        :returns: the JSON-encoded page, with the newest asset first, and
+        whether any of the edges in the page have compressed fields
+        '''
+
         if first is not None and (not isinstance(first, int) or first <= 0):
             raise ValueError('first must be a integer > 0')
 
@@ -385,27 +966,71 @@ class SearchableCache:
             'filter_value': filter_value
         }
 
-        _LOGGER.debug('Getting list values', extra=log_data)
+        _LOGGER.debug('Getting list page', extra=log_data)
+
+        page: str
+        end_cursor: str
+        compressed: int
+        page, end_cursor, _, compressed = \
+            await self._function_get_list_assets(
+                keys=[asset_list.redis_key], args=[
+                    key_prefix, first, after or '', filter_name or '',
+                    filter_value or ''
+                ]
+            )
 
-        data: list[bytes] = await self._function_get_list_assets(
-            keys=[asset_list.redis_key], args=[
-                key_prefix, first, after or '', filter_name or '',
-                filter_value or ''
-            ]
-        )
-        results: list = []
-        for item in data:
-            if item:
-                results.append(orjson.loads(item))
+        log_data['end_cursor'] = end_cursor
+        _LOGGER.debug('Retrieved page for list', extra=log_data)
 
-        # Ordered set has ascending values while we want newest asset first
-        results.reverse()
+        return page, bool(compressed)
 
-        log_data['assets_retrieved'] = len(results)
+    async def export_list_values(self, asset_list: str | AssetList,
+                                 key_prefix: str, chunk_size: int = 500,
+                                 filter_name: str | None = None,
+                                 filter_value: any = None
+                                 ) -> AsyncIterator[tuple[str, bool]]:
+        '''
+        Gets all assets in a list, newest first, as newline-delimited JSON.
+        The assets are read from Redis in chunks, using the cursor of the
+        previous chunk, so memory usage does not depend on the length of
+        the list. Assets added to the list while the export is in progress
+        are not included
+
+        :param asset_list: The name of the list of assets
+        :param key_prefix: The key prefix for the assets
+        :param chunk_size: the number of assets to read per call to Redis
+        :param filter_name: the name of the field to filter on
+        :param filter_value: the value of the field to filter on
+        :returns: chunks of newline-delimited JSON assets and whether any
+        of the assets in the chunk have compressed fields
+        '''
+
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError('chunk_size must be a integer > 0')
+
+        if isinstance(asset_list, str):
+            asset_list = AssetList(asset_list, redis=self.client)
 
-        _LOGGER.debug('Retrieved assets for list', extra=log_data)
+        if filter_value:
+            filter_value = str(filter_value)
+
+        after: str = ''
+        has_next_page: int = 1
+        while has_next_page:
+            chunk: str
+            compressed: int
+            chunk, after, has_next_page, compressed = \
+                await self._function_get_list_assets(
+                    keys=[asset_list.redis_key], args=[
+                        key_prefix, chunk_size, after, filter_name or '',
+                        filter_value or '', 'ndjson'
+                    ]
+                )
+            if chunk:
+                yield chunk, bool(compressed)
 
-        return results
+            if not after:
+                break
 
     async def json_get(self, key_prefix: str, member_id: UUID | None = None,
                        asset_id: UUID | None = None) -> object:
@@ -442,7 +1067,8 @@ class SearchableCache:
         :param asset_lists: The lists that the asset should be added to
         :param asset_key_prefix: The prefix for the key to store the asset
         :param member_id: The member that originated the asset
-        :param asset_edge: The asset to add
+        :param asset_edge: The asset to add, with the timestamps of the node
+        also stored as numbers next to the node
         :param expires_in: number of seconds until the asset expires
         '''
 
@@ -482,6 +1108,12 @@ class SearchableCache:
 
         log_data['creator'] = creator
 
+        published_timestamp: float | None = asset_edge.get(
+            'published_timestamp'
+        )
+        if published_timestamp is None:
+            raise ValueError('asset_edge does not contain a timestamp')
+
         log_data['asset_lists'] = [
             asset_list.name for asset_list in asset_lists
         ]
@@ -498,6 +1130,7 @@ class SearchableCache:
                 'the existing cache entry', extra=log_data
             )
             await self.set_expiration(key, expires_in)
+            await self._schedule_sweep(key, expires_in)
 
             if creator:
                 await self.update_creator_list_expiration(creator, asset_lists)
@@ -512,6 +1145,7 @@ class SearchableCache:
         if not result:
             raise RuntimeError('Failed to set JSON key')
 
+        added_lists: list[str] = []
         asset_list: AssetList
         for asset_list in asset_lists:
             _LOGGER.debug(
@@ -519,7 +1153,7 @@ class SearchableCache:
                 extra=log_data | {
                     'key': key,
                     'list': asset_list.name,
-                    'expires': node['published_timestamp']
+                    'expires': published_timestamp
                 }
             )
 
@@ -537,9 +1171,11 @@ class SearchableCache:
                         add_asset = True
 
             if add_asset:
-                await asset_list.add(
-                    key, node['published_timestamp']
-                )
+                await asset_list.add(key, published_timestamp)
+                await asset_list.bump_version()
+                added_lists.append(asset_list.name)
+
+        await self._schedule_sweep(key, expires_in, added_lists)
 
         # For the ALL_ASSETS_LIST, we use cache expiration to rank
         # entries in the Redis sorted-set. For all other lists we use
@@ -552,6 +1188,388 @@ class SearchableCache:
             datetime.now(tz=UTC) + timedelta(seconds=expires_in)
         )
 
+    async def json_set_many(
+        self, assets: list[tuple[set[AssetList], dict, int | float]],
+        asset_key_prefix: str
+    ) -> int:
+        '''
+        Adds a batch of JSON documents to the cache and adds them to their
+        lists of assets. This has the same result as calling json_set() for
+        each asset but uses a fixed number of round-trips to Redis for the
+        whole batch: one pipeline to read whether the assets exist and the
+        heads of the lists, one JSON.MGET for the creators of the assets in
+        the heads of the lists and one pipeline for all writes
+
+        :param assets: list of the lists the asset should be added to,
+        the asset and the number of seconds until the asset expires
+        :param asset_key_prefix: The prefix for the key to store the assets
+        :returns: the number of assets that were not yet in the cache
+        :raises: ValueError if an asset is missing required fields
+        '''
+
+        metrics: dict[str, Counter | Gauge] = config.metrics
+
+        if not assets:
+            return 0
+
+        keys: list[str] = []
+        asset_lists: set[AssetList]
+        asset_edge: dict
+        expires_in: int | float
+        for asset_lists, asset_edge, expires_in in assets:
+            node: dict | None = asset_edge.get('node')
+            if not node:
+                raise ValueError('asset_edge does not contain a node')
+
+            asset_id: UUID | str | None = node.get('asset_id')
+            if not asset_id:
+                raise ValueError('node does not contain an asset_id field')
+
+            member_id: UUID | str | None = asset_edge.get('origin')
+            if not member_id:
+                raise ValueError('node does not contain an origin field')
+
+            if not node.get('creator'):
+                raise ValueError(
+                    f'Asset {asset_id} from member {member_id} does not '
+                    'have a value for creator'
+                )
+
+            if asset_edge.get('published_timestamp') is None:
+                raise ValueError('asset_edge does not contain a timestamp')
+
+            asset_edge['cursor'] = self.get_cursor(
+                str(member_id), str(asset_id)
+            )
+            keys.append(
+                self.annotate_key(asset_key_prefix, asset_edge['cursor'])
+            )
+
+        # The lists, other than the lists for channels, for which we need
+        # to know the length and the creators in the head of the list
+        head_lists: dict[str, AssetList] = {
+            asset_list.redis_key: asset_list
+            for asset_lists, _, _ in assets for asset_list in asset_lists
+            if not asset_list.is_channel_list()
+        }
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.exists(key)
+            for asset_list in head_lists.values():
+                pipe.zcard(asset_list.redis_key)
+                pipe.zrange(
+                    asset_list.redis_key, 1 - AssetList.IN_HEAD_LIST_LEN, -1,
+                    withscores=True
+                )
+            results: list = await pipe.execute()
+
+        exists: list[bool] = [bool(result) for result in results[:len(keys)]]
+
+        # The head of a list are the assets with the highest scores
+        list_lengths: dict[str, int] = {}
+        list_heads: dict[str, list[tuple[float, str]]] = {}
+        offset: int = len(keys)
+        for redis_key in head_lists:
+            list_lengths[redis_key] = results[offset]
+            list_heads[redis_key] = [
+                (float(score), key) for key, score in results[offset + 1]
+            ]
+            offset += 2
+
+        head_keys: list[str] = list(
+            set(key for head in list_heads.values() for _, key in head)
+        )
+        creators: dict[str, str | None] = {}
+        if head_keys:
+            values: list = await self.client.json().mget(
+                head_keys, '$.node.creator'
+            )
+            for head_key, value in zip(head_keys, values):
+                if isinstance(value, list):
+                    value = value[0] if value else None
+                creators[head_key] = value
+
+        all_assets_list = AssetList(
+            SearchableCache.ALL_ASSETS_LIST, redis=self.client
+        )
+
+        added: int = 0
+        bumped_lists: set[str] = set()
+        async with self.client.pipeline(transaction=False) as pipe:
+            # Assets in the head of a list that are no longer in the cache
+            for redis_key, head in list_heads.items():
+                missing: list[str] = [
+                    key for _, key in head if not creators.get(key)
+                ]
+                if missing:
+                    metrics['asset_list_node_not_found'].inc(len(missing))
+                    pipe.zrem(redis_key, *missing)
+                    bumped_lists.add(head_lists[redis_key].name)
+                    list_heads[redis_key] = [
+                        (score, key) for score, key in head
+                        if creators.get(key)
+                    ]
+
+            for (asset_lists, asset_edge, expires_in), key, key_exists in \
+                    zip(assets, keys, exists):
+                node = asset_edge['node']
+                creator: str = node['creator']
+                if key_exists:
+                    metrics['searchable_cache_asset_already_in_cache'].inc()
+                    pipe.expire(key, int(expires_in))
+                    self._schedule_sweep_pipe(pipe, key, expires_in)
+                    for asset_list in asset_lists:
+                        if asset_list.name.endswith(creator):
+                            pipe.expire(
+                                asset_list.redis_key,
+                                self.DEFAULT_EXPIRATION_LISTS
+                            )
+                    continue
+
+                metrics['searchable_cache_asset_not_yet_in_cache'].inc()
+                added += 1
+                pipe.json().set(key, '.', asset_edge)
+                pipe.expire(key, int(expires_in))
+
+                added_lists: list[str] = []
+                for asset_list in asset_lists:
+                    redis_key: str = asset_list.redis_key
+                    if redis_key in head_lists:
+                        head: list[tuple[float, str]] = list_heads[redis_key]
+                        if (list_lengths[redis_key]
+                                >= AssetList.IN_HEAD_LIST_LEN
+                                and any(
+                                    creators.get(head_key) == creator
+                                    for _, head_key in head
+                                )):
+                            metrics['asset_list_creator_in_head_of_list'].inc()
+                            continue
+
+                        # Later assets in the batch must see this asset if
+                        # it is in the head of the list
+                        list_lengths[redis_key] += 1
+                        head.append(
+                            (asset_edge['published_timestamp'], key)
+                        )
+                        head.sort()
+                        del head[:-(AssetList.IN_HEAD_LIST_LEN - 1)]
+
+                    metrics['asset_list_add_asset'].inc()
+                    pipe.zadd(
+                        redis_key, {key: asset_edge['published_timestamp']}
+                    )
+                    bumped_lists.add(asset_list.name)
+                    added_lists.append(asset_list.name)
+
+                self._schedule_sweep_pipe(pipe, key, expires_in, added_lists)
+
+                creators[key] = creator
+
+                # For the ALL_ASSETS_LIST, we use cache expiration to rank
+                # entries in the Redis sorted-set
+                pipe.zadd(
+                    all_assets_list.redis_key,
+                    {key: datetime.now(tz=UTC).timestamp() + expires_in},
+                    nx=True
+                )
+
+            if added:
+                pipe.expire(
+                    all_assets_list.redis_key, AssetList.DEFAULT_EXPIRATION
+                )
+
+            for list_name in bumped_lists:
+                version_key: str = AssetList.get_version_key(list_name)
+                pipe.incr(version_key)
+                pipe.expire(version_key, AssetList.DEFAULT_EXPIRATION)
+
+            await pipe.execute()
+
+        _LOGGER.debug(
+            'Added batch of assets to cache', extra={
+                'asset_key_prefix': asset_key_prefix,
+                'assets': len(assets),
+                'assets_added': added,
+                'lists_changed': len(bumped_lists),
+            }
+        )
+
+        return added
+
+    @staticmethod
+    def get_asset_lists_key(asset_key: str) -> str:
+        '''
+        Gets the key of the set with the names of the lists of an asset
+
+        :param asset_key: the key of the asset
+        :returns: the key of the set
+        '''
+
+        return f'{SearchableCache.ASSET_LISTS_KEY_PREFIX}{asset_key}'
+
+    def _schedule_sweep_pipe(self, pipe, asset_key: str,
+                             expires_in: int | float,
+                             asset_lists: list[str] | None = None) -> None:
+        '''
+        Adds the commands to a pipeline for recording when an asset expires
+        and which lists the asset was added to
+
+        :param pipe: the Redis pipeline
+        :param asset_key: the key of the asset
+        :param expires_in: the number of seconds until the asset expires
+        :param asset_lists: the names of the lists the asset was added to
+        '''
+
+        lists_key: str = self.get_asset_lists_key(asset_key)
+        if asset_lists:
+            pipe.sadd(lists_key, *asset_lists)
+
+        pipe.expire(
+            lists_key, int(expires_in) + SearchableCache.ASSET_LISTS_GRACE
+        )
+        pipe.zadd(
+            SearchableCache.SWEEP_KEY,
+            {asset_key: datetime.now(tz=UTC).timestamp() + expires_in}
+        )
+
+    async def _schedule_sweep(self, asset_key: str, expires_in: int | float,
+                              asset_lists: list[str] | None = None) -> None:
+        '''
+        Records when an asset expires and which lists the asset was added to
+
+        :param asset_key: the key of the asset
+        :param expires_in: the number of seconds until the asset expires
+        :param asset_lists: the names of the lists the asset was added to
+        '''
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            self._schedule_sweep_pipe(pipe, asset_key, expires_in, asset_lists)
+            await pipe.execute()
+
+    async def mark_stale(self, asset_key: str) -> None:
+        '''
+        Marks an asset for removal by the next sweep, regardless of when
+        the asset expires
+
+        :param asset_key: the key of the asset
+        '''
+
+        await self.client.zadd(SearchableCache.SWEEP_KEY, {asset_key: 0})
+
+    async def sweep_expired_assets(self,
+                                   batch_size: int = SWEEP_BATCH_SIZE,
+                                   max_assets: int = SWEEP_MAX_ASSETS,
+                                   rate: float = SWEEP_RATE) -> int:
+        '''
+        Removes expired and stale assets from all the lists they were added
+        to, from the all-assets list and from the search index. Assets are
+        processed in batches and the number of assets processed per second
+        is limited so that sweeps do not affect the latency of Redis
+
+        :param batch_size: the number of assets to process per batch
+        :param max_assets: the maximum number of assets to check in this
+        sweep
+        :param rate: the maximum number of assets to process per second
+        :returns: the number of assets that were removed
+        '''
+
+        bucket: TokenBucket = TokenBucket(rate, capacity=batch_size)
+
+        swept: int = 0
+        checked: int = 0
+        while checked < max_assets:
+            now: float = datetime.now(tz=UTC).timestamp()
+            items: list[tuple[str, float]] = await self.client.zrangebyscore(
+                SearchableCache.SWEEP_KEY, '-inf', now, start=0,
+                num=min(batch_size, max_assets - checked), withscores=True
+            )
+            if not items:
+                break
+
+            while not bucket.consume(len(items)):
+                await sleep(bucket.retry_after(len(items)))
+
+            checked += len(items)
+            swept += await self._sweep_assets(items)
+
+        if checked:
+            _LOGGER.debug(
+                'Swept assets', extra={
+                    'assets_checked': checked, 'assets_swept': swept
+                }
+            )
+
+        return swept
+
+    async def _sweep_assets(self, items: list[tuple[str, float]]) -> int:
+        '''
+        Removes a batch of assets, unless the asset was refreshed after it
+        was scheduled to be swept
+
+        :param items: the keys of the assets with their sweep scores
+        :returns: the number of assets that were removed
+        '''
+
+        metrics: dict[str, Counter | Gauge] = config.metrics
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for asset_key, _ in items:
+                pipe.ttl(asset_key)
+                pipe.smembers(self.get_asset_lists_key(asset_key))
+            results: list = await pipe.execute()
+
+        now: float = datetime.now(tz=UTC).timestamp()
+        all_assets_key: str = AssetList.get_key(
+            SearchableCache.ALL_ASSETS_LIST
+        )
+
+        swept: int = 0
+        rescheduled: int = 0
+        bumped_lists: set[str] = set()
+        async with self.client.pipeline(transaction=False) as pipe:
+            for index, (asset_key, score) in enumerate(items):
+                ttl: int = results[index * 2]
+                asset_lists: set[str] = results[index * 2 + 1]
+
+                # A TTL of -2 means the asset no longer exists. Assets that
+                # still exist were refreshed, unless they were marked stale
+                if score and ttl != -2:
+                    if ttl < 0:
+                        ttl = SearchableCache.DEFAULT_EXPIRATION
+                    pipe.zadd(
+                        SearchableCache.SWEEP_KEY, {asset_key: now + ttl}
+                    )
+                    rescheduled += 1
+                    continue
+
+                for list_name in asset_lists:
+                    pipe.zrem(AssetList.get_key(list_name), asset_key)
+                    bumped_lists.add(list_name)
+
+                pipe.zrem(all_assets_key, asset_key)
+                # Deleting the document also removes it from the search index
+                pipe.delete(asset_key, self.get_asset_lists_key(asset_key))
+                pipe.zrem(SearchableCache.SWEEP_KEY, asset_key)
+                swept += 1
+
+            for list_name in bumped_lists:
+                version_key: str = AssetList.get_version_key(list_name)
+                pipe.incr(version_key)
+                pipe.expire(version_key, AssetList.DEFAULT_EXPIRATION)
+
+            await pipe.execute()
+
+        metric: str = 'searchable_cache_assets_swept'
+        if metrics and metric in metrics:
+            metrics[metric].inc(swept)
+
+        metric = 'searchable_cache_assets_sweep_rescheduled'
+        if metrics and metric in metrics:
+            metrics[metric].inc(rescheduled)
+
+        return swept
+
     async def update_creator_list_expiration(
         self, creator: str, asset_lists: set[AssetList]
     ) -> None:
@@ -0,0 +1,80 @@
+'''
+Coalesces concurrent identical calls in a process so that only one of
+them does the work and the others wait for and share its result. This
+prevents a thundering herd on Redis when a popular item is not available
+in any of the in-process caches
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+from typing import Hashable
+from collections.abc import Callable
+from collections.abc import Awaitable
+
+from anyio import Event
+from anyio import get_cancelled_exc_class
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done: Event = Event()
+        self.result: object | None = None
+        self.exception: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        '''
+        Constructor
+        '''
+
+        self.calls: dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    async def run(self, key: Hashable, func: Callable[..., Awaitable],
+                  *args, **kwargs) -> tuple[object, bool]:
+        '''
+        Awaits func(*args, **kwargs), unless a call for the same key is
+        already in progress, in which case we wait for that call to complete
+        and return its result or raise its exception.
+
+        If the call in progress gets cancelled, one of the waiting callers
+        makes the call instead
+
+        :param key: the key identifying identical calls
+        :param func: the coroutine function to call
+        :returns: the result of the call and whether the result was shared
+        by another caller
+        :raises: the exception raised by the call
+        '''
+
+        while True:
+            call: _Call | None = self.calls.get(key)
+            if call is None:
+                break
+
+            await call.done.wait()
+
+            if isinstance(call.exception, get_cancelled_exc_class()):
+                continue
+
+            if call.exception:
+                raise call.exception
+
+            return call.result, True
+
+        call = _Call()
+        self.calls[key] = call
+        try:
+            call.result = await func(*args, **kwargs)
+            return call.result, False
+        except BaseException as exc:
+            call.exception = exc
+            raise
+        finally:
+            del self.calls[key]
+            call.done.set()
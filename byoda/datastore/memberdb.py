@@ -18,6 +18,7 @@ from ipaddress import ip_address
 from ipaddress import IPv4Address
 
 from byoda.datatypes import MemberStatus
+from byoda.datatypes import MemberChangeType
 from byoda.datatypes import CacheTech
 from byoda.datatypes import CacheType
 
@@ -28,8 +29,14 @@ _LOGGER: Logger = getLogger(__name__)
 Member = TypeVar('Member')
 
 MEMBERS_LIST = 'members'
+MEMBERS_CHANGES_STREAM = 'members-changes'
+# Approximate number of changes kept in the stream of member changes
+MEMBERS_CHANGES_MAXLEN = 100000
 MEMBER_ID_META_FORMAT = '{member_id}-meta'
 MEMBER_ID_DATA_FORMAT = '{member_id}-data'
+MEMBER_ID_BACKFILL_FORMAT = '{member_id}-backfill'
+# Stored instead of a cursor once all data of a member has been retrieved
+BACKFILL_COMPLETED = 'done'
 
 
 class MemberDb:
@@ -39,6 +46,10 @@ class MemberDb:
     The metadata of a member is stored in the MEMBER_ID_META_FORMAT
     ('{member_id}-meta') while the actual data is stored using the member_id
     string as key
+
+    Members joining, updating their registration and leaving are appended
+    to the MEMBERS_CHANGES_STREAM so that workers can follow the changes
+    instead of reading the full list of members
     '''
 
     def __init__(self, service_id: int, network_name: str) -> None:
@@ -142,9 +153,11 @@ class MemberDb:
         }
 
         # TODO: lookup in list is not scalable.
+        change: MemberChangeType = MemberChangeType.UPDATE
         if await self.pos(member_id) is None:
             _LOGGER.debug('Adding member to the list', extra=log_data)
             await self.add_member(member_id)
+            change = MemberChangeType.JOIN
 
         mid: str = MEMBER_ID_META_FORMAT.format(member_id=str(member_id))
         log_data['member_meta_id'] = mid
@@ -165,6 +178,8 @@ class MemberDb:
             }
         )
 
+        await self.add_member_change(member_id, change)
+
     async def get_meta(self, member_id: UUID) -> dict:
         '''
         Get the metadata for a member
@@ -221,11 +236,100 @@ class MemberDb:
         }
         if exists:
             _LOGGER.debug('Deleted the metadata for member', extra=log_data)
+            await self.add_member_change(member_id, MemberChangeType.LEAVE)
         else:
             _LOGGER.debug('Member not found', extra=log_data)
 
         return exists
 
+    async def add_member_change(self, member_id: UUID,
+                                change: MemberChangeType) -> str:
+        '''
+        Appends a change of a member to the stream of member changes
+
+        :param member_id: the member that changed
+        :param change: the type of change
+        :returns: the ID of the change in the stream
+        '''
+
+        kvcache: KVCache = self.kvcache
+        change_id: str = await kvcache.stream_add(
+            MEMBERS_CHANGES_STREAM,
+            {'member_id': str(member_id), 'change': change.value},
+            maxlen=MEMBERS_CHANGES_MAXLEN
+        )
+
+        return change_id
+
+    async def get_member_changes(self, after: str, count: int = 1000
+                                 ) -> list[tuple[str, UUID, MemberChangeType]]:
+        '''
+        Gets the changes of members after the specified change ID
+
+        :param after: the ID of the last change that was already processed,
+        '0-0' to read all changes still in the stream
+        :param count: the maximum number of changes to return
+        :returns: list of change ID, member ID and type of change
+        :raises: ValueError if changes after the specified change ID
+        have already been trimmed from the stream
+        '''
+
+        kvcache: KVCache = self.kvcache
+
+        first_id: str | None = await kvcache.stream_range_id(
+            MEMBERS_CHANGES_STREAM
+        )
+        if (first_id and after != '0-0'
+                and MemberDb._stream_id(first_id)
+                > MemberDb._stream_id(after)):
+            # The change we processed last has been trimmed from the stream
+            # so we may have missed changes after it
+            raise ValueError(
+                f'Member changes after {after} are no longer available'
+            )
+
+        entries: list[tuple[str, dict[str, str]]] = await kvcache.stream_read(
+            MEMBERS_CHANGES_STREAM, after, count
+        )
+
+        changes: list[tuple[str, UUID, MemberChangeType]] = []
+        for change_id, fields in entries:
+            try:
+                changes.append(
+                    (
+                        change_id, UUID(fields['member_id']),
+                        MemberChangeType(fields['change'])
+                    )
+                )
+            except (KeyError, ValueError) as exc:
+                _LOGGER.info(
+                    'Invalid member change in the stream',
+                    extra={'change_id': change_id, 'exception': str(exc)}
+                )
+
+        return changes
+
+    async def get_last_member_change_id(self) -> str:
+        '''
+        Gets the ID of the most recent change of a member
+
+        :returns: the ID, or '0-0' if there are no changes
+        '''
+
+        kvcache: KVCache = self.kvcache
+        change_id: str | None = await kvcache.stream_range_id(
+            MEMBERS_CHANGES_STREAM, last=True
+        )
+
+        return change_id or '0-0'
+
+    @staticmethod
+    def _stream_id(change_id: str) -> tuple[int, int]:
+        timestamp: str
+        sequence: str
+        timestamp, _, sequence = change_id.partition('-')
+        return int(timestamp), int(sequence or 0)
+
     async def add_member(self, member_id: UUID) -> None:
         '''
         Adds a member to the end of the list of members
@@ -325,3 +429,41 @@ class MemberDb:
         ret = await kvcache.delete(str(member_id))
 
         return ret != 0
+
+    async def get_backfill_cursor(self, member_id: UUID) -> str | None:
+        '''
+        Gets the cursor of the last item retrieved by an incomplete
+        backfill of the data of a member
+
+        :param member_id: the member to get the cursor for
+        :returns: the cursor, BACKFILL_COMPLETED if the backfill has
+        completed, or None if no backfill has been started
+        '''
+
+        mid: str = MEMBER_ID_BACKFILL_FORMAT.format(member_id=str(member_id))
+        kvcache: KVCache = self.kvcache
+        cursor: str | bytes | None = await kvcache.get(mid)
+
+        if isinstance(cursor, bytes):
+            cursor = cursor.decode('utf-8')
+
+        return cursor
+
+    async def set_backfill_cursor(self, member_id: UUID, cursor: str | None
+                                  ) -> None:
+        '''
+        Stores the progress of the backfill of the data of a member. When
+        the cursor is None, the stored progress is removed.
+
+        :param member_id: the member to store the cursor for
+        :param cursor: the cursor of the last item retrieved or
+        BACKFILL_COMPLETED if all data of the member has been retrieved
+        :returns: (none)
+        '''
+
+        mid: str = MEMBER_ID_BACKFILL_FORMAT.format(member_id=str(member_id))
+        kvcache: KVCache = self.kvcache
+        if cursor:
+            await kvcache.set(mid, cursor)
+        else:
+            await kvcache.delete(mid)
@@ -0,0 +1,268 @@
+'''
+Class WorkerMembership tracks the processes of a worker that cooperate in
+processing the members of a service. Each process sends heartbeats to Redis
+and the members are divided over the live processes using rendezvous
+hashing. A lease per member guarantees that a member is processed by at most
+one process, also while processes join or leave and the members are
+rebalanced
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import os
+
+from uuid import UUID
+from uuid import uuid4
+from socket import gethostname
+from hashlib import sha256
+from logging import Logger
+from logging import getLogger
+from datetime import UTC
+from datetime import datetime
+
+from redis.commands.core import AsyncScript
+
+from byoda.datacache.kv_cache import KVCache
+
+_LOGGER: Logger = getLogger(__name__)
+
+# Extends the lease if it is still held by the process
+RENEW_LEASE_SCRIPT: str = '''
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+'''
+
+# Deletes the lease if it is still held by the process
+RELEASE_LEASE_SCRIPT: str = '''
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+'''
+
+
+class WorkerMembership:
+    # Sorted set of worker IDs with the time of their last heartbeat as score
+    WORKERS_KEY_FORMAT: str = '{worker_name}-workers'
+    LEASE_KEY_FORMAT: str = '{worker_name}-lease-{member_id}'
+
+    # How often processes send their heartbeat
+    HEARTBEAT_INTERVAL: int = 10
+
+    # After how many seconds without heartbeat a process is considered gone
+    WORKER_TTL: int = 3 * HEARTBEAT_INTERVAL
+
+    # A lease expires if it is not renewed by the process holding it
+    LEASE_TTL: int = 3 * HEARTBEAT_INTERVAL
+
+    def __init__(self, kvcache: KVCache, worker_name: str,
+                 worker_id: str | None = None) -> None:
+        '''
+        Constructor
+
+        :param kvcache: the Redis KV cache used by the MemberDb of the service
+        :param worker_name: the name of the worker, all processes of the
+        worker must use the same name
+        :param worker_id: the unique ID of this process, if not specified then
+        an ID is generated from the hostname and process ID
+        :returns: self
+        :raises: (none)
+        '''
+
+        self.kvcache: KVCache = kvcache
+        self.worker_name: str = worker_name
+
+        if not worker_id:
+            worker_id = f'{gethostname()}-{os.getpid()}-{uuid4().hex[:8]}'
+
+        self.worker_id: str = worker_id
+
+        self.workers: list[str] = [worker_id]
+
+        # The members for which this process holds a lease
+        self.leases: set[UUID] = set()
+
+        # The members assigned to this process for which another process
+        # still holds the lease
+        self.pending: set[UUID] = set()
+
+        self.workers_key: str = kvcache.get_annotated_key(
+            WorkerMembership.WORKERS_KEY_FORMAT.format(
+                worker_name=worker_name
+            )
+        )
+
+        self.renew_script: AsyncScript = kvcache.driver.register_script(
+            RENEW_LEASE_SCRIPT
+        )
+        self.release_script: AsyncScript = kvcache.driver.register_script(
+            RELEASE_LEASE_SCRIPT
+        )
+
+    def get_lease_key(self, member_id: UUID) -> str:
+        '''
+        Gets the key of the lease for a member
+        '''
+
+        return self.kvcache.get_annotated_key(
+            WorkerMembership.LEASE_KEY_FORMAT.format(
+                worker_name=self.worker_name, member_id=member_id
+            )
+        )
+
+    async def heartbeat(self) -> bool:
+        '''
+        Registers that this process is alive, removes processes that have not
+        sent a heartbeat for WORKER_TTL seconds and refreshes the list of
+        live processes
+
+        :returns: whether the list of live processes has changed
+        '''
+
+        now: float = datetime.now(tz=UTC).timestamp()
+
+        async with self.kvcache.driver.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.workers_key, {self.worker_id: now})
+            pipe.zremrangebyscore(
+                self.workers_key, '-inf', now - WorkerMembership.WORKER_TTL
+            )
+            pipe.zrange(self.workers_key, 0, -1)
+            pipe.expire(self.workers_key, WorkerMembership.WORKER_TTL)
+            results: list = await pipe.execute()
+
+        workers: list[str] = sorted(
+            worker.decode('utf-8') if isinstance(worker, bytes) else worker
+            for worker in results[2]
+        )
+
+        changed: bool = workers != self.workers
+        if changed:
+            _LOGGER.info(
+                'Worker membership changed', extra={
+                    'worker_id': self.worker_id,
+                    'workers': len(workers),
+                    'previous_workers': len(self.workers),
+                }
+            )
+
+        self.workers = workers
+
+        return changed
+
+    async def leave(self) -> None:
+        '''
+        Removes this process from the list of live processes and releases
+        its leases so other processes can take over its members right away
+
+        :returns: (none)
+        '''
+
+        await self.kvcache.driver.zrem(self.workers_key, self.worker_id)
+
+        member_id: UUID
+        for member_id in list(self.leases):
+            await self.release(member_id)
+
+        _LOGGER.info(
+            'Left the list of workers', extra={'worker_id': self.worker_id}
+        )
+
+    def owns(self, member_id: UUID) -> bool:
+        '''
+        Checks whether the member is assigned to this process. Each member
+        is assigned to the process with the highest hash of the process ID
+        and member ID, so when a process joins or leaves, only the members
+        assigned to that process move to another process.
+
+        :param member_id: the member to check
+        :returns: whether this process should process the member
+        '''
+
+        owner: str | None = None
+        highest: bytes = b''
+        worker: str
+        for worker in self.workers:
+            weight: bytes = sha256(f'{worker}:{member_id}'.encode()).digest()
+            if weight > highest:
+                highest = weight
+                owner = worker
+
+        return owner == self.worker_id
+
+    async def acquire(self, member_id: UUID) -> bool:
+        '''
+        Acquires the lease for a member. The lease is not granted while
+        another process holds it, for example because it has not yet noticed
+        that the member was assigned to this process.
+
+        :param member_id: the member to acquire the lease for
+        :returns: whether this process holds the lease
+        '''
+
+        key: str = self.get_lease_key(member_id)
+        acquired: bool = await self.kvcache.driver.set(
+            key, self.worker_id, nx=True, ex=WorkerMembership.LEASE_TTL
+        )
+        if acquired or await self.renew(member_id):
+            self.pending.discard(member_id)
+            self.leases.add(member_id)
+            return True
+
+        self.pending.add(member_id)
+        return False
+
+    async def renew(self, member_id: UUID) -> bool:
+        '''
+        Extends the lease for a member
+
+        :param member_id: the member to renew the lease for
+        :returns: whether this process still holds the lease
+        '''
+
+        result: int = await self.renew_script(
+            keys=[self.get_lease_key(member_id)],
+            args=[self.worker_id, WorkerMembership.LEASE_TTL]
+        )
+
+        return bool(result)
+
+    async def renew_leases(self) -> set[UUID]:
+        '''
+        Extends all leases held by this process
+
+        :returns: the members for which this process lost the lease
+        '''
+
+        lost: set[UUID] = set()
+        member_id: UUID
+        for member_id in list(self.leases):
+            if not await self.renew(member_id):
+                _LOGGER.info(
+                    'Lost the lease for member', extra={
+                        'worker_id': self.worker_id,
+                        'remote_member_id': member_id,
+                    }
+                )
+                self.leases.discard(member_id)
+                lost.add(member_id)
+
+        return lost
+
+    async def release(self, member_id: UUID) -> bool:
+        '''
+        Releases the lease for a member
+
+        :param member_id: the member to release the lease for
+        :returns: whether this process held the lease
+        '''
+
+        self.leases.discard(member_id)
+        result: int = await self.release_script(
+            keys=[self.get_lease_key(member_id)], args=[self.worker_id]
+        )
+
+        return bool(result)
@@ -155,6 +155,15 @@ class MailType(Enum):
     TWO_FACTOR_AUTH      = 'two_factor_auth'
 
 
+class EmailTransport(Enum):
+    '''
+    How the email worker delivers email messages
+    '''
+
+    AZURE                = 'azure'
+    STUB                 = 'stub'
+
+
 # From BYO.Tube service contract
 class MonetizationType(Enum):
     # flake8: noqa: E221
@@ -524,6 +533,13 @@ class MemberStatus(Enum):
     PAUSED      = 'paused'     # paused without data deletion
     REMOVED     = 'removed'    # no longer a member, data not deleted
 
+# MemberChangeType is used for the change feed of the MemberDB
+class MemberChangeType(Enum):
+    # flake8: noqa=E221
+    JOIN            = 'join'
+    UPDATE          = 'update'
+    LEAVE           = 'leave'
+
 class ReviewStatusType(Enum):
     ACCEPTED        = 'ACCEPTED'
     REJECTED        = 'REJECTED'
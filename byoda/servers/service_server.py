@@ -168,22 +168,28 @@ class ServiceServer(Server):
         self.member_db.schema = service.schema
 
     async def setup_asset_cache(self, connection_string: str,
-                                connection_string_readwrite: str) -> None:
+                                connection_string_readwrite: str,
+                                compress_assets: bool = False) -> None:
         '''
         Sets up the asset cache for the service. The asset cache can only
         be created after the schema has been loaded
 
         :param connection_string: the connection string for the asset cache
+        :param connection_string_readwrite: the connection string for the
+        read-write asset cache
+        :param compress_assets: whether assets written to the cache should be
+        stored with their non-indexed fields compressed. The workers write
+        assets through both caches so the setting applies to both
         :returns: (none)
         :raises: ValueError
         '''
 
         self.asset_cache: AssetCache = await AssetCache.setup(
-            connection_string
+            connection_string, compress_assets=compress_assets
         )
 
         self.asset_cache_readwrite: AssetCache = await AssetCache.setup(
-            connection_string_readwrite
+            connection_string_readwrite, compress_assets=compress_assets
         )
 
     async def setup_channel_cache(self, connection_string: str,
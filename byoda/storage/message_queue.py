@@ -9,37 +9,59 @@ Manage message queue
 from typing import Self
 from logging import Logger
 from logging import getLogger
+from datetime import UTC
+from datetime import datetime
 
 import orjson
 
 from redis import Redis
-import redis.asyncio as redis
+from redis.commands.core import AsyncScript
+
+from byoda.datacache.redis_pool import get_redis_client
 
 _LOGGER: Logger = getLogger(__name__)
 
+# Moves the messages for which the delay has passed from the sorted set with
+# delayed messages back to the queue
+REQUEUE_SCRIPT: str = '''
+local messages = redis.call(
+    'ZRANGE', KEYS[1], '-inf', ARGV[1], 'BYSCORE', 'LIMIT', 0, ARGV[2]
+)
+for _, message in ipairs(messages) do
+    redis.call('ZREM', KEYS[1], message)
+    redis.call('LPUSH', KEYS[2], message)
+end
+return #messages
+'''
+
 
 class QueueMessage:
-    def __init__(self, version: int, sender: str, contents: dict[str, any]
-                 ) -> None:
+    def __init__(self, version: int, sender: str, contents: dict[str, any],
+                 attempts: int = 0) -> None:
         self.version: int = version
         self.sender: str = sender
         self.contents: any = contents
 
+        # How often processing of the message has failed before
+        self.attempts: int = attempts
+
     def __str__(self) -> str:
         return orjson.dumps(self.__dict__).decode('utf-8')
 
 
 class Queue:
     KEY_PREFIX: str = 'queues:'
+    DELAYED_KEY_POSTFIX: str = ':delayed'
 
     def __init__(self, connection_string: str) -> None:
         self.connection_string: str = connection_string
         self.queue: Redis | None = None
+        self.requeue_script: AsyncScript | None = None
 
     @staticmethod
     async def setup(connection_string: str) -> Self:
         queue = Queue(connection_string)
-        queue.queue = redis.from_url(
+        queue.queue = get_redis_client(
             connection_string, decode_responses=True, protocol=3
         )
         return queue
@@ -50,6 +72,9 @@ class Queue:
     def get_key(self, queue_name: str) -> str:
         return f'{self.KEY_PREFIX}{queue_name}'
 
+    def get_delayed_key(self, queue_name: str) -> str:
+        return f'{self.get_key(queue_name)}{self.DELAYED_KEY_POSTFIX}'
+
     async def push(self, queue_name: str, message: QueueMessage) -> None:
         '''
         Pushes a message onto the queue
@@ -74,3 +99,41 @@ class Queue:
         msg = QueueMessage(**data)
 
         return msg
+
+    async def push_delayed(self, queue_name: str, message: QueueMessage,
+                           delay: int | float) -> None:
+        '''
+        Schedules a message to be pushed onto the queue after a delay. The
+        message gets pushed onto the queue by a call to requeue() after the
+        delay has passed
+
+        :param queue_name: The name of the queue
+        :param message: The message to push
+        :param delay: the number of seconds to delay the message
+        :returns: (none)
+        '''
+
+        key: str = self.get_delayed_key(queue_name)
+        due: float = datetime.now(tz=UTC).timestamp() + delay
+
+        await self.queue.zadd(key, {str(message): due})
+
+    async def requeue(self, queue_name: str, count: int = 100) -> int:
+        '''
+        Pushes delayed messages for which the delay has passed onto the queue
+
+        :param queue_name: The name of the queue
+        :param count: the maximum number of messages to push
+        :returns: the number of messages pushed onto the queue
+        '''
+
+        if not self.requeue_script:
+            self.requeue_script = self.queue.register_script(REQUEUE_SCRIPT)
+
+        now: float = datetime.now(tz=UTC).timestamp()
+        result: int = await self.requeue_script(
+            keys=[self.get_delayed_key(queue_name), self.get_key(queue_name)],
+            args=[now, count]
+        )
+
+        return result
@@ -0,0 +1,63 @@
+'''
+Token bucket for limiting the rate of requests in a process. The bucket
+holds up to 'capacity' tokens and gets refilled with 'rate' tokens per
+second, so clients can make short bursts of requests while their sustained
+rate of requests is limited
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+from time import monotonic
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        '''
+        Constructor
+
+        :param rate: the number of tokens added to the bucket per second
+        :param capacity: the maximum number of tokens in the bucket, the
+        bucket starts out full
+        :raises: ValueError if rate or capacity is not a positive number
+        '''
+
+        if rate <= 0 or capacity <= 0:
+            raise ValueError('rate and capacity must be > 0')
+
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.tokens: float = capacity
+        self.updated: float = monotonic()
+
+    def consume(self, tokens: float = 1.0) -> bool:
+        '''
+        Takes tokens from the bucket
+
+        :param tokens: the number of tokens to take
+        :returns: whether the bucket had enough tokens. If not, no tokens
+        are taken from the bucket
+        '''
+
+        now: float = monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+        if self.tokens < tokens:
+            return False
+
+        self.tokens -= tokens
+        return True
+
+    def retry_after(self, tokens: float = 1.0) -> float:
+        '''
+        Calculates how long to wait until the bucket has enough tokens
+
+        :param tokens: the number of tokens that are needed
+        :returns: the number of seconds to wait
+        '''
+
+        return max(0.0, (tokens - self.tokens) / self.rate)
@@ -10,6 +10,8 @@ from copy import copy
 from uuid import UUID
 from uuid import uuid4
 from typing import Self
+from typing import Callable
+from typing import Awaitable
 from random import random
 from logging import Logger
 from logging import getLogger
@@ -22,7 +24,14 @@ from socket import gaierror as socket_gaierror
 import orjson
 
 from anyio import sleep
+from anyio import CancelScope
+from anyio import CapacityLimiter
+from anyio import move_on_after
+from anyio import create_task_group
+from anyio import create_memory_object_stream
 from anyio.abc import TaskGroup
+from anyio.streams.memory import MemoryObjectSendStream
+from anyio.streams.memory import MemoryObjectReceiveStream
 
 from websockets.exceptions import ConnectionClosedError
 from websockets.exceptions import WebSocketException
@@ -69,6 +78,9 @@ _LOGGER: Logger = getLogger(__name__)
 class UpdatesListener:
     # The maximum interval between attempts to reconnect to a member
     MAX_RECONNECT_DELAY: int = 3600
+    # The maximum number of pages of data retrieved from a member that
+    # are waiting to be stored
+    BACKFILL_READ_AHEAD: int = 2
     # After how many days do we give up trying to connect to a dead member?
     MAX_DEAD_TIMER: int = 30
 
@@ -120,147 +132,221 @@ class UpdatesListener:
         self.annotations: list[str] = annotations
         self.max_asset_age: int = max_asset_age
 
-    async def get_all_data(self) -> int:
+        # Used to stop listening to updates and the backfill of data
+        # from the member
+        self.cancel_scopes: list[CancelScope] = []
+
+    async def get_all_data(
+            self, after: str | None = None,
+            progress: Callable[[str | None, bool], Awaitable[None]] | None
+            = None) -> int:
         '''
         Gets all items of the data class of the remote member and
-        stores them in the cache
-
+        stores them in the cache. The next page of items is requested
+        from the remote member while the current page is being stored,
+        with at most BACKFILL_READ_AHEAD pages waiting to be stored
+
+        :param after: the cursor of the item after which to continue
+        getting data, for example to resume an earlier backfill
+        :param progress: coroutine to call after each page of data has
+        been stored, with the cursor of the last item of the page and
+        whether all data has been retrieved
         :returns: number of assets retrieved
         '''
 
         log_extra: dict[str, str | UUID | int] = copy(self.log_extra)
         _LOGGER.debug('Getting all assets from member', extra=log_extra)
 
+        assets_retrieved: int = 0
+        completed: bool = False
+
+        metrics: dict[str, Gauge, Counter] = config.metrics
+        send_stream: MemoryObjectSendStream[QueryResponseModel]
+        receive_stream: MemoryObjectReceiveStream[QueryResponseModel]
+        send_stream, receive_stream = \
+            create_memory_object_stream[QueryResponseModel](
+                UpdatesListener.BACKFILL_READ_AHEAD
+            )
+        async with create_task_group() as task_group:
+            task_group.start_soon(
+                self._get_data_pages, send_stream, after, copy(log_extra)
+            )
+            async with receive_stream:
+                response: QueryResponseModel
+                async for response in receive_stream:
+                    assets_retrieved += response.total_count
+                    log_extra['assets_retrieved'] = assets_retrieved
+
+                    await self.store_asset_edges(
+                        response.edges or [], log_extra, metrics
+                    )
+
+                    completed = not response.page_info.has_next_page
+                    after = response.page_info.end_cursor or after
+                    if progress:
+                        await progress(after, completed)
+
+        if not completed:
+            return assets_retrieved
+
+        _LOGGER.info(
+            'Synced all assets from member', extra=self.log_extra | {
+                'assets_retrieved': assets_retrieved
+            }
+        )
+        metric = 'got_all_data_from_pod'
+        if metrics and metric in metrics:
+            metrics[metric].labels(member_id=self.remote_member_id).inc()
+
+        self.log_extra['assets_retrieved'] = assets_retrieved
+        return assets_retrieved
+
+    async def _get_data_pages(
+            self, send_stream: MemoryObjectSendStream[QueryResponseModel],
+            after: str | None, log_extra: dict[str, str | UUID | int]
+            ) -> None:
+        '''
+        Requests the pages of items from the remote member and sends them
+        to the stream until all items have been retrieved or we give up
+        '''
+
         has_more_assets: bool = True
         first: int = 1000
-        after: str | None = None
         assets_retrieved: int = 0
 
         metrics: dict[str, Gauge, Counter] = config.metrics
         sleepy_time: int = 0.1
         max_sleepy_time: int = 30
-        while has_more_assets:
-            log_extra['cursor'] = after
-            log_extra['assets_retrieved'] = assets_retrieved
-            log_extra['has_more_assets'] = has_more_assets
-            metric: str
-            try:
-                resp: HttpResponse = await DataApiClient.call(
-                    self.service_id, self.class_name, DataRequestType.QUERY,
-                    secret=self.tls_secret, member_id=self.remote_member_id,
-                    network=self.network_name, first=first, after=after,
-                    timeout=10
-                )
-            except ByodaRuntimeError as exc:
-                if sleepy_time < max_sleepy_time:
-                    metric = 'failed_get_all_data_request_exception'
-                    if metrics and 'metric' in metrics:
-                        metrics['metric'].labels(
-                            sleepy_time=sleepy_time,
-                            member_id=self.remote_member_id
-                        ).inc()
-                    sleepy_time *= 2
-                    await sleep(sleepy_time)
-                    continue
-
-                _LOGGER.debug(
-                    'Exception while getting all assets from member',
-                    extra=log_extra | {'exception': str(exc)}
-                )
-                metric = 'failed_get_all_data'
-                if metrics and metric in metrics:
-                    metrics[metric].labels(
-                        member_id=self.remote_member_id
-                    ).inc()
-                return assets_retrieved
+        async with send_stream:
+            while has_more_assets:
+                log_extra['cursor'] = after
+                log_extra['assets_retrieved'] = assets_retrieved
+                log_extra['has_more_assets'] = has_more_assets
+                metric: str
+                try:
+                    resp: HttpResponse = await DataApiClient.call(
+                        self.service_id, self.class_name,
+                        DataRequestType.QUERY, secret=self.tls_secret,
+                        member_id=self.remote_member_id,
+                        network=self.network_name, first=first,
+                        after=after, timeout=10
+                    )
+                except ByodaRuntimeError as exc:
+                    if sleepy_time < max_sleepy_time:
+                        metric = 'failed_get_all_data_request_exception'
+                        if metrics and metric in metrics:
+                            metrics[metric].labels(
+                                sleepy_time=sleepy_time,
+                                member_id=self.remote_member_id
+                            ).inc()
+                        sleepy_time *= 2
+                        await sleep(sleepy_time)
+                        continue
 
-            if resp.status_code != 200:
-                if sleepy_time < max_sleepy_time:
-                    metric = 'failed_get_all_data_request_not_ok'
+                    _LOGGER.debug(
+                        'Exception while getting all assets from member',
+                        extra=log_extra | {'exception': str(exc)}
+                    )
+                    metric = 'failed_get_all_data'
                     if metrics and metric in metrics:
                         metrics[metric].labels(
-                            sleepy_time=sleepy_time,
-                            status_code=resp.status_code,
                             member_id=self.remote_member_id
                         ).inc()
-                    sleepy_time *= 2
-                    log_extra['sleepy_time'] = sleepy_time
+                    return
+
+                if resp.status_code != 200:
+                    if sleepy_time < max_sleepy_time:
+                        metric = 'failed_get_all_data_request_not_ok'
+                        if metrics and metric in metrics:
+                            metrics[metric].labels(
+                                sleepy_time=sleepy_time,
+                                status_code=resp.status_code,
+                                member_id=self.remote_member_id
+                            ).inc()
+                        sleepy_time *= 2
+                        log_extra['sleepy_time'] = sleepy_time
+                        _LOGGER.debug(
+                            'Failed to get all assets from member',
+                            extra=log_extra | {
+                                'http_status_code': resp.status_code
+                            }
+                        )
+                        await sleep(sleepy_time)
+                        continue
+
                     _LOGGER.debug(
-                        'Failed to get all assets from member',
+                        'Failed to get assets from member',
                         extra=log_extra | {
-                            'http_status_code': resp.status_code
+                            'http_status_code': resp.status_code,
+                            'http_text': resp.text or 'empty response'
                         }
                     )
-                    await sleep(sleepy_time)
-                    continue
+                    if metrics and 'failed_get_all_data' in metrics:
+                        metrics['failed_get_all_data'].labels(
+                            member_id=self.remote_member_id
+                        ).inc()
+                    return
 
-                _LOGGER.debug(
-                    'Failed to get assets from member',
-                    extra=log_extra | {
-                        'http_status_code': resp.status_code,
-                        'http_text': resp.text or 'empty response'
-                    }
-                )
-                if metrics and 'failed_get_all_data' in metrics:
-                    metrics['failed_get_all_data'].labels(
-                        member_id=self.remote_member_id
-                    ).inc()
-                return assets_retrieved
+                # We made it to here so we got data from the pod, so we
+                # can reset the timer
+                sleepy_time = 0.1
+                log_extra['sleepy_time'] = sleepy_time
+
+                data: list[dict[str, object]] = resp.json()
 
-            # We made it to here so we got data from the pod, so we can
-            # reset the timer
-            sleepy_time = 0.1
-            log_extra['sleepy_time'] = sleepy_time
+                try:
+                    response = QueryResponseModel(**data)
+                except ValueError as exc:
+                    _LOGGER.info(
+                        'Received corrupt data from member',
+                        extra=log_extra | {'exception': str(exc)}
+                    )
+                    metric = 'updateslistener_received_corrupt_data'
+                    if metrics and metric in metrics:
+                        metrics[metric].labels(
+                            member_id=self.remote_member_id
+                        ).inc()
+                    return
 
-            data: list[dict[str, object]] = resp.json()
+                assets_retrieved += response.total_count
+                log_extra['assets_retrieved'] = assets_retrieved
 
-            try:
-                response = QueryResponseModel(**data)
-            except ValueError as exc:
-                _LOGGER.info(
-                    'Received corrupt data from member',
-                    extra=log_extra | {'exception': str(exc)}
+                _LOGGER.debug(
+                    'Received assets from request from member',
+                    extra=log_extra
                 )
-                metric = 'updateslistener_received_corrupt_data'
+                metric = 'updateslistener_received_assets'
                 if metrics and metric in metrics:
                     metrics[metric].labels(
                         member_id=self.remote_member_id
-                    ).inc()
-                return assets_retrieved
+                    ).inc(assets_retrieved)
 
-            assets_retrieved += response.total_count
-            log_extra['assets_retrieved'] = assets_retrieved
+                await send_stream.send(response)
 
-            _LOGGER.debug(
-                'Received assets from request from member', extra=log_extra
-            )
-            metric = 'updateslistener_received_assets'
-            if metrics and metric in metrics:
-                metrics[metric].labels(
-                    member_id=self.remote_member_id
-                ).inc(assets_retrieved)
+                has_more_assets = response.page_info.has_next_page
+                after = response.page_info.end_cursor or after
 
-            edge: Edge
-            for edge in response.edges or []:
-                await self._process_asset_edge(edge, log_extra, metrics)
+    async def store_asset_edges(self, edges: list[Edge],
+                                log_extra: dict[str, any],
+                                metrics: dict[str, object]) -> None:
+        '''
+        Stores a page of assets retrieved from the remote member
 
-            has_more_assets: bool = response.page_info.has_next_page
-            after: str = response.page_info.end_cursor
+        :param edges: the assets to store
+        :returns: (none)
+        '''
 
-        _LOGGER.info(
-            'Synced all assets from member', extra=self.log_extra | {
-                'assets_retrieved': assets_retrieved
-            }
-        )
-        metric = 'got_all_data_from_pod'
-        if metrics and metric in metrics:
-            metrics[metric].labels(member_id=self.remote_member_id).inc()
+        edge: Edge
+        for edge in edges:
+            await self._process_asset_edge(edge, log_extra, metrics)
 
-        self.log_extra['assets_retrieved'] = assets_retrieved
-        return assets_retrieved
+    def _accept_asset_edge(self, edge: Edge, log_extra: dict[str, any],
+                           metrics: dict[str, object]) -> bool:
+        '''
+        Checks whether an asset retrieved from the remote member should
+        be stored
+        '''
 
-    async def _process_asset_edge(self, edge: Edge, log_extra: dict[str, any],
-                                  metrics: dict[str, object]) -> bool:
         creator: str | None = edge.node.get('creator')
         ingest_status: str | None = edge.node.get('ingest_status')
 
@@ -308,6 +394,16 @@ class UpdatesListener:
                 metrics[metric].labels(member_id=self.remote_member_id).inc()
             return False
 
+        return True
+
+    async def _process_asset_edge(self, edge: Edge, log_extra: dict[str, any],
+                                  metrics: dict[str, object]) -> bool:
+        if not self._accept_asset_edge(edge, log_extra, metrics):
+            return False
+
+        metric: str
+        ingest_status: str | None = edge.node.get('ingest_status')
+
         _LOGGER.info(
             'Storing imported asset in cache', extra=log_extra
         )
@@ -345,7 +441,129 @@ class UpdatesListener:
 
         _LOGGER.debug('Initiating listening to updates', extra=self.log_extra)
 
-        task_group.start_soon(self.get_updates)
+        cancel_scope: CancelScope = CancelScope()
+        self.cancel_scopes.append(cancel_scope)
+        task_group.start_soon(self._listen_updates, cancel_scope)
+
+    async def _listen_updates(self, cancel_scope: CancelScope) -> None:
+        '''
+        Runs get_updates() until it is stopped with UpdatesListener.stop()
+        '''
+
+        with cancel_scope:
+            await self.get_updates()
+
+        _LOGGER.debug('Stopped listening to updates', extra=self.log_extra)
+
+    def setup_backfill(
+            self, task_group: TaskGroup, limiter: CapacityLimiter,
+            timeout: float, after: str | None = None,
+            progress: Callable[[str | None, bool], Awaitable[None]] | None
+            = None, attempts: int = 3) -> None:
+        '''
+        Gets all data of the member in the background. The number of
+        backfills running concurrently is bounded by the limiter so that
+        onboarding many members does not overload the cache, and each
+        attempt is limited in time so a slow pod does not hold on to its
+        slot.
+
+        :param task_group: the anyio task group to run the backfill in
+        :param limiter: limits the number of concurrent backfills
+        :param timeout: the maximum number of seconds per attempt
+        :param after: the cursor of the item to resume the backfill after
+        :param progress: see UpdatesListener.get_all_data()
+        :param attempts: how often to try to complete the backfill
+        :returns: (none)
+        '''
+
+        cancel_scope: CancelScope = CancelScope()
+        self.cancel_scopes.append(cancel_scope)
+        task_group.start_soon(
+            self._backfill, cancel_scope, limiter, timeout, after, progress,
+            attempts
+        )
+
+    async def _backfill(
+            self, cancel_scope: CancelScope, limiter: CapacityLimiter,
+            timeout: float, after: str | None,
+            progress: Callable[[str | None, bool], Awaitable[None]] | None,
+            attempts: int) -> None:
+        log_extra: dict[str, str | UUID | int] = self.log_extra | {
+            'backfill_timeout': timeout,
+        }
+
+        completed: bool = False
+
+        async def track_progress(cursor: str | None, done: bool) -> None:
+            nonlocal after, completed
+            if progress:
+                await progress(cursor, done)
+            after = cursor
+            completed = done
+
+        metrics: dict[str, Gauge, Counter] = config.metrics
+        with cancel_scope:
+            attempt: int
+            for attempt in range(1, attempts + 1):
+                log_extra['attempt'] = attempt
+                log_extra['cursor'] = after
+                failed: bool = False
+                async with limiter:
+                    with move_on_after(timeout) as timeout_scope:
+                        # The backfill runs in the task group of the worker
+                        # so a failure must not propagate to the listeners
+                        # of the other members
+                        try:
+                            await self.get_all_data(
+                                after=after, progress=track_progress
+                            )
+                        except Exception as exc:
+                            failed = True
+                            _LOGGER.info(
+                                'Failed to get all data from member',
+                                extra=log_extra | {'exception': str(exc)}
+                            )
+
+                if completed:
+                    return
+
+                metric: str
+                if failed:
+                    metric = 'updateslistener_backfill_failures'
+                elif timeout_scope.cancelled_caught:
+                    _LOGGER.info(
+                        'Timed out getting all data from member',
+                        extra=log_extra
+                    )
+                    metric = 'updateslistener_backfill_timeouts'
+                else:
+                    return
+
+                if metrics and metric in metrics:
+                    metrics[metric].labels(
+                        member_id=self.remote_member_id
+                    ).inc()
+
+                if attempt < attempts:
+                    await sleep(timeout * random())
+
+            _LOGGER.info(
+                'Giving up getting all data from member', extra=log_extra
+            )
+
+    def stop(self) -> None:
+        '''
+        Stops listening to updates from the member and stops the backfill
+        of data from the member
+
+        :returns: (none)
+        '''
+
+        _LOGGER.debug('Stopping listening to updates', extra=self.log_extra)
+
+        cancel_scope: CancelScope
+        for cancel_scope in self.cancel_scopes:
+            cancel_scope.cancel()
 
     async def get_updates(self) -> None:
         '''
@@ -565,6 +783,19 @@ class UpdateListenerService(UpdatesListener):
                 metric, 'Number of members not yet seen',
             )
 
+        metric = 'updateslistener_backfill_timeouts'
+        if metric not in metrics:
+            metrics[metric] = Counter(
+                metric, 'Timeouts while getting all data from a member',
+                ['member_id']
+            )
+        metric = 'updateslistener_backfill_failures'
+        if metric not in metrics:
+            metrics[metric] = Counter(
+                metric, 'Failures while getting all data from a member',
+                ['member_id']
+            )
+
         metric = 'failed_get_all_data'
         if metric not in metrics:
             metrics[metric] = Gauge(
@@ -789,37 +1020,13 @@ class UpdateListenerService(UpdatesListener):
         '''
 
         metrics: dict[str, Counter | Gauge] = config.metrics
-        if not data:
-            _LOGGER.debug('Ignoring empty data', extra=self.log_extra)
-            metric: str = 'updateslistener_received_assets_without_data'
-            metrics[metric].labels(member_id=self.remote_member_id).inc()
-            return False
-
-        if is_test_uuid(data['asset_id']):
-            if not data.get('video_thumbnails') or not data.get['title']:
-                _LOGGER.debug(
-                    'Not importing test asset without thumbnails',
-                    extra=self.log_extra | {'asset_id': data['asset_id']}
-                )
-                return False
-
-        ingest_status: str | None = data.get('ingest_status')
         log_extra: dict[str, str | UUID | int] = copy(self.log_extra)
-        log_extra['ingest_status'] = ingest_status
         log_extra['origin_id'] = origin_id
         log_extra['cursor'] = cursor
-        log_extra['asset_id'] = data['asset_id']
-        if (ingest_status not in (IngestStatus.PUBLISHED.value,
-                                  IngestStatus.EXTERNAL.value)):
-            _LOGGER.debug(
-                'Not importing asset for ingest_status', extra=self.log_extra
-            )
-            metrics['updateslistener_assets_failed_to_store_in_cache'].labels(
-                member_id=self.remote_member_id, ingest_status=ingest_status
-            ).inc()
+        if not self._accept_asset(data, log_extra, metrics):
             return False
 
-        metrics: dict[str, Counter | Gauge] = config.metrics
+        ingest_status: str | None = data.get('ingest_status')
         try:
             result: bool = await self.asset_cache.add_newest_asset(
                 origin_id, data
@@ -844,11 +1051,128 @@ class UpdateListenerService(UpdatesListener):
             )
             return False
 
-        self.channel_cache.append_channel(
+        await self.channel_cache.append_channel(
             origin_id, {'creator': data['creator']}
         )
         return True
 
+    async def store_asset_edges(self, edges: list[Edge],
+                                log_extra: dict[str, any],
+                                metrics: dict[str, object]) -> None:
+        '''
+        Stores a page of assets retrieved from the remote member in the
+        AssetCache of the service with a single batch
+
+        :param edges: the assets to store
+        :returns: (none)
+        '''
+
+        assets: list[tuple[UUID, dict[str, object]]] = []
+        edge: Edge
+        for edge in edges:
+            if self._accept_asset_edge(edge, log_extra, metrics):
+                assets.append((edge.origin, edge.node))
+
+        if not assets:
+            return
+
+        try:
+            await self.asset_cache.add_newest_assets(assets)
+        except Exception as exc:
+            _LOGGER.exception(
+                'Failed to store batch of assets in cache',
+                extra=log_extra | {
+                    'assets': len(assets), 'exception': str(exc)
+                }
+            )
+            return
+
+        metric: str = 'updateslistener_assets_stored_in_cache'
+        channels: set[tuple[UUID, str]] = set()
+        data: dict[str, object]
+        for origin_id, data in assets:
+            if metrics and metric in metrics:
+                metrics[metric].labels(
+                    member_id=self.remote_member_id,
+                    ingest_status=data.get('ingest_status')
+                ).inc()
+            channels.add((origin_id, data['creator']))
+
+        origin_id: UUID
+        creator: str
+        for origin_id, creator in channels:
+            try:
+                await self.channel_cache.append_channel(
+                    origin_id, {'creator': creator}
+                )
+            except Exception as exc:
+                _LOGGER.exception(
+                    'Failed to store channel in cache',
+                    extra=log_extra | {
+                        'creator': creator, 'exception': str(exc)
+                    }
+                )
+
+    def _accept_asset_edge(self, edge: Edge, log_extra: dict[str, any],
+                           metrics: dict[str, object]) -> bool:
+        '''
+        Checks whether an asset retrieved from the remote member should
+        be stored in the AssetCache of the service
+        '''
+
+        if edge.node and not super()._accept_asset_edge(
+                edge, log_extra, metrics):
+            return False
+
+        return self._accept_asset(edge.node, log_extra, metrics)
+
+    def _accept_asset(self, data: dict[str, object] | None,
+                      log_extra: dict[str, any],
+                      metrics: dict[str, object]) -> bool:
+        '''
+        Checks whether an asset can be stored in the AssetCache of the
+        service, for both assets retrieved from the remote member and
+        updates received from it
+
+        :param data: the asset
+        :returns: whether the asset should be stored
+        '''
+
+        metric: str
+        if not data:
+            _LOGGER.debug('Ignoring empty data', extra=log_extra)
+            metric = 'updateslistener_received_assets_without_data'
+            if metrics and metric in metrics:
+                metrics[metric].labels(member_id=self.remote_member_id).inc()
+            return False
+
+        ingest_status: str | None = data.get('ingest_status')
+        log_extra['ingest_status'] = ingest_status
+        log_extra['asset_id'] = data.get('asset_id')
+        if (ingest_status not in (IngestStatus.PUBLISHED.value,
+                                  IngestStatus.EXTERNAL.value)):
+            _LOGGER.debug(
+                'Not importing asset for ingest_status', extra=log_extra
+            )
+            metric = 'updateslistener_assets_failed_to_store_in_cache'
+            if metrics and metric in metrics:
+                metrics[metric].labels(
+                    member_id=self.remote_member_id,
+                    ingest_status=ingest_status
+                ).inc()
+            return False
+
+        if (is_test_uuid(data['asset_id'])
+                and (not data.get('video_thumbnails')
+                     or not data.get('title'))):
+            _LOGGER.debug(
+                'Not importing test asset without thumbnails',
+                extra=log_extra
+            )
+            return False
+
+        return True
+
 
 class UpdateListenerMember(UpdatesListener):
     '''
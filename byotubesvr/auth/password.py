@@ -1,17 +1,56 @@
 '''
 Class for handling BYO.Tube Lite passwords
 
+Hashing a password with Argon2 takes tens of milliseconds of CPU time. The
+async functions run the hashing in worker processes so the event loop can
+keep serving other requests. The number of hashing requests that can be
+running or waiting is limited so a burst of logins gets rejected instead of
+queueing up without bounds
+
 :maintainer : Steven Hessing <steven@byoda.org>
 :copyright  : Copyright 2024
 :license    : GPLv3
 '''
 
+import os
+
+from logging import Logger
+from logging import getLogger
+from collections.abc import Callable
+
+from anyio import to_process
+from anyio import CapacityLimiter
+
 from passlib.context import CryptContext
 
+from prometheus_client import Counter
+from prometheus_client import Gauge
+
+from byoda import config
+
+_LOGGER: Logger = getLogger(__name__)
 
 # Used to hash passwords
 PASSWORD_HASH_CONTEXT = CryptContext(schemes=["argon2"], deprecated="auto")
 
+# Max number of worker processes hashing passwords at the same time. We
+# leave CPU cores available for the processing of other requests
+MAX_CONCURRENT_HASHES: int = max(1, (os.cpu_count() or 2) // 2)
+
+# Max number of requests for hashing a password that are running or waiting
+# for a worker process
+MAX_PENDING_HASHES: int = 4 * MAX_CONCURRENT_HASHES
+
+_HASH_LIMITER: CapacityLimiter | None = None
+_PENDING_HASHES: int = 0
+
+
+class PasswordHashingBusy(RuntimeError):
+    '''
+    Raised when too many passwords are already being hashed
+    '''
+    pass
+
 
 def hash_password(password: str) -> str:
     '''
@@ -32,3 +71,86 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return PASSWORD_HASH_CONTEXT.verify(
         plain_password, hashed_password
     )
+
+
+async def hash_password_async(password: str) -> str:
+    '''
+    Hash a password in a worker process
+
+    :param password: The plain-text password
+    :returns: the hashed password
+    :raises: PasswordHashingBusy if too many passwords are being hashed
+    '''
+
+    return await _run_in_process(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str
+                                ) -> bool:
+    '''
+    Verifies the plain-text password with the hashed password in a worker
+    process
+
+    :param plain_password: The plain-text password
+    :param hashed_password: The hashed password
+    :returns: True if the plain-text password matches the hashed password
+    :raises: PasswordHashingBusy if too many passwords are being hashed
+    '''
+
+    return await _run_in_process(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def _run_in_process(func: Callable, *args: str) -> str | bool:
+    '''
+    Runs a hashing function in a worker process if the number of pending
+    hashing requests is below MAX_PENDING_HASHES
+    '''
+
+    global _HASH_LIMITER
+    global _PENDING_HASHES
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+    if 'lite_password_hashes_rejected' not in metrics:
+        setup_metrics()
+
+    if _PENDING_HASHES >= MAX_PENDING_HASHES:
+        metrics['lite_password_hashes_rejected'].inc()
+        _LOGGER.warning(
+            f'Rejecting password hashing request, {_PENDING_HASHES} '
+            'requests are pending'
+        )
+        raise PasswordHashingBusy('Too many passwords are being hashed')
+
+    # The limiter can only be created once the event loop is running
+    if _HASH_LIMITER is None:
+        _HASH_LIMITER = CapacityLimiter(MAX_CONCURRENT_HASHES)
+
+    _PENDING_HASHES += 1
+    metrics['lite_password_hashes_pending'].set(_PENDING_HASHES)
+    try:
+        return await to_process.run_sync(func, *args, limiter=_HASH_LIMITER)
+    finally:
+        _PENDING_HASHES -= 1
+        metrics['lite_password_hashes_pending'].set(_PENDING_HASHES)
+
+
+def setup_metrics() -> None:
+    '''
+    Setup metrics for hashing passwords
+    '''
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+
+    metric: str = 'lite_password_hashes_rejected'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Password hashing requests rejected because of overload'
+        )
+
+    metric = 'lite_password_hashes_pending'
+    if metric not in metrics:
+        metrics[metric] = Gauge(
+            metric, 'Password hashing requests running or waiting'
+        )
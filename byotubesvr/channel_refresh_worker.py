@@ -13,11 +13,14 @@ import os
 import sys
 
 from uuid import UUID
+from time import monotonic
 from datetime import UTC
 from datetime import datetime
 
 from anyio import run
 from anyio import sleep
+from anyio import create_task_group
+from anyio import CapacityLimiter
 
 from httpx import ConnectError
 from httpx import HTTPError
@@ -60,6 +63,19 @@ MEMBER_PROCESS_INTERVAL: int = 8 * 60 * 60
 
 CACHE_STALE_THRESHOLD: int = 4 * 60 * 60
 
+# Number of channels to claim from the list of channels in one go
+REFRESH_BATCH_SIZE: int = 100
+
+# Number of pods to query concurrently
+REFRESH_CONCURRENCY: int = 16
+
+# Claimed channels that are not refreshed or released within this many
+# seconds, for example because the worker crashed, can be claimed again
+CLAIM_LEASE: int = 5 * 60
+
+# Delay before retrying channels that failed to refresh
+REFRESH_RETRY_INTERVAL: int = 15 * 60
+
 ASSET_CLASS: str = 'channels'
 
 PROMETHEUS_EXPORTER_PORT: int = 5000
@@ -80,6 +96,8 @@ async def main() -> None:
 
     channel_cache: ChannelCache = server.channel_cache_readwrite
 
+    limiter: CapacityLimiter = CapacityLimiter(REFRESH_CONCURRENCY)
+
     wait_time: float = 0.1
     while True:
         log_data['sleeping'] = wait_time
@@ -88,10 +106,12 @@ async def main() -> None:
             await sleep(wait_time)
 
         try:
-            edge: Edge[Channel] | None = \
-                await channel_cache.get_oldest_channel()
+            claims: list[tuple[Edge[Channel], float, str]] = \
+                await channel_cache.claim_oldest_channels(
+                    REFRESH_BATCH_SIZE, CLAIM_LEASE
+                )
 
-            if not edge:
+            if not claims:
                 wait_time = 5
                 _LOGGER.warning(
                     'No channel available in list of channels',
@@ -100,81 +120,192 @@ async def main() -> None:
                 metrics['svc_channels_no_channels_available'].inc()
                 continue
         except Exception as exc:
-            # We need to catch any exception to make sure we can try
-            # adding the member_id back to the list of member_ids in the
-            # MemberDb
-
             _LOGGER.debug(
                 'Got exception', extra=log_data | {
                     'exception': str(exc)
                 }
             )
-            wait_time = min(wait_time * 2, MAX_WAIT)
+            wait_time = min(max(wait_time, 1) * 2, MAX_WAIT)
             continue
 
-        channel: Channel = edge.node
-        log_data['channel'] = channel.creator
-        log_data['origin_id'] = edge.origin
-        now = int(datetime.now(tz=UTC).timestamp())
+        metrics['svc_channels_channels_claimed'].inc(len(claims))
+        wait_time = await refresh_channels(channel_cache, claims, limiter)
+
+
+async def refresh_channels(channel_cache: ChannelCache,
+                           claims: list[tuple[Edge[Channel], float, str]],
+                           limiter: CapacityLimiter) -> float:
+    '''
+    Refreshes the stale channels of a batch of claimed channels. The
+    channels are grouped by the pod that hosts them so that the requests
+    to a pod are sent sequentially over the pooled session for that pod,
+    while the pods are queried concurrently
+
+    :param channel_cache: the cache with the list of channels
+    :param claims: the claimed channels, their timestamps in the list and
+    their lease tokens
+    :param limiter: limits the number of pods queried concurrently
+    :returns: the number of seconds to wait before claiming the next batch
+    '''
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
 
+    started: float = monotonic()
+    now: int = int(datetime.now(tz=UTC).timestamp())
+
+    # The timestamp of a channel in the list is when it was last refreshed,
+    # so the oldest timestamp shows how long a refresh cycle takes
+    oldest: float = min(timestamp for _, timestamp, _ in claims)
+    metrics['svc_channels_refresh_cycle_time'].set(max(0, now - oldest))
+
+    pods: dict[UUID, list[tuple[Edge[Channel], float, str]]] = {}
+    next_stale_in: int = MAX_WAIT
+    staleness: int = 0
+    edge: Edge[Channel]
+    timestamp: float
+    token: str
+    for edge, timestamp, token in claims:
         stale_in: int = 0
         if edge.expires_at:
             stale_at: int = edge.expires_at - CACHE_STALE_THRESHOLD
-            stale_in: int = stale_at - now
+            stale_in = stale_at - now
 
         if stale_in > 0:
-            wait_time = stale_in
-            log_data['stale_in'] = stale_in
-            _LOGGER.debug('Next channel to become stale', extra=log_data)
-            metrics['svc_channels_wait_for_stale_channel'].set(wait_time)
-            await channel_cache.add_oldest_channel_back(edge.origin, channel)
+            # Channels that are not yet stale go back to where they were
+            # in the list of channels
+            next_stale_in = min(next_stale_in, stale_in)
+            await channel_cache.release_channel(
+                edge.origin, edge.node.creator, timestamp, token
+            )
+            metrics['svc_channels_channels_released'].inc()
             continue
 
-        metrics['svc_channels_channel_refresh_attempts'].inc()
-        _LOGGER.debug('Processing channel', extra=log_data)
-        wait_time = 0
-        try:
-            log_data['sleeping'] = wait_time
-            new_edge: Edge[Channel] = await get_channel_from_pod(edge)
-            if new_edge:
-                metrics['svc_channels_channels_refreshed'].inc()
-                _LOGGER.debug(
-                    'Adding channel back as newest channel', extra=log_data
-                )
-                await channel_cache.add_newest_channel(
-                    new_edge.origin, new_edge.node
-                )
-            else:
+        staleness = max(staleness, -stale_in)
+        pods.setdefault(edge.origin, []).append((edge, timestamp, token))
+
+    metrics['svc_channels_channel_staleness'].set(staleness)
+
+    if not pods:
+        _LOGGER.debug(
+            'Next channel to become stale', extra={'stale_in': next_stale_in}
+        )
+        metrics['svc_channels_wait_for_stale_channel'].set(next_stale_in)
+        return next_stale_in
+
+    async with create_task_group() as task_group:
+        pod_claims: list[tuple[Edge[Channel], float, str]]
+        for pod_claims in pods.values():
+            task_group.start_soon(
+                refresh_pod_channels, channel_cache, pod_claims, limiter
+            )
+
+    duration: float = monotonic() - started
+    metrics['svc_channels_refresh_batch_duration'].set(duration)
+    _LOGGER.debug(
+        'Refreshed batch of channels', extra={
+            'channels': len(claims),
+            'pods': len(pods),
+            'duration': duration,
+        }
+    )
+
+    return 0
+
+
+async def refresh_pod_channels(channel_cache: ChannelCache,
+                               claims: list[tuple[Edge[Channel], float, str]],
+                               limiter: CapacityLimiter) -> None:
+    '''
+    Refreshes the claimed channels hosted by a pod. If the pod can not be
+    reached then the remaining channels of the pod are released so they
+    get retried after REFRESH_RETRY_INTERVAL seconds
+
+    :param channel_cache: the cache with the list of channels
+    :param claims: the claimed channels of the pod
+    :param limiter: limits the number of pods queried concurrently
+    :returns: (none)
+    '''
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+
+    async with limiter:
+        index: int
+        edge: Edge[Channel]
+        token: str
+        for index, (edge, _, token) in enumerate(claims):
+            channel: Channel = edge.node
+            log_data: dict[str, any] = {
+                'channel': channel.creator,
+                'origin_id': edge.origin,
+            }
+            metrics['svc_channels_channel_refresh_attempts'].inc()
+            _LOGGER.debug('Processing channel', extra=log_data)
+            try:
+                new_edge: Edge[Channel] | None = \
+                    await get_channel_from_pod(edge)
+                if new_edge:
+                    metrics['svc_channels_channels_refreshed'].inc()
+                    _LOGGER.debug(
+                        'Adding channel back as newest channel',
+                        extra=log_data
+                    )
+                    await channel_cache.add_to_cache(
+                        new_edge.origin, new_edge.node
+                    )
+                    await channel_cache.ack_channel(
+                        edge.origin, channel.creator, token
+                    )
+                    continue
+
                 metrics['svc_channels_channel_no_longer_available'].inc()
                 _LOGGER.debug(
                     'Did not receive a new edge for the channel',
                     extra=log_data
                 )
-                # TODO: for now we just add the channel back. Need to
-                # have retry lists for channels that can't be renewed
-                # because of connectivity issues
-                await channel_cache.add_oldest_channel_back(
-                    edge.origin, channel
+                await release_channels(channel_cache, claims[index:index + 1])
+            except Exception as exc:
+                _LOGGER.debug(
+                    'Exception', extra=log_data | {'exception': str(exc)}
                 )
+                metrics['svc_channels_pod_failures'].inc()
+                await release_channels(channel_cache, claims[index:])
+                return
 
-            continue
-        except Exception as exc:
-            # We need to catch any exception to make sure we can try
-            # adding the member_id back to the list of member_ids in the
-            # MemberDb
-            _LOGGER.debug(
-                'Exception', extra=log_data | {'exception': str(exc)}
-            )
-            if not wait_time:
-                wait_time = 1
-            else:
-                wait_time = min(wait_time * 2, MAX_WAIT)
 
+async def release_channels(channel_cache: ChannelCache,
+                           claims: list[tuple[Edge[Channel], float, str]]
+                           ) -> None:
+    '''
+    Releases claimed channels so they get retried after
+    REFRESH_RETRY_INTERVAL seconds
+
+    :param channel_cache: the cache with the list of channels
+    :param claims: the claimed channels to release
+    :returns: (none)
+    '''
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+
+    retry_at: float = \
+        datetime.now(tz=UTC).timestamp() + REFRESH_RETRY_INTERVAL
+
+    edge: Edge[Channel]
+    token: str
+    for edge, _, token in claims:
         try:
-            await channel_cache.add_oldest_channel_back(edge)
+            await channel_cache.release_channel(
+                edge.origin, edge.node.creator, retry_at, token
+            )
+            metrics['svc_channels_channels_released'].inc()
         except Exception as exc:
+            # The claim expires after CLAIM_LEASE seconds so the channel
+            # will be retried anyway
             _LOGGER.debug(
-                'Exception', extra=log_data | {'exception': str(exc)}
+                'Failed to release channel', extra={
+                    'channel': edge.node.creator,
+                    'origin_id': edge.origin,
+                    'exception': str(exc)
+                }
             )
 
 
@@ -279,6 +410,15 @@ async def setup_server() -> tuple[Service, ServiceServer]:
         global MAX_WAIT
         MAX_WAIT = 300
 
+    global REFRESH_BATCH_SIZE
+    REFRESH_BATCH_SIZE = server_config.server_config.get(
+        'channel_refresh_batch_size', REFRESH_BATCH_SIZE
+    )
+    global REFRESH_CONCURRENCY
+    REFRESH_CONCURRENCY = server_config.server_config.get(
+        'channel_refresh_concurrency', REFRESH_CONCURRENCY
+    )
+
     network = Network(
         server_config.server_config, server_config.app_config
     )
@@ -350,6 +490,45 @@ def setup_exporter_metrics() -> None:
             metric, 'Channels no longer available'
         )
 
+    metric = 'svc_channels_channels_claimed'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Number of channels claimed from the list of channels'
+        )
+
+    metric = 'svc_channels_channels_released'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Number of claimed channels released without refresh'
+        )
+
+    metric = 'svc_channels_pod_failures'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Number of times a pod failed to return its channels'
+        )
+
+    metric = 'svc_channels_refresh_batch_duration'
+    if metric not in metrics:
+        metrics[metric] = Gauge(
+            metric, 'Seconds it took to refresh the last batch of channels'
+        )
+
+    metric = 'svc_channels_refresh_cycle_time'
+    if metric not in metrics:
+        metrics[metric] = Gauge(
+            metric, 'Seconds since the oldest claimed channel was refreshed'
+        )
+
+    metric = 'svc_channels_channel_staleness'
+    if metric not in metrics:
+        metrics[metric] = Gauge(
+            metric, (
+                'Max seconds that channels in the last batch were stale '
+                'before they got refreshed'
+            )
+        )
+
 
 if __name__ == '__main__':
     run(main)
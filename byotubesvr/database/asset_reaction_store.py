@@ -33,6 +33,7 @@ ASSET_REACTIONS_KEY_PREFIX = 'asset_reactions'
 class AssetReactionStore(LiteStore):
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 3 * DEFAULT_PAGE_SIZE
+    MAX_BATCH_SIZE = 100
 
     async def get_reaction(self, lite_id: UUID, member_id: UUID, asset_id: UUID
                            ) -> AssetReactionResponseModel | None:
@@ -100,35 +101,55 @@ class AssetReactionStore(LiteStore):
         sorted_set_key: str
         _, sorted_set_key = AssetReactionStore._get_keys(lite_id)
 
+        # We page by the score of the cursor in the sorted set so we do not
+        # have to scan the sorted set from the start to find the cursor
+        max_score: float | str = '+inf'
+        cursor_found: bool = True
+        if after:
+            score: float | None = await self.client.zscore(
+                sorted_set_key, after
+            )
+            if score is None:
+                return []
+
+            max_score = score
+            cursor_found = False
+
         # Get more reactions than requested to account for the possibility that
         # asset_reactions have been deleted without the sorted set being
         # updated
         step: int = first * 2
 
-        cursor_found: bool = True
-        if after:
-            cursor_found = False
+        # Offset in the range of the sorted set with scores up to max_score
+        offset: int = 0
 
-        # Start of the range of the sorted set for
-        start_index: int = 0
-
-        results: list[AssetReactionResponseModel] = []
+        results: list[dict[str, any]] = []
         while True:
-            removals: list[str] = []
-            cursors: list[str] = await self.client.zrevrange(
-                sorted_set_key,
-                start_index,
-                start_index + step - 1
-            )
-            for cursor in cursors:
-                if not cursor_found and cursor == after:
+            cursors: list[str] = [
+                AssetReactionStore._decode(cursor)
+                for cursor in await self.client.zrevrangebyscore(
+                    sorted_set_key, max_score, '-inf', start=offset, num=step
+                )
+            ]
+
+            # Reactions with the same score as the cursor may precede it
+            candidates: list[str] = cursors
+            if not cursor_found:
+                if after in cursors:
                     cursor_found = True
-                    continue
+                    candidates = cursors[cursors.index(after) + 1:]
+                else:
+                    candidates = []
 
-                if cursor_found:
-                    data: dict[str, str] = await self.client.json().get(cursor)
-                    if data:
-                        results.append(data)
+            removals: list[str] = []
+            if candidates:
+                values: list = await self.client.json().mget(candidates, '$')
+                for cursor, value in zip(candidates, values):
+                    if isinstance(value, list):
+                        value = value[0] if value else None
+
+                    if value:
+                        results.append(value)
                     else:
                         removals.append(cursor)
 
@@ -138,10 +159,6 @@ class AssetReactionStore(LiteStore):
             # Delete items in the sorted set for which the key was not found
             if removals:
                 await self.client.zrem(sorted_set_key, *removals)
-                # Next time we request the next set of cursors, we need to
-                # adjust the start index by the number elements removed
-                start_index -= len(removals)
-                removals = []
 
             # We are at the end of the sorted set if we got less reactions
             # than we requested
@@ -151,9 +168,58 @@ class AssetReactionStore(LiteStore):
             if len(results) == first + 1:
                 break
 
-            start_index += step
+            # The removed items no longer count for the offset of the next
+            # range of the sorted set
+            offset += step - len(removals)
+
+        return [AssetReactionResponseModel(**item) for item in results]
+
+    async def get_reactions_for_assets(self, lite_id: UUID,
+                                       assets: list[tuple[UUID, UUID]]
+                                       ) -> list[AssetReactionResponseModel]:
+        '''
+        Get the reactions of a user for a list of assets with a single
+        request to Redis
+
+        :param lite_id: UUID of the lite account that is requesting the
+        reactions
+        :param assets: the member_id and asset_id of each asset
+        :returns: the reactions that were found, in the order of the assets
+        :raises: ValueError if too many assets were specified
+        '''
+
+        if not isinstance(lite_id, UUID):
+            lite_id = UUID(lite_id)
+
+        if len(assets) > AssetReactionStore.MAX_BATCH_SIZE:
+            raise ValueError(
+                f'Max number of assets is {AssetReactionStore.MAX_BATCH_SIZE}'
+            )
+
+        if not assets:
+            return []
+
+        keys: list[str] = [
+            AssetReactionStore._get_cursor(lite_id, member_id, asset_id)
+            for member_id, asset_id in assets
+        ]
+
+        values: list = await self.client.json().mget(keys, '$')
+
+        results: list[AssetReactionResponseModel] = []
+        for value in values:
+            if isinstance(value, list):
+                value = value[0] if value else None
 
-        return [AssetReactionResponseModel(**item) for item in results or []]
+            if value:
+                results.append(AssetReactionResponseModel(**value))
+
+        _LOGGER.debug(
+            f'Found {len(results)} reactions for {len(assets)} assets '
+            f'for lite_id {lite_id}'
+        )
+
+        return results
 
     async def add_reaction(self, lite_id: UUID,
                            asset_reaction: AssetReactionRequestModel) -> bool:
@@ -394,6 +460,17 @@ class AssetReactionStore(LiteStore):
                 f'Invalid cursor: {cursor}, asset_id part is not a UUID'
             )
 
+    @staticmethod
+    def _decode(value: str | bytes) -> str:
+        '''
+        The Redis client may or may not have been set up to decode responses
+        '''
+
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+
+        return value
+
     @staticmethod
     def _check_parameters(lite_id: UUID, member_id: UUID | None = None,
                           asset_id: UUID | None = None
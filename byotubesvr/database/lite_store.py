@@ -17,7 +17,7 @@ from logging import getLogger
 
 from redis import Redis
 
-import redis.asyncio as redis
+from byoda.datacache.redis_pool import get_redis_client
 
 _LOGGER: Logger = getLogger(__name__)
 
@@ -36,7 +36,7 @@ class LiteStore:
 
         _LOGGER.debug(f'Initialized LiteStore: {connection_string}')
 
-        self.client: Redis[any] = redis.from_url(connection_string)
+        self.client: Redis[any] = get_redis_client(connection_string)
 
     async def close(self) -> None:
         await self.client.aclose()
@@ -19,6 +19,8 @@ from datetime import datetime
 from logging import Logger
 from logging import getLogger
 
+from byoda.datacache.memory_cache import MemoryCache
+
 from byotubesvr.models.lite_api_models import NetworkLinkResponseModel
 
 from .lite_store import LiteStore
@@ -31,9 +33,33 @@ NETWORK_LINKS_KEY_PREFIX = 'network_links'
 
 
 class NetworkLinkStore(LiteStore):
+    '''
+    Each network link is stored as a JSON document. Per account, we
+    maintain a sorted set of the IDs of its links, ordered by creation time,
+    and sets of link IDs per remote member and per relation. Per remote
+    member and relation, a set of the accounts that have such a link makes
+    looking up the followers of a creator an indexed lookup.
+
+    Network links used to be stored as a JSON array in a single document per
+    account. Those documents get migrated when the account is first accessed
+    '''
+
+    # Remember which accounts we know to have been migrated so we only
+    # check for legacy documents once per account
+    MIGRATED_CACHE_SIZE: int = 100000
+
+    def __init__(self, connection_string: str) -> None:
+        super().__init__(connection_string)
+
+        self.migrated: MemoryCache = MemoryCache(
+            NetworkLinkStore.MIGRATED_CACHE_SIZE
+        )
+
     @staticmethod
     def get_key(lite_id: UUID) -> str:
         '''
+        Gets the key of the legacy JSON document with all network links
+        of an account
         '''
 
         if not isinstance(lite_id, UUID):
@@ -41,6 +67,31 @@ class NetworkLinkStore(LiteStore):
 
         return f'{NETWORK_LINKS_KEY_PREFIX}:{lite_id}'
 
+    @staticmethod
+    def get_link_key(lite_id: UUID, network_link_id: UUID | str) -> str:
+        return f'{NETWORK_LINKS_KEY_PREFIX}-link:{lite_id}_{network_link_id}'
+
+    @staticmethod
+    def get_sorted_set_key(lite_id: UUID) -> str:
+        return f'{NETWORK_LINKS_KEY_PREFIX}-sortedset:{lite_id}'
+
+    @staticmethod
+    def get_member_key(lite_id: UUID, remote_member_id: UUID | str) -> str:
+        return (
+            f'{NETWORK_LINKS_KEY_PREFIX}-member:{lite_id}_{remote_member_id}'
+        )
+
+    @staticmethod
+    def get_relation_key(lite_id: UUID, relation: str) -> str:
+        return f'{NETWORK_LINKS_KEY_PREFIX}-relation:{lite_id}_{relation}'
+
+    @staticmethod
+    def get_followers_key(remote_member_id: UUID | str, relation: str) -> str:
+        return (
+            f'{NETWORK_LINKS_KEY_PREFIX}-followers:'
+            f'{remote_member_id}_{relation}'
+        )
+
     async def add_link(self, lite_id: UUID, remote_member_id: UUID,
                        relation: str, annotations: set[str] = None) -> None:
         '''
@@ -79,10 +130,6 @@ class NetworkLinkStore(LiteStore):
         )
 
         # No existing link so we need to create a new one
-        key: str = NetworkLinkStore.get_key(lite_id)
-        if not await self.client.exists(key):
-            await self.client.json().set(key, '$', [])
-
         network_link_id: UUID = uuid4()
         data: dict[str, str | list[str]] = {
             'created_timestamp': datetime.now(tz=UTC).timestamp(),
@@ -91,7 +138,7 @@ class NetworkLinkStore(LiteStore):
             'annotations': list(annotations),
             'network_link_id': str(network_link_id)
         }
-        await self.client.json().arrappend(key, '$', data)
+        await self._store_link(lite_id, data)
 
         return network_link_id
 
@@ -100,7 +147,8 @@ class NetworkLinkStore(LiteStore):
         relation: str | None = None
     ) -> list[NetworkLinkResponseModel]:
         '''
-        Get the network links of a user
+        Get the network links of a user, ordered by the time they were
+        created
         '''
 
         if not isinstance(lite_id, UUID):
@@ -112,25 +160,102 @@ class NetworkLinkStore(LiteStore):
         if relation and not isinstance(relation, str):
             raise ValueError('relation must be a string')
 
-        key: str = NetworkLinkStore.get_key(lite_id)
-        selector: str | None = None
-        data: dict[str, str | list[str]]
-        if remote_member_id or relation:
-            selector = NetworkLinkStore._get_jsonpath_selector(
-                remote_member_id=remote_member_id, relation=relation
+        await self._migrate(lite_id)
+
+        link_ids: list[str | bytes]
+        if remote_member_id and relation:
+            link_ids = await self.client.sinter(
+                NetworkLinkStore.get_member_key(lite_id, remote_member_id),
+                NetworkLinkStore.get_relation_key(lite_id, relation)
+            )
+        elif remote_member_id:
+            link_ids = await self.client.smembers(
+                NetworkLinkStore.get_member_key(lite_id, remote_member_id)
+            )
+        elif relation:
+            link_ids = await self.client.smembers(
+                NetworkLinkStore.get_relation_key(lite_id, relation)
             )
-            data = await self.client.json().get(key, selector)
         else:
-            data = await self.client.json().get(key)
+            link_ids = await self.client.zrange(
+                NetworkLinkStore.get_sorted_set_key(lite_id), 0, -1
+            )
+
+        if not link_ids:
+            return []
+
+        keys: list[str] = [
+            NetworkLinkStore.get_link_key(
+                lite_id, NetworkLinkStore._decode(link_id)
+            )
+            for link_id in link_ids
+        ]
+        values: list = await self.client.json().mget(keys, '$')
 
         results: list[NetworkLinkResponseModel] = []
-        item: dict[str, str | list[str]]
-        for item in data or []:
-            link = NetworkLinkResponseModel(**item)
-            results.append(link)
+        for value in values:
+            if isinstance(value, list):
+                value = value[0] if value else None
+
+            if value:
+                results.append(NetworkLinkResponseModel(**value))
+
+        results.sort(key=lambda link: link.created_timestamp)
 
         return results
 
+    async def is_linked(self, lite_id: UUID, remote_member_id: UUID,
+                        relation: str) -> bool:
+        '''
+        Checks whether the user has a network link with the relation to the
+        remote member, ie. whether the user follows a creator
+
+        :param lite_id: UUID of the user
+        :param remote_member_id: UUID of the remote member
+        :param relation: The relation to the remote member
+        :returns: whether the user has such a network link
+        '''
+
+        NetworkLinkStore._check_parameters(
+            lite_id, remote_member_id=remote_member_id, relation=relation
+        )
+
+        await self._migrate(lite_id)
+
+        result: int = await self.client.sismember(
+            NetworkLinkStore.get_followers_key(remote_member_id, relation),
+            str(lite_id)
+        )
+
+        return bool(result)
+
+    async def get_followers(self, remote_member_id: UUID, relation: str
+                            ) -> set[UUID]:
+        '''
+        Gets the users that have a network link with the relation to the
+        remote member, ie. the followers of a creator. Users whose network
+        links have not yet been migrated from the legacy document are not
+        included
+
+        :param remote_member_id: UUID of the remote member
+        :param relation: The relation to the remote member
+        :returns: the lite_ids of the users
+        '''
+
+        if not isinstance(remote_member_id, UUID):
+            remote_member_id = UUID(remote_member_id)
+
+        if not isinstance(relation, str):
+            raise ValueError('relation must be a string')
+
+        lite_ids: set[str | bytes] = await self.client.smembers(
+            NetworkLinkStore.get_followers_key(remote_member_id, relation)
+        )
+
+        return set(
+            UUID(NetworkLinkStore._decode(lite_id)) for lite_id in lite_ids
+        )
+
     async def update_link(self, lite_id, remote_member_id: UUID, relation: str,
                           annotations: set[str]) -> bool:
         '''
@@ -157,7 +282,7 @@ class NetworkLinkStore(LiteStore):
         if not links:
             return None
         elif len(links) > 1:
-            new_annotations: set[str] = await self._dedupees(
+            new_annotations: set[str] = await self._dedupe(
                 lite_id, remote_member_id=remote_member_id,
                 relation=relation, links=links)
             if new_annotations:
@@ -190,16 +315,13 @@ class NetworkLinkStore(LiteStore):
         if not links:
             return 0
 
-        links = await self.get_links(lite_id, remote_member_id, relation)
         original_annotations: int = links[0].annotations
 
         # If the annotations are not changed then we do not need to update
         # the network link
         must_update: bool = False
-        if not links:
-            return False
-        elif len(links) > 1:
-            annotations: set[str] = await self._dedupees(
+        if len(links) > 1:
+            annotations: set[str] = await self._dedupe(
                 lite_id, remote_member_id=remote_member_id,
                 relation=relation, links=links)
             if annotations:
@@ -242,12 +364,42 @@ class NetworkLinkStore(LiteStore):
         if not isinstance(network_link_id, UUID):
             network_link_id = UUID(network_link_id)
 
-        key: str = NetworkLinkStore.get_key(lite_id)
+        await self._migrate(lite_id)
+
+        link_key: str = NetworkLinkStore.get_link_key(lite_id, network_link_id)
+        data: dict[str, any] | None = await self.client.json().get(link_key)
+        if not data:
+            return 0
 
-        selector: str = f'$[?(@.network_link_id=="{network_link_id}")]'
-        result: int = await self.client.json().delete(key, selector)
+        remote_member_id: str = data['member_id']
+        relation: str = data['relation']
+        member_key: str = NetworkLinkStore.get_member_key(
+            lite_id, remote_member_id
+        )
+        relation_key: str = NetworkLinkStore.get_relation_key(
+            lite_id, relation
+        )
 
-        return result
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(link_key)
+            pipe.zrem(
+                NetworkLinkStore.get_sorted_set_key(lite_id),
+                str(network_link_id)
+            )
+            pipe.srem(member_key, str(network_link_id))
+            pipe.srem(relation_key, str(network_link_id))
+            pipe.sinter(member_key, relation_key)
+            results: list = await pipe.execute()
+
+        # The user may still have a duplicate link to the remote member
+        # with the same relation
+        if not results[-1]:
+            await self.client.srem(
+                NetworkLinkStore.get_followers_key(remote_member_id, relation),
+                str(lite_id)
+            )
+
+        return results[0]
 
     async def _set_link(self, lite_id: UUID,
                         created_timestamp: datetime | int | float,
@@ -255,8 +407,8 @@ class NetworkLinkStore(LiteStore):
                         annotations: set[str], network_link_id: UUID | None
                         ):
         '''
-        Set link is hardcoded to set the link to the specified value, removing
-        any existing link with the same network_link_id
+        Set link is hardcoded to set the link to the specified value,
+        overwriting any existing link with the same network_link_id
         '''
         NetworkLinkStore._check_parameters(
             lite_id, remote_member_id=remote_member_id, relation=relation,
@@ -275,8 +427,6 @@ class NetworkLinkStore(LiteStore):
         if network_link_id:
             if not isinstance(network_link_id, UUID):
                 network_link_id = UUID(network_link_id)
-
-            await self.remove_link(lite_id, network_link_id)
         else:
             network_link_id = uuid4()
 
@@ -287,8 +437,69 @@ class NetworkLinkStore(LiteStore):
             'annotations': list(annotations),
             'network_link_id': str(network_link_id)
         }
+        await self._store_link(lite_id, data)
+
+    async def _store_link(self, lite_id: UUID, data: dict[str, any]) -> None:
+        '''
+        Stores the JSON document of a network link and adds it to the
+        indexes
+
+        :param lite_id: UUID of the user
+        :param data: the network link
+        :returns: (none)
+        '''
+
+        network_link_id: str = data['network_link_id']
+        remote_member_id: str = data['member_id']
+        relation: str = data['relation']
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.json().set(
+                NetworkLinkStore.get_link_key(lite_id, network_link_id),
+                '$', data
+            )
+            pipe.zadd(
+                NetworkLinkStore.get_sorted_set_key(lite_id),
+                {network_link_id: data['created_timestamp']}
+            )
+            pipe.sadd(
+                NetworkLinkStore.get_member_key(lite_id, remote_member_id),
+                network_link_id
+            )
+            pipe.sadd(
+                NetworkLinkStore.get_relation_key(lite_id, relation),
+                network_link_id
+            )
+            pipe.sadd(
+                NetworkLinkStore.get_followers_key(remote_member_id, relation),
+                str(lite_id)
+            )
+            await pipe.execute()
+
+    async def _migrate(self, lite_id: UUID) -> None:
+        '''
+        Migrates the network links of a user from the legacy JSON document
+        with an array of all network links of the user
+
+        :param lite_id: UUID of the user
+        :returns: (none)
+        '''
+
+        if lite_id in self.migrated:
+            return
+
         key: str = NetworkLinkStore.get_key(lite_id)
-        await self.client.json().arrappend(key, '$', data)
+        links: list[dict[str, any]] | None = await self.client.json().get(key)
+        for data in links or []:
+            await self._store_link(lite_id, data)
+
+        if links is not None:
+            await self.client.delete(key)
+            _LOGGER.debug(
+                f'Migrated {len(links)} network links of lite_id {lite_id}'
+            )
+
+        self.migrated.set(lite_id, True)
 
     async def _dedupe(self, lite_id: UUID, remote_member_id: UUID,
                       relation: str, links: list[NetworkLinkResponseModel]
@@ -331,46 +542,15 @@ class NetworkLinkStore(LiteStore):
         return annotations
 
     @staticmethod
-    def _get_jsonpath_selector(remote_member_id: UUID | None = None,
-                               relation: str | None = None,
-                               network_link_id: UUID | None = None) -> str:
+    def _decode(value: str | bytes) -> str:
         '''
-        Create a JSONPath selector for the network links
+        The Redis client may or may not have been set up to decode responses
         '''
 
-        if not (remote_member_id or relation or network_link_id):
-            raise ValueError(
-                'At least one of remote_member_id, relation, or '
-                'network_link_id must be provided'
-            )
-
-        if remote_member_id and not isinstance(remote_member_id, UUID):
-            remote_member_id = UUID(remote_member_id)
-
-        if network_link_id and not isinstance(network_link_id, UUID):
-            network_link_id = UUID(network_link_id)
-
-        if relation and not isinstance(relation, str):
-            raise ValueError('relation must be a string')
-
-        selector = '$[?('
-        if remote_member_id:
-            selector += f'@.member_id=="{remote_member_id}"'
-        if relation:
-            if selector[-1] != '(':
-                selector += '&&'
-            selector += f'@.relation=="{relation}"'
-        if network_link_id:
-            if selector[-1] != '(':
-                selector += '&&'
-
-            selector += f'@.network_link_id=="{network_link_id}"'
-
-        selector += ')]'
-
-        _LOGGER.debug(f'Using JSONPath {selector}')
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
 
-        return selector
+        return value
 
     @staticmethod
     def _check_parameters(lite_id: UUID, remote_member_id: UUID,
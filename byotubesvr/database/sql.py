@@ -10,28 +10,70 @@ Class for SQL tables used for BYO.Tube-lite service
 import os
 
 from typing import Self
+from logging import Logger
+from logging import getLogger
+from functools import partial
+from contextlib import asynccontextmanager
+from collections.abc import AsyncIterator
+
+from prometheus_client import Gauge
 
 os.environ['PSYCOPG_IMPL'] = 'binary'
 from psycopg_pool import AsyncConnectionPool        # noqa: E402
 from psycopg.rows import dict_row                   # noqa: E402
 from psycopg import AsyncCursor                     # noqa: E402
+from psycopg import AsyncConnection                 # noqa: E402
 from psycopg.errors import CheckViolation           # noqa: E402
 from psycopg.errors import UniqueViolation          # noqa: E402
 
+_LOGGER: Logger = getLogger(__name__)
+
+# The statistics of the connection pool that we export as metrics
+POOL_STATS: dict[str, str] = {
+    'pool_min': 'Minimum number of connections in the pool',
+    'pool_max': 'Maximum number of connections in the pool',
+    'pool_size': 'Number of connections in the pool',
+    'pool_available': 'Number of idle connections in the pool',
+    'requests_waiting': 'Number of requests waiting for a connection',
+    'requests_num': 'Number of connections requested from the pool',
+    'requests_errors': 'Number of failed requests for a connection',
+    'connections_num': 'Number of connections made to the server',
+    'connections_errors': 'Number of failed connections to the server',
+    'connections_lost': 'Number of connections found broken',
+}
+
+# byoda.config imports this module so we can not keep the gauges in
+# config.metrics
+POOL_GAUGES: dict[str, Gauge] = {}
+
 
 class SqlStorage:
     def __init__(self, connection_string: str) -> None:
         self.connection_string: str = connection_string
         self.pool: AsyncConnectionPool | None = None
 
-    async def setup(connection_string: str) -> Self:
+    async def setup(connection_string: str, min_size: int = 4,
+                    max_size: int | None = None) -> Self:
+        '''
+        Factory for SqlStorage
+
+        :param connection_string: the connection string for the database
+        :param min_size: the minimum number of connections in the pool
+        :param max_size: the maximum number of connections in the pool, if
+        None then it is the same as min_size
+        :returns: the SqlStorage instance
+        '''
+
         sql = SqlStorage(connection_string)
         sql.pool = AsyncConnectionPool(
             conninfo=sql.connection_string, open=False,
+            min_size=min_size, max_size=max_size,
             kwargs={'row_factory': dict_row}
         )
         await sql.pool.open()
 
+        sql.setup_metrics()
+
         return sql
 
     async def close(self) -> None:
@@ -40,7 +82,8 @@ class SqlStorage:
             self.pool = None
 
     async def query(self, stmt: str, params: dict,
-                    fetch_some: bool | None = None) -> int | dict | list[dict]:
+                    fetch_some: bool | None = None,
+                    prepare: bool | None = None) -> int | dict | list[dict]:
         '''
         Executes a query on the database. We use for row_factory the dict_row, so
         we may return one dict or a list of dicts, depending on the fetch_some
@@ -50,6 +93,9 @@ class SqlStorage:
         :param params:
         :param fetch_some: should results be returned: None for no,
         False for 1, True for all
+        :param prepare: True to prepare the statement on the connection the
+        first time it is executed, None to let psycopg prepare it after it
+        has been executed a couple of times on the connection
         :returns: If fetch_some is None, returns the number of rows affected,
         if fetch_some is False, returns the first row, if fetch_some is True,
         :returns: number of rows affected, the first row, or all rows
@@ -57,16 +103,87 @@ class SqlStorage:
 
         try:
             async with self.pool.connection() as conn:
-                result: AsyncCursor[dict] = await conn.execute(stmt, params)
+                result: AsyncCursor[dict] = await conn.execute(
+                    stmt, params, prepare=prepare
+                )
+
+                if fetch_some is None:
+                    return result.rowcount
+                if fetch_some is False:
+                    return await result.fetchone()
+
+                return await result.fetchall()
+        except (CheckViolation, UniqueViolation) as exc:
+            raise ValueError(exc)
+
+    async def query_many(self, stmts: list[tuple[str, dict]],
+                         prepare: bool | None = None) -> list[int]:
+        '''
+        Executes multiple statements in a single transaction. The statements
+        are sent to the server in pipeline mode using a single connection
+        from the pool, so we do not wait for the result of a statement
+        before sending the next one
+
+        :param stmts: the statements and their parameters
+        :param prepare: see SqlStorage.query()
+        :returns: the number of rows affected by each statement
+        '''
+
+        cursors: list[AsyncCursor[dict]] = []
+        try:
+            async with self.pipeline() as conn:
+                async with conn.transaction():
+                    stmt: str
+                    params: dict
+                    for stmt, params in stmts:
+                        cursors.append(
+                            await conn.execute(stmt, params, prepare=prepare)
+                        )
         except (CheckViolation, UniqueViolation) as exc:
             raise ValueError(exc)
 
-        if fetch_some is None:
-            return result.rowcount
-        if fetch_some is False:
-            return await result.fetchone()
+        return [cursor.rowcount for cursor in cursors]
+
+    @asynccontextmanager
+    async def pipeline(self) -> AsyncIterator[AsyncConnection]:
+        '''
+        Context manager for a connection from the pool in pipeline mode, for
+        callers that need to run multiple statements, ie.:
+
+        async with lite_db.pipeline() as conn:
+            await conn.execute(...)
+            await conn.execute(...)
+        '''
+
+        async with self.pool.connection() as conn:
+            async with conn.pipeline():
+                yield conn
+
+    def get_pool_stat(self, name: str) -> int:
+        '''
+        Gets a statistic of the connection pool, for the Prometheus exporter
+        '''
+
+        if not self.pool:
+            return 0
+
+        return self.pool.get_stats().get(name, 0)
+
+    def setup_metrics(self) -> None:
+        '''
+        Exports the statistics of the connection pool as metrics
+        '''
+
+        name: str
+        description: str
+        for name, description in POOL_STATS.items():
+            metric: str = f'lite_db_{name}'
+            if metric not in POOL_GAUGES:
+                POOL_GAUGES[metric] = Gauge(metric, description)
 
-        return await result.fetchall()
+            POOL_GAUGES[metric].set_function(
+                partial(self.get_pool_stat, name)
+            )
 
 
 ACCOUNT_STATUSES_STMTS: dict[str, str] = {
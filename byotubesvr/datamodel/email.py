@@ -54,6 +54,9 @@ class EmailMessage:
         self.body: str | None = None
         self.html_body: str | None = None
 
+        # How often delivery of the message has failed before
+        self.attempts: int = 0
+
         if 'email_message_verification_emails_sent' not in config.metrics:
             self._setup_metrics()
 
@@ -151,6 +154,22 @@ class EmailMessage:
         )
         await queue.push(queue_name, queue_message)
 
+    async def retry(self, queue: Queue, delay: int | float) -> None:
+        '''
+        Puts the message back on the queue for another delivery attempt
+        after a delay
+
+        :param queue: the queue to put the message on
+        :param delay: the number of seconds before the message is retried
+        :returns: (none)
+        '''
+
+        queue_name: str = EMAIL_QUEUE
+        queue_message: QueueMessage = QueueMessage(
+            1, self.sender, self.to_dict(), attempts=self.attempts + 1
+        )
+        await queue.push_delayed(queue_name, queue_message, delay)
+
     @staticmethod
     async def from_queue(queue: Queue) -> Self:
         '''
@@ -200,6 +219,7 @@ class EmailMessage:
                 EmailVerificationMessage.from_dict(
                     message.sender, mail_type, message.contents
                 )
+            verification_message.attempts = message.attempts
             return verification_message
         else:
             metric = 'email_message_unsupported_mail_type'
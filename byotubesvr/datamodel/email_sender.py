@@ -0,0 +1,177 @@
+'''
+Senders deliver email messages through an email transport. The email
+worker uses the sender for the transport that is configured with the
+'email_transport' setting.
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+from abc import ABC
+from abc import abstractmethod
+from uuid import uuid4
+from typing import Self
+from logging import Logger
+from logging import getLogger
+
+from anyio import sleep
+from anyio import to_thread
+from anyio import CapacityLimiter
+
+from azure.communication.email import EmailClient
+from azure.core.polling import LROPoller
+from azure.core.exceptions import HttpResponseError
+from azure.core.exceptions import ServiceRequestError
+from azure.core.exceptions import ServiceResponseError
+
+from byoda.datatypes import EmailTransport
+
+_LOGGER: Logger = getLogger(__name__)
+
+
+class TransientEmailError(RuntimeError):
+    '''
+    Raised by a sender when delivery of a message failed but may succeed
+    when it is retried later
+    '''
+    pass
+
+
+class EmailSender(ABC):
+    '''
+    Base class for delivering email messages
+    '''
+
+    @staticmethod
+    async def setup(transport: EmailTransport, settings: dict[str, any],
+                    max_concurrent_sends: int) -> Self:
+        '''
+        Factory for the sender of an email transport
+
+        :param transport: the transport to deliver messages with
+        :param settings: the 'svcserver' section of the configuration file
+        :param max_concurrent_sends: the maximum number of messages that
+        will be sent concurrently
+        :returns: the sender
+        :raises: ValueError if the transport is not supported
+        '''
+
+        if transport == EmailTransport.AZURE:
+            return AzureEmailSender(
+                settings['azure_emailcs_endpoint'],
+                settings['azure_emailcs_access_key'],
+                max_concurrent_sends
+            )
+        elif transport == EmailTransport.STUB:
+            return StubEmailSender()
+
+        raise ValueError(f'Unsupported email transport: {transport}')
+
+    @abstractmethod
+    async def send(self, email: dict[str, any]) -> str:
+        '''
+        Sends an email message
+
+        :param email: the message, as generated by EmailMessage.to_dict()
+        :returns: the ID assigned to the message by the transport
+        :raises: TransientEmailError if the message should be retried later,
+        other exceptions if the message can not be delivered
+        '''
+
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        '''
+        Releases the resources of the sender
+        '''
+
+        pass
+
+
+class AzureEmailSender(EmailSender):
+    '''
+    Sends email messages with the Azure Email Communication Service.
+    The Azure SDK polls the service until the message has been processed
+    so the calls to the SDK run in worker threads to keep the event loop
+    responsive while multiple messages are in flight
+    '''
+
+    def __init__(self, endpoint: str, access_key: str,
+                 max_concurrent_sends: int) -> None:
+        '''
+        Constructor
+
+        :param endpoint: the hostname of the Azure Email CS endpoint
+        :param access_key: the access key for the endpoint
+        :param max_concurrent_sends: the maximum number of worker threads
+        for sending messages
+        '''
+
+        connection_string: str = \
+            f'endpoint=https://{endpoint};accessKey={access_key}'
+        self.client: EmailClient = EmailClient.from_connection_string(
+            connection_string
+        )
+        self.limiter: CapacityLimiter = CapacityLimiter(max_concurrent_sends)
+
+    async def send(self, email: dict[str, any]) -> str:
+        try:
+            result: dict = await to_thread.run_sync(
+                self._send, email, limiter=self.limiter
+            )
+        except (ServiceRequestError, ServiceResponseError) as exc:
+            raise TransientEmailError(
+                f'Failed to connect to Azure Email CS: {exc}'
+            ) from exc
+        except HttpResponseError as exc:
+            status_code: int = exc.status_code or 0
+            if status_code == 429 or status_code >= 500:
+                raise TransientEmailError(
+                    f'Azure Email CS returned HTTP {status_code}: {exc}'
+                ) from exc
+            raise
+
+        _LOGGER.debug(
+            f'Sent email with Azure ECS ID {result["id"]}: {result["status"]}'
+        )
+        return result['id']
+
+    def _send(self, email: dict[str, any]) -> dict:
+        poller: LROPoller = self.client.begin_send(email)
+        return poller.result()
+
+    async def close(self) -> None:
+        self.client.close()
+
+
+class StubEmailSender(EmailSender):
+    '''
+    Keeps the messages in memory instead of delivering them, for local
+    development and testing
+    '''
+
+    def __init__(self, delay: float = 0) -> None:
+        '''
+        Constructor
+
+        :param delay: the number of seconds each send takes
+        '''
+
+        self.delay: float = delay
+        self.sent: list[dict[str, any]] = []
+
+    async def send(self, email: dict[str, any]) -> str:
+        if self.delay:
+            await sleep(self.delay)
+
+        message_id: str = str(uuid4())
+        self.sent.append(email)
+
+        recipients: list[dict[str, str]] = email['recipients']['to']
+        _LOGGER.debug(
+            f'Stub transport accepted email {message_id} to '
+            f'{recipients[0]["address"]}: {email["content"]["subject"]}'
+        )
+
+        return message_id
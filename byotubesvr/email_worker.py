@@ -19,18 +19,23 @@ from yaml import safe_load as yaml_safe_loader
 
 from anyio import run
 from anyio import sleep
-
-from azure.communication.email import EmailClient
-from azure.core.polling._poller import LROPoller
+from anyio import Semaphore
+from anyio import create_task_group
 
 from prometheus_client import start_http_server
 from prometheus_client import Counter
+from prometheus_client import Gauge
+
+from byoda.datatypes import EmailTransport
 
 from byoda.storage.message_queue import Queue
 
 from byoda.util.logger import Logger as ByodaLogger
 
+from byotubesvr.datamodel.email import EMAIL_QUEUE
 from byotubesvr.datamodel.email import EmailMessage
+from byotubesvr.datamodel.email_sender import EmailSender
+from byotubesvr.datamodel.email_sender import TransientEmailError
 
 from byoda import config
 
@@ -38,6 +43,17 @@ _LOGGER: Logger | None = None
 
 PROMETHEUS_EXPORTER_PORT: int = 5020
 
+# Maximum number of emails that are being sent at the same time
+MAX_CONCURRENT_SENDS: int = 8
+
+# Emails that failed to be sent because of a transient error are retried
+# after RETRY_DELAY seconds, doubling the delay for each attempt
+MAX_ATTEMPTS: int = 5
+RETRY_DELAY: int = 30
+
+# How often to check for emails for which the retry delay has passed
+RETRY_POLL_INTERVAL: int = 5
+
 
 async def main(args: list[str]) -> None:
     config_file: str = os.environ.get('CONFIG_FILE', 'config-byotube.yml')
@@ -54,12 +70,15 @@ async def main(args: list[str]) -> None:
     )
     _LOGGER.debug(f'Read configuration file: {config_file}')
 
-    email_endpoint: str = svc_config['svcserver']['azure_emailcs_endpoint']
-    email_access_key: str = svc_config['svcserver']['azure_emailcs_access_key']
-    connection_string: str = \
-        f'endpoint=https://{email_endpoint};accessKey={email_access_key}'
-    email_client: EmailClient = EmailClient.from_connection_string(
-        connection_string
+    global MAX_CONCURRENT_SENDS
+    MAX_CONCURRENT_SENDS = svc_config['svcserver'].get(
+        'email_max_concurrent_sends', MAX_CONCURRENT_SENDS
+    )
+    transport = EmailTransport(
+        svc_config['svcserver'].get('email_transport', 'azure')
+    )
+    sender: EmailSender = await EmailSender.setup(
+        transport, svc_config['svcserver'], MAX_CONCURRENT_SENDS
     )
 
     listen_port: int = os.environ.get(
@@ -67,46 +86,145 @@ async def main(args: list[str]) -> None:
     )
     start_http_server(listen_port)
 
-    metric: str = 'mail_worker_sent_emails'
-    config.metrics[metric] = Counter(
-        metric, 'Number of emails sent by the mail worker',
-        ['sender', 'sender_address', 'mail_type']
-    )
-    metric: str = 'mail_worker_failed_emails'
-    config.metrics[metric] = Counter(
-        metric, 'Number of email failures by the mail worker',
-        ['sender', 'sender_address', 'mail_type']
-    )
+    setup_exporter_metrics()
 
     queue = await Queue.setup(svc_config['svcserver']['message_queue'])
 
-    while True:
-        message: EmailMessage
+    # Each email being sent holds the semaphore, so we stop taking
+    # emails from the queue while MAX_CONCURRENT_SENDS emails are in flight
+    semaphore = Semaphore(MAX_CONCURRENT_SENDS)
+
+    _LOGGER.debug(
+        f'Sending emails using the {transport.value} transport with up '
+        f'to {MAX_CONCURRENT_SENDS} emails in flight'
+    )
+    try:
+        async with create_task_group() as task_group:
+            task_group.start_soon(requeue_emails, queue)
+
+            while True:
+                await semaphore.acquire()
+
+                message: EmailMessage
+                try:
+                    message = await EmailMessage.from_queue(queue)
+                except Exception as exc:
+                    semaphore.release()
+                    _LOGGER.error(f'Failed to get message from queue: {exc}')
+                    await sleep(1)
+                    continue
+
+                task_group.start_soon(
+                    send_email, sender, queue, message, semaphore
+                )
+    finally:
+        await sender.close()
+
+
+async def send_email(sender: EmailSender, queue: Queue, message: EmailMessage,
+                     semaphore: Semaphore) -> None:
+    '''
+    Sends an email and schedules a retry if sending failed because of a
+    transient error
+
+    :param sender: the sender for the email transport
+    :param queue: the queue to schedule retries on
+    :param message: the message to send
+    :param semaphore: the semaphore acquired for sending the message, it
+    is released when this function returns
+    :returns: (none)
+    '''
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+    labels: dict[str, str] = {
+        'sender': message.sender,
+        'sender_address': message.sender_address,
+        'mail_type': message.mail_type.value,
+    }
+
+    metrics['mail_worker_emails_in_flight'].inc()
+    try:
+        email: dict = message.to_dict()
+        message_id: str = await sender.send(email)
+        _LOGGER.debug(
+            f'Sucessfully sent email with ID {message_id} '
+            f'to {message.recipient_email}'
+        )
+        metrics['mail_worker_sent_emails'].labels(**labels).inc()
+    except TransientEmailError as exc:
+        if message.attempts + 1 >= MAX_ATTEMPTS:
+            metrics['mail_worker_failed_emails'].labels(**labels).inc()
+            _LOGGER.error(
+                f'Giving up on email to {message.recipient_email} after '
+                f'{message.attempts + 1} attempts: {exc}'
+            )
+            return
+
+        delay: int = RETRY_DELAY * 2 ** message.attempts
+        _LOGGER.info(
+            f'Retrying email to {message.recipient_email} in {delay} '
+            f'seconds: {exc}'
+        )
         try:
-            message = await EmailMessage.from_queue(queue)
+            await message.retry(queue, delay)
+            metrics['mail_worker_retried_emails'].labels(**labels).inc()
         except Exception as exc:
-            _LOGGER.error(f'Failed to get message from queue: {exc}')
-            await sleep(1)
-            continue
+            metrics['mail_worker_failed_emails'].labels(**labels).inc()
+            _LOGGER.exception(f'Failed to schedule retry of email: {exc}')
+    except Exception as exc:
+        metrics['mail_worker_failed_emails'].labels(**labels).inc()
+        _LOGGER.exception(f'Error processing message: {exc}')
+    finally:
+        metrics['mail_worker_emails_in_flight'].dec()
+        semaphore.release()
+
+
+async def requeue_emails(queue: Queue) -> None:
+    '''
+    Puts emails for which the retry delay has passed back on the queue
+
+    :param queue: the queue with the emails
+    :returns: (none)
+    '''
 
+    while True:
         try:
-            email: dict = message.to_dict()
-            poller: LROPoller = email_client.begin_send(email)
-            result: dict = poller.result()
-            _LOGGER.debug(
-                f'Sucessfully sent email with Azure ECS ID {result["id"]} '
-                f'to {message.recipient_email}: {result["status"]}'
-            )
-            config.metrics['mail_worker_sent_emails'].labels(
-                sender=message.sender, sender_address=message.sender_address,
-                mail_type=message.mail_type.value
-            ).inc()
+            requeued: int = await queue.requeue(EMAIL_QUEUE)
+            if requeued:
+                _LOGGER.debug(f'Requeued {requeued} emails for retry')
         except Exception as exc:
-            config.metrics['mail_worker_failed_emails'].labels(
-                sender=message.sender, sender_address=message.sender_address,
-                mail_type=message.mail_type.value
-            ).inc()
-            _LOGGER.exception(f'Error processing message: {exc}')
+            _LOGGER.error(f'Failed to requeue emails for retry: {exc}')
+
+        await sleep(RETRY_POLL_INTERVAL)
+
+
+def setup_exporter_metrics() -> None:
+    metrics: dict[str, Counter | Gauge] = config.metrics
+
+    metric: str = 'mail_worker_sent_emails'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Number of emails sent by the mail worker',
+            ['sender', 'sender_address', 'mail_type']
+        )
+    metric = 'mail_worker_failed_emails'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Number of email failures by the mail worker',
+            ['sender', 'sender_address', 'mail_type']
+        )
+    metric = 'mail_worker_retried_emails'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Number of emails scheduled for another attempt',
+            ['sender', 'sender_address', 'mail_type']
+        )
+    metric = 'mail_worker_emails_in_flight'
+    if metric not in metrics:
+        metrics[metric] = Gauge(
+            metric, 'Number of emails currently being sent'
+        )
+
 
 if __name__ == '__main__':
     run(main, sys.argv)
@@ -19,7 +19,9 @@ from fastapi import FastAPI
 
 from fastapi_limiter import FastAPILimiter
 
-import redis.asyncio as redis
+from anyio import create_task_group
+
+from redis import Redis
 
 from cryptography import x509
 from cryptography.hazmat.primitives import serialization
@@ -32,6 +34,9 @@ from byoda.storage.message_queue import Queue
 
 from byoda.datacache.asset_cache import AssetCache
 from byoda.datacache.channel_cache import ChannelCache
+from byoda.datacache.redis_pool import get_redis_client
+from byoda.datacache.redis_pool import close_pools
+from byoda.datacache import redis_pool
 
 from byoda.secrets.service_secret import ServiceSecret
 from byoda.secrets.networkrootca_secret import NetworkRootCaSecret
@@ -96,20 +101,32 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     config.jwt_secrets = svc_config['svcserver']['jwt_secrets']
 
     lite_db: SqlStorage = await SqlStorage.setup(
-        svc_config['svcserver']['lite_db']
+        svc_config['svcserver']['lite_db'],
+        min_size=svc_config['svcserver'].get('lite_db_min_pool_size', 4),
+        max_size=svc_config['svcserver'].get('lite_db_max_pool_size')
     )
     config.lite_db = lite_db
     for cls in [LiteAccountSqlModel]:
         await cls.create_table(lite_db)
 
+    # All caches and stores share the connection pools for the Redis servers
+    redis_pool.MAX_CONNECTIONS = svc_config['svcserver'].get(
+        'redis_max_connections'
+    )
+
     config.asset_cache = await AssetCache.setup(
-        svc_config['svcserver']['asset_cache']
+        svc_config['svcserver']['asset_cache'],
+        hot_lists_size=svc_config['svcserver'].get('hot_lists_size', 1000),
+        hot_lists_lag=svc_config['svcserver'].get(
+            'hot_lists_lag', AssetCache.HOT_LISTS_LAG
+        )
     )
     redis_rw_url: str = svc_config['svcserver']['asset_cache_readwrite']
     config.asset_cache_readwrite = await AssetCache.setup(redis_rw_url)
 
     config.channel_cache = await ChannelCache.setup(
-        svc_config['svcserver']['channel_cache']
+        svc_config['svcserver']['channel_cache'],
+        track_keys=svc_config['svcserver'].get('redis_client_tracking', False)
     )
     redis_rw_url: str = svc_config['svcserver']['channel_cache_readwrite']
     config.channel_cache_readwrite = await ChannelCache.setup(redis_rw_url)
@@ -126,9 +143,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
         svc_config['svcserver']['lite_store']
     )
 
-    redis_connection: redis.Redis = redis.from_url(
-        redis_rw_url, encoding='utf-8'
-    )
+    redis_connection: Redis = get_redis_client(redis_rw_url)
     await FastAPILimiter.init(
         redis=redis_connection, prefix='ratelimits'
     )
@@ -170,10 +185,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
 
     _LOGGER.info('Starting server')
 
-    yield
+    async with create_task_group() as task_group:
+        if config.channel_cache.tracked_keys:
+            task_group.start_soon(config.channel_cache.tracked_keys.listen)
+
+        yield
+
+        task_group.cancel_scope.cancel()
 
     _LOGGER.info('Shutting down server')
 
+    await close_pools()
+
 
 config_file: str = os.environ.get('CONFIG_FILE', 'config-byotube.yml')
 with open(config_file) as file_desc:
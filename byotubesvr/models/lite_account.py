@@ -101,7 +101,11 @@ class LiteAccountSqlModel:
         UNIQUE(handle),
         CONSTRAINT c_lowercase_email CHECK (((email)::TEXT = LOWER((email)::TEXT)))
     );
+''',
+        'create_email_index': '''
     CREATE INDEX IF NOT EXISTS account_email_index ON accounts(email);
+''',
+        'create_handle_index': '''
     CREATE INDEX IF NOT EXISTS account_handle_index ON accounts(handle);
 ''',
         'drop': '''
@@ -188,7 +192,8 @@ class LiteAccountSqlModel:
 
     @staticmethod
     def from_api_model(data: LiteAccountApiModel,
-                       lite_db: SqlStorage | None = None) -> Self:
+                       lite_db: SqlStorage | None = None,
+                       hashed_password: str | None = None) -> Self:
         '''
         Create a new instance from an API model
 
@@ -199,17 +204,22 @@ class LiteAccountSqlModel:
         :param data: The API model
         :param lite_db: The SQL database to associate the LiteAccountSqlModel
         with
+        :param hashed_password: The password of the API model, already hashed,
+        so that the caller can hash it without blocking the event loop
         :returns: The new instance
         '''
 
         if data.handle is None:
             data.handle = data.email
 
+        if hashed_password is None:
+            hashed_password = hash_password(data.password.get_secret_value())
+
         lite = LiteAccountSqlModel(
             lite_db=lite_db,
             lite_id=uuid4(),
             email=data.email.lower(),
-            hashed_password=hash_password(data.password.get_secret_value()),
+            hashed_password=hashed_password,
             handle=data.handle,
             is_enabled=None,
             is_funded=False,
@@ -227,7 +237,14 @@ class LiteAccountSqlModel:
         :param lite_db: The SQL database to use
         '''
 
-        await lite_db.query(LiteAccountSqlModel.STMTS['create'], {})
+        stmts: dict[str, str] = LiteAccountSqlModel.STMTS
+        await lite_db.query_many(
+            [
+                (stmts['create'], {}),
+                (stmts['create_email_index'], {}),
+                (stmts['create_handle_index'], {}),
+            ]
+        )
 
     @staticmethod
     async def drop_table(lite_db: SqlStorage) -> None:
@@ -289,7 +306,7 @@ class LiteAccountSqlModel:
         if lite_id:
             data: dict = await lite_db.query(
                 LiteAccountSqlModel.STMTS['query'], {'lite_id': lite_id},
-                fetch_some=False
+                fetch_some=False, prepare=True
             )
             lite: LiteAccountSqlModel = LiteAccountSqlModel.from_dict(
                 data, lite_db
@@ -317,7 +334,7 @@ class LiteAccountSqlModel:
 
         data: dict = await lite_db.query(
             LiteAccountSqlModel.STMTS['query_by_email'], {'email': email},
-            fetch_some=False
+            fetch_some=False, prepare=True
         )
         if not data:
             return None
@@ -352,7 +369,8 @@ class LiteAccountSqlModel:
 
         if all_fields:
             await lite_db.query(
-                self.STMTS['upsert'], self.as_dict(with_values_only=False)
+                self.STMTS['upsert'], self.as_dict(with_values_only=False),
+                prepare=True
             )
             return
 
@@ -387,7 +405,7 @@ class LiteAccountSqlModel:
         '''
 
         await self.lite_db.query(
-            self.STMTS['delete'], {'lite_id': self.lite_id}
+            self.STMTS['delete'], {'lite_id': self.lite_id}, prepare=True
         )
 
     def generate_verification_token(self) -> str:
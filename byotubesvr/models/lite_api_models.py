@@ -148,3 +148,16 @@ class AssetReactionResponseModel(AssetReactionRequestModel):
     created_timestamp: datetime = Field(
         description="time the asset reaction was created"
     )
+
+
+class AssetReferenceModel(BaseModel):
+    member_id: UUID = Field(
+        description='The UUID of the member that owns the asset'
+    )
+    asset_id: UUID = Field(description='The UUID of the asset')
+
+
+class AssetReactionsBatchRequestModel(BaseModel):
+    assets: list[AssetReferenceModel] = Field(
+        description='The assets to get the reactions of the account for'
+    )
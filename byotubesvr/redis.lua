@@ -1,102 +1,194 @@
 -- invoke this script using
---    redis-cli --ldb --eval redis.lua lists:recently_uploaded , assets 10 <cursor>
+--    redis-cli --ldb --eval redis.lua lists:recently_uploaded , assets: 10 <cursor>
 -- keys[1]: the name of the list
 -- args[1]: the key prefix for the assets
 -- args[2]: the number of assets to return
--- args[3]: the cursor to start after
+-- args[3]: the cursor to start after, either a cursor returned as
+--          'end_cursor' by a previous call or the cursor of an asset
 -- args[4]: the filter name, ie. 'ingest_status'
 -- args[5]: the filter value, ie. 'published'
+-- args[6]: the format of the page, 'json' (default) or 'ndjson'
+--
+-- returns: an array with:
+--   1: the page as JSON-encoded QueryResponseModel or, for the 'ndjson'
+--      format, the assets as newline-delimited JSON
+--   2: the cursor to use to get the next page
+--   3: 1 if there is a next page, 0 otherwise
+--   4: the number of assets in the page with compressed fields
+--
+-- The edges in the page are assembled from the fields of the JSON docs
+-- that are part of the edges returned by the APIs, leaving out the fields
+-- that are only used by the cache, so the page can be returned by the APIs
+-- as-is. Edges of assets with compressed fields include the 'compressed'
+-- field and must be decompressed before they are returned
+--
+-- The cursor returned by this script is '<score>:<asset cursor>' so that
+-- the next page can be located with ZRANGE BYSCORE instead of scanning
+-- the list from the start. Assets in the list with the same score are
+-- sorted by their key in reverse order so the asset cursor is used as
+-- tie-breaker
 local redis_key = KEYS[1]
 local key_prefix = ARGV[1]
-local first = ARGV[2]
-local after = ARGV[3]
-local filter_name = ARGV[4]
-local filter_value = ARGV[5]
+local first = tonumber(ARGV[2]) or 20
+local after = ARGV[3] or ''
+local filter_name = ARGV[4] or ''
+local filter_value = ARGV[5] or ''
+local page_format = ARGV[6] or 'json'
 
-if first == nil then
-    first = 20
-else
-    first = tonumber(first)
-end
+local prefix_len = string.len(key_prefix)
 
-local page_size = 100
-if first > page_size then
-    page_size = first
-end
+-- The fields of the JSON docs that are included in the edges, the cursor
+-- is the key of the JSON doc without the key prefix
+local edge_fields = {'origin', 'node', 'expires_at', 'compressed'}
+local node_index = 2
 
--- the list is in ascending order with newest last
--- we want to start at the end of the list and work backwards
--- ZRANGE is inclusive so 0, 1 will return 2 elements
-local start_pos = -1 - page_size + 1
-local end_pos = -1
-if not (after == nil or after == '') then
-    local cursor = key_prefix .. after
-    local zrank = redis.call('ZRANK', redis_key, cursor)
-    if not zrank or zrank == nil or zrank == '' then
-        redis.log(redis.LOG_WARNING, 'Cursor ' .. cursor .. ' not found in list ' .. redis_key)
+local after_score = false
+local after_member = false
+if after ~= '' then
+    local separator = string.find(after, ':', 1, true)
+    if separator then
+        after_score = string.sub(after, 1, separator - 1)
+        after_member = key_prefix .. string.sub(after, separator + 1)
     else
-        local list_len = redis.call('ZCARD', redis_key)
-        end_pos = zrank - list_len - 1
-        redis.log(redis.LOG_WARNING, 'Found cursor ' .. cursor .. ' in list ' .. redis_key .. ' of length ' .. list_len .. ' at position ' .. zrank)
-        -- we do not want to start the list at the cursor but before
+        -- Cursor of an asset, we look up its position in the list
+        after_member = key_prefix .. after
+        after_score = redis.call('ZSCORE', redis_key, after_member)
+    end
+    local score = tonumber(after_score)
+    if not score or score ~= score then
+        -- Unknown asset or invalid cursor, we start at the top of the list
+        after_score = false
+        after_member = false
     end
 end
 
+-- We read one more asset than requested to find out if there is a next page
+local batch_size = math.max(first + 1, 20)
+-- Upper bound on the number of list entries evaluated so that a list with
+-- few matching assets does not get scanned in full. If we reach this limit,
+-- the returned cursor points to the last evaluated entry
+local max_scanned = math.max(batch_size * 10, 1000)
 
--- Stores all not-expired assets
-local assets = {}
-
--- total_assets: counter for total assets gathered so far
-local total_assets = 0
-
--- page_offset: starting expiration for the next ZRANGE call
-local page_offset = end_pos
+local start_score = after_score or '+inf'
+local offset = 0
 
-while total_assets < first do
-    -- asset_list: assets retrieved from Redis, but the list may have empty (expired) assets
-    -- as we want newest / best assets, we use negative indices for ZRANGE
+local docs = {}
+local found = 0
+local compressed = 0
+local scanned = 0
+local exhausted = false
+local has_next_page = false
+local end_cursor = ''
+local scan_cursor = ''
 
-    local range_start = page_offset - page_size + 1
-    local range_end = page_offset
-    redis.log(redis.LOG_WARNING, 'start: ' .. range_start .. ', end ' .. range_end)
-    local asset_list = redis.call('ZRANGE', redis_key, range_start, range_end, 'REV')
-    page_offset = page_offset + page_size
-    if asset_list == nil or not asset_list then
+while not has_next_page and scanned < max_scanned do
+    local entries = redis.call(
+        'ZRANGE', redis_key, start_score, '-inf', 'BYSCORE', 'REV',
+        'LIMIT', offset, batch_size, 'WITHSCORES'
+    )
+    local num_entries = #entries / 2
+    if num_entries == 0 then
+        exhausted = true
         break
     end
 
-    -- asset_data: a single asset retrieved from Redis, that may be empty (expired)
-    local asset_data
-
-    -- asset_data_len: counter for total assets gathered by LRANGE. If it is < first, we have reached the end of the list
-    local asset_data_len = 0
+    local keys = {}
+    local scores = {}
+    for i = 1, #entries, 2 do
+        local member = entries[i]
+        local score = entries[i + 1]
+        if not (after_score and score == after_score and member >= after_member) then
+            keys[#keys + 1] = member
+            scores[#scores + 1] = score
+        end
+    end
 
-    local i
-    local asset_key
-    for i, asset_key in ipairs(asset_list) do
-        if total_assets >= first then
-            break
+    if #keys > 0 then
+        -- JSONPath returns the values in an array, which is empty if the
+        -- field does not exist
+        local path_index = #keys + 1
+        local values = {}
+        for f, field in ipairs(edge_fields) do
+            keys[path_index] = '$.' .. field
+            values[f] = redis.call('JSON.MGET', unpack(keys))
         end
-        asset_data_len = asset_data_len + 1
-        asset_data = redis.call('JSON.GET', asset_key)
-        if not (asset_data == nil or not asset_data or asset_data == '') then
-            local decoded_data = cjson.decode(asset_data)
-            local ingest_status = decoded_data['node']['ingest_status']
-            if ingest_status == 'published' or ingest_status == 'external' then
-                if not filter_name or filter_name == nil or filter_name == '' then
-                    table.insert(assets, asset_data)
-                    total_assets = total_assets + 1
-                else
-                    if decoded_data['node'][filter_name] == filter_value then
-                        table.insert(assets, asset_data)
-                        total_assets = total_assets + 1
+        keys[path_index] = nil
+
+        for i = 1, #keys do
+            scanned = scanned + 1
+            local asset_cursor = string.sub(keys[i], prefix_len + 1)
+            local cursor = scores[i] .. ':' .. asset_cursor
+            scan_cursor = cursor
+            local value = values[node_index][i]
+            if value and value ~= '[]' then
+                local node = cjson.decode(string.sub(value, 2, -2))
+                local ingest_status = node['ingest_status']
+                if (ingest_status == 'published' or ingest_status == 'external')
+                        and (filter_name == '' or node[filter_name] == filter_value) then
+                    found = found + 1
+                    if found > first then
+                        has_next_page = true
+                        break
+                    end
+                    local edge = {'{"cursor":' .. cjson.encode(asset_cursor)}
+                    for f, field in ipairs(edge_fields) do
+                        local field_value = values[f][i]
+                        if field_value and field_value ~= '[]' then
+                            edge[#edge + 1] = ',"' .. field .. '":' ..
+                                string.sub(field_value, 2, -2)
+                            if field == 'compressed' then
+                                compressed = compressed + 1
+                            end
+                        end
                     end
+                    edge[#edge + 1] = '}'
+                    docs[found] = table.concat(edge)
+                    end_cursor = cursor
                 end
             end
         end
     end
-    if asset_data_len < first then
+
+    if num_entries < batch_size then
+        exhausted = true
         break
     end
+
+    -- Continue the next batch after the last entry of this batch, skipping
+    -- the entries with the same score that we have already evaluated
+    local last_score = entries[#entries]
+    if last_score == start_score then
+        offset = offset + num_entries
+    else
+        local same_score = 0
+        for i = #entries, 2, -2 do
+            if entries[i] ~= last_score then
+                break
+            end
+            same_score = same_score + 1
+        end
+        start_score = last_score
+        offset = same_score
+    end
+end
+
+if not has_next_page and not exhausted and scanned >= max_scanned then
+    has_next_page = true
+    end_cursor = scan_cursor
+end
+
+local page
+if page_format == 'ndjson' then
+    page = table.concat(docs, '\n')
+    if #docs > 0 then
+        page = page .. '\n'
+    end
+else
+    page = '{"total_count":' .. #docs ..
+        ',"edges":[' .. table.concat(docs, ',') ..
+        '],"page_info":{"has_next_page":' .. tostring(has_next_page) ..
+        ',"end_cursor":' .. (end_cursor ~= '' and cjson.encode(end_cursor) or 'null') ..
+        '}}'
 end
-return assets
+
+return {page, end_cursor, has_next_page and 1 or 0, compressed}
@@ -12,6 +12,7 @@ the service
 import os
 import sys
 
+from time import monotonic
 from datetime import UTC
 from datetime import datetime
 
@@ -51,6 +52,20 @@ ASSET_CLASS: str = 'public_assets'
 
 PROMETHEUS_EXPORTER_PORT: int = 5010
 
+# How often we review which lists should be stored as sorted sets
+LIST_REVIEW_INTERVAL: int = 10 * 60
+
+# Reads per hour for a list to be stored as sorted set, can be
+# overridden with the 'popular_list_threshold' setting
+POPULAR_LIST_THRESHOLD: int = AssetCache.POPULAR_LIST_THRESHOLD
+
+# How often we remove expired and stale assets from the lists, the
+# maximum number of assets per sweep and per second, can be overridden
+# with the 'sweep_interval', 'sweep_max_assets' and 'sweep_rate' settings
+SWEEP_INTERVAL: int = 60
+SWEEP_MAX_ASSETS: int = AssetCache.SWEEP_MAX_ASSETS
+SWEEP_RATE: float = AssetCache.SWEEP_RATE
+
 
 async def main() -> None:
     '''
@@ -79,8 +94,36 @@ async def main() -> None:
 
     metrics: dict[str, Counter | Gauge] = config.metrics
 
+    lists_reviewed_at: float = 0.0
+    swept_at: float = 0.0
+
     wait_time: float = 0.0
     while True:
+        if monotonic() - lists_reviewed_at > LIST_REVIEW_INTERVAL:
+            lists_reviewed_at = monotonic()
+            try:
+                await asset_cache.review_materialized_lists(
+                    POPULAR_LIST_THRESHOLD
+                )
+            except Exception as exc:
+                _LOGGER.debug(
+                    'Failed to review materialized lists',
+                    extra=log_data | {'exception': exc}
+                )
+
+        if monotonic() - swept_at > SWEEP_INTERVAL:
+            swept_at = monotonic()
+            try:
+                swept: int = await asset_cache.sweep_expired_assets(
+                    max_assets=SWEEP_MAX_ASSETS, rate=SWEEP_RATE
+                )
+                metrics['svc_refresh_assets_swept'].inc(swept)
+            except Exception as exc:
+                _LOGGER.debug(
+                    'Failed to sweep expired assets',
+                    extra=log_data | {'exception': exc}
+                )
+
         log_data['wait_time'] = wait_time
         if wait_time:
             _LOGGER.debug('Sleeping', extra=log_data)
@@ -172,6 +215,20 @@ async def setup_server() -> tuple[Service, ServiceServer]:
         global MAX_WAIT
         MAX_WAIT = 300
 
+    global POPULAR_LIST_THRESHOLD
+    POPULAR_LIST_THRESHOLD = server_config.server_config.get(
+        'popular_list_threshold', POPULAR_LIST_THRESHOLD
+    )
+
+    global SWEEP_INTERVAL, SWEEP_MAX_ASSETS, SWEEP_RATE
+    SWEEP_INTERVAL = server_config.server_config.get(
+        'sweep_interval', SWEEP_INTERVAL
+    )
+    SWEEP_MAX_ASSETS = server_config.server_config.get(
+        'sweep_max_assets', SWEEP_MAX_ASSETS
+    )
+    SWEEP_RATE = server_config.server_config.get('sweep_rate', SWEEP_RATE)
+
     network = Network(
         server_config.server_config, server_config.app_config
     )
@@ -212,7 +269,10 @@ async def setup_server() -> tuple[Service, ServiceServer]:
 
     await server.setup_asset_cache(
         server_config.server_config['asset_cache'],
-        server_config.server_config['asset_cache_readwrite']
+        server_config.server_config['asset_cache_readwrite'],
+        compress_assets=server_config.server_config.get(
+            'compress_assets', False
+        )
     )
 
     return service, server
@@ -256,7 +316,11 @@ def setup_exporter_metrics() -> None:
         'svc_refresh_assets_not_found': Counter(
             'svc_refresh_assets_not_found',
             'Number of times an asset was not in the cache'
-        )
+        ),
+        'svc_refresh_assets_swept': Counter(
+            'svc_refresh_assets_swept',
+            'Number of expired or stale assets removed from the lists'
+        ),
     }
 
 
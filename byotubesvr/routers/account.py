@@ -31,7 +31,9 @@ from byotubesvr.datamodel.email import EmailVerificationMessage
 from byotubesvr.auth.lite_jwt import LiteJWT
 from byotubesvr.auth.lite_app_jwt import LiteAppJWT
 
-from byotubesvr.auth.password import verify_password
+from byotubesvr.auth.password import PasswordHashingBusy
+from byotubesvr.auth.password import hash_password_async
+from byotubesvr.auth.password import verify_password_async
 from byotubesvr.auth.request_auth import LiteRequestAuth
 
 from ..models.lite_account import LiteAccountSqlModel
@@ -82,7 +84,18 @@ async def create_account(request: Request, account: LiteAccountApiModel
             detail=f'Account for {account.email} already exists'
         )
 
-    account = LiteAccountSqlModel.from_api_model(account, lite_db=lite_db)
+    try:
+        hashed_password: str = await hash_password_async(
+            account.password.get_secret_value()
+        )
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=429, detail='Too many requests, try again later'
+        )
+
+    account = LiteAccountSqlModel.from_api_model(
+        account, lite_db=lite_db, hashed_password=hashed_password
+    )
     account.lite_id = uuid4()
 
     try:
@@ -190,9 +203,15 @@ async def auth_token(request: Request, auth_request: LiteAuthApiModel,
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    verified: bool = verify_password(
-        auth_request.password.get_secret_value(), account.hashed_password
-    )
+    try:
+        verified: bool = await verify_password_async(
+            auth_request.password.get_secret_value(), account.hashed_password
+        )
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=429, detail='Too many requests, try again later'
+        )
+
     if not verified:
         raise HTTPException(
             status_code=403, detail="Incorrect username or password",
@@ -29,6 +29,7 @@ from byotubesvr.auth.request_auth import LiteRequestAuth
 from byotubesvr.database.asset_reaction_store import AssetReactionStore
 from ..models.lite_api_models import AssetReactionRequestModel
 from ..models.lite_api_models import AssetReactionResponseModel
+from ..models.lite_api_models import AssetReactionsBatchRequestModel
 
 _LOGGER: Logger = getLogger(__name__)
 
@@ -153,6 +154,52 @@ async def get_asset_reactions(
     return response
 
 
+@router.post('/assetreactions/batch', response_class=ORJSONResponse)
+async def get_asset_reactions_batch(
+    request: Request, auth: AuthDep, batch: AssetReactionsBatchRequestModel
+) -> QueryResponseModel:
+    '''
+    Get the asset reactions for the LiteID for a list of assets, so a page
+    with a list of assets can show the reactions of the user for each asset
+    '''
+
+    _LOGGER.debug(
+        f'Request from {request.client.host} with LiteID: {auth.lite_id}'
+    )
+
+    reaction_store: AssetReactionStore = config.asset_reaction_store
+
+    try:
+        asset_reactions: list[AssetReactionResponseModel] = \
+            await reaction_store.get_reactions_for_assets(
+                auth.lite_id,
+                [(asset.member_id, asset.asset_id) for asset in batch.assets]
+            )
+    except ValueError:
+        raise HTTPException(400, 'Invalid query parameters')
+    except Exception as exc:
+        _LOGGER.exception(f'Failed to get asset reactions: {exc}')
+        raise HTTPException(
+            status_code=500, detail='Failed to get asset reactions'
+        )
+
+    edges: list[Edge[AssetReactionResponseModel]] = [
+        Edge(
+            cursor=AssetReactionStore.get_cursor_by_reaction(
+                auth.lite_id, asset_reaction
+            ),
+            node=asset_reaction, origin=auth.lite_id
+        ) for asset_reaction in asset_reactions
+    ]
+
+    response: QueryResponseModel = QueryResponseModel(
+        total_count=len(edges), edges=edges,
+        page_info=PageInfoResponse(has_next_page=False, end_cursor='')
+    )
+
+    return response
+
+
 @router.delete('/assetreaction', response_class=ORJSONResponse,
                status_code=204)
 async def delete_assetreaction(request: Request, auth: AuthDep,
@@ -6,6 +6,7 @@
 :license    : GPLv3
 '''
 
+from time import time
 from uuid import UUID
 from logging import Logger
 from logging import getLogger
@@ -13,10 +14,11 @@ from logging import getLogger
 from fastapi import APIRouter
 from fastapi import Request
 from fastapi import HTTPException
+from fastapi.responses import Response
 from fastapi.responses import ORJSONResponse
+from fastapi.responses import StreamingResponse
 
 from byoda.models.data_api_models import Channel
-from byoda.models.data_api_models import PageInfoResponse
 from byoda.models.data_api_models import EdgeResponse
 from byoda.models.data_api_models import QueryResponseModel
 from byoda.models.data_api_models import ChannelShortcutResponse
@@ -35,6 +37,54 @@ DEFAULT_PAGING_SIZE: int = 25
 
 MAX_PAGE_SIZE: int = 100
 
+# Number of seconds that clients and edge caches may use a response without
+# revalidating it. Pages of lists change whenever assets get ingested
+LIST_MAX_AGE: int = 5
+ASSET_MAX_AGE: int = 300
+CHANNEL_MAX_AGE: int = 300
+
+
+def _is_not_modified(request: Request, etag: str | None) -> bool:
+    '''
+    Checks whether the ETag matches one of the ETags in the If-None-Match
+    header of the request, using the weak comparison of RFC 9110
+
+    :param request: the incoming request
+    :param etag: the ETag of the current version of the resource
+    :returns: whether we can respond with '304 Not Modified'
+    '''
+
+    if not etag:
+        return False
+
+    if_none_match: str | None = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque_tag: str = etag.removeprefix('W/')
+    return any(
+        value.strip().removeprefix('W/') == opaque_tag
+        for value in if_none_match.split(',')
+    )
+
+
+def _get_cache_headers(etag: str | None, max_age: int) -> dict[str, str]:
+    '''
+    Gets the headers that allow clients and edge caches to cache the
+    response and to revalidate it with a conditional request
+    '''
+
+    headers: dict[str, str] = {
+        'Cache-Control': f'public, max-age={max_age}'
+    }
+    if etag:
+        headers['ETag'] = etag
+
+    return headers
+
 
 @router.get('/data', status_code=200, response_class=ORJSONResponse)
 async def get_data(request: Request,
@@ -75,33 +125,79 @@ async def get_data(request: Request,
 
     if member_id:
         list_name = ChannelCache.get_cursor(member_id, list_name)
-
-    edges: list[EdgeResponse] = await asset_cache.get_list_assets(
-        list_name, after=after, first=first + 1,
+    else:
+        # The reads of lists decide which lists are stored as sorted sets
+        asset_cache_readwrite: AssetCache = config.asset_cache_readwrite
+        await asset_cache_readwrite.record_list_read(list_name)
+
+    # Assets expiring from the cache do not change the version of the list
+    # so the ETag also changes when pages are dropped from memory
+    version: int = await asset_cache.get_list_version(list_name)
+    epoch: int = int(time() // AssetCache.HOT_LISTS_MAX_AGE)
+    etag: str = f'W/"{version}-{epoch}"'
+    headers: dict[str, str] = _get_cache_headers(etag, LIST_MAX_AGE)
+
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    page: str = await asset_cache.get_list_page(
+        list_name, after=after, first=first,
         filter_name=filter_name, filter_value=ingest_status
     )
 
-    has_next_page: bool = False
-    if len(edges) > first:
-        edges = edges[:-1]
-        has_next_page = True
+    return Response(
+        content=page, media_type='application/json', headers=headers
+    )
+
+
+@router.get('/data/export', status_code=200)
+async def export_data(request: Request,
+                      list_name: str = AssetCache.DEFAULT_ASSET_LIST,
+                      member_id: UUID | None = None,
+                      ingest_status: str | None = None) -> StreamingResponse:
+    '''
+    Streams all assets in the requested list as newline-delimited JSON,
+    newest first, with one EdgeResponse per line. Consumers that need a
+    copy of a list should use this API instead of paging through the list
+    with the /data API. Use the 'all_assets' list to export all assets in
+    the cache.
+
+    This API does not require authentication, it needs to be rate
+    limited by the reverse proxy (TODO: security)
+    '''
+
+    log_data: dict[str, any] = {
+        'remote_addr': request.client.host,
+        'api': 'api/v1/service/data/export',
+        'method': 'GET',
+        'asset_list': list_name,
+        'member_id': member_id,
+        'ingest_status': ingest_status
+    }
+    _LOGGER.debug('Data export API request received', extra=log_data)
+
+    asset_cache: AssetCache = config.asset_cache
 
-    end_cursor = None
-    if edges and isinstance(edges, list) and len(edges) > 0:
-        end_cursor: str | None = edges[-1].cursor
+    filter_name: str | None = None
+    if ingest_status:
+        filter_name = 'ingest_status'
 
-    page = PageInfoResponse(has_next_page=has_next_page, end_cursor=end_cursor)
+    if member_id:
+        list_name = ChannelCache.get_cursor(member_id, list_name)
 
-    return QueryResponseModel(
-        total_count=len(edges),
-        edges=edges,
-        page_info=page
+    # The next chunk is only read from Redis after the previous chunk has
+    # been sent to the client
+    return StreamingResponse(
+        asset_cache.export_list(
+            list_name, filter_name=filter_name, filter_value=ingest_status
+        ),
+        media_type='application/x-ndjson'
     )
 
 
 @router.get('/asset', status_code=200, response_class=ORJSONResponse)
-async def get_asset(request: Request, cursor: str | None = None,
-                    asset_id: UUID | None = None,
+async def get_asset(request: Request, response: Response,
+                    cursor: str | None = None, asset_id: UUID | None = None,
                     member_id: UUID | None = None) -> EdgeResponse:
     '''
     This API is called by pods
@@ -136,16 +232,27 @@ async def get_asset(request: Request, cursor: str | None = None,
     if not cursor:
         cursor = asset_cache.get_cursor(member_id, asset_id)
 
+    etag: str | None = await asset_cache.get_asset_etag(cursor)
+    if etag:
+        etag = f'"{etag}"'
+
+    headers: dict[str, str] = _get_cache_headers(etag, ASSET_MAX_AGE)
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
     try:
         edge: EdgeResponse = await asset_cache.get_asset_by_key(cursor)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Asset not found")
 
+    response.headers.update(headers)
+
     return edge
 
 
 @router.get('/channel', status_code=200, response_class=ORJSONResponse)
-async def get_channel(request: Request, creator: str, member_id: UUID
+async def get_channel(request: Request, response: Response,
+                      creator: str, member_id: UUID
                       ) -> EdgeResponse[Channel]:
     '''
     This API does not require authentication, it needs to be rate
@@ -164,6 +271,16 @@ async def get_channel(request: Request, creator: str, member_id: UUID
     _LOGGER.debug('Channel API received', extra=log_data)
 
     try:
+        etag: str | None = await channel_cache.get_channel_etag(
+            member_id, creator
+        )
+        if etag:
+            etag = f'"{etag}"'
+
+        headers: dict[str, str] = _get_cache_headers(etag, CHANNEL_MAX_AGE)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+
         edge: EdgeResponse[Channel] | None = await channel_cache.get_channel(
             member_id, creator
         )
@@ -178,6 +295,8 @@ async def get_channel(request: Request, creator: str, member_id: UUID
             status_code=404, detail=f'Channel {creator} not found'
         )
 
+    response.headers.update(headers)
+
     return edge
 
 
@@ -227,6 +346,82 @@ async def get_channel_shortcut(request: Request, shortcut: str
     return ChannelShortcutResponse(member_id=member_id, creator=creator)
 
 
+@router.get('/channel/by_shortcut', status_code=200,
+            response_class=ORJSONResponse)
+async def get_channel_by_shortcut(request: Request, response: Response,
+                                  shortcut: str) -> EdgeResponse[Channel]:
+    '''
+    Returns the channel for the shortcut. The channel is normally served
+    as it was pre-rendered when the channel was ingested, so this API
+    needs a single read from the cache
+
+    This API does not require authentication, it needs to be rate
+    limited by the reverse proxy (TODO: security)
+    '''
+
+    log_data: dict[str, str] = {
+        'remote_addr': request.client.host,
+        'api': '/api/v1/service/channel/by_shortcut',
+        'method': 'GET',
+        'shortcut': shortcut,
+    }
+
+    channel_cache: ChannelCache = config.channel_cache
+
+    _LOGGER.debug('Channel by shortcut API received', extra=log_data)
+
+    try:
+        page: tuple[str, str] | None = await channel_cache.get_channel_page(
+            shortcut
+        )
+        if page:
+            content: str
+            etag: str
+            content, etag = page
+            etag = f'"{etag}"'
+            headers: dict[str, str] = _get_cache_headers(
+                etag, CHANNEL_MAX_AGE
+            )
+            if _is_not_modified(request, etag):
+                return Response(status_code=304, headers=headers)
+
+            return Response(
+                content=content, media_type='application/json',
+                headers=headers
+            )
+
+        # Channels ingested before the pre-rendered channels were
+        # introduced only have the shortcut
+        member_id: UUID
+        creator: str
+        member_id, creator = await channel_cache.get_shortcut(shortcut)
+        edge: EdgeResponse[Channel] | None = await channel_cache.get_channel(
+            member_id, creator
+        )
+    except FileNotFoundError:
+        _LOGGER.debug('Shortcut does not exist', extra=log_data)
+        raise HTTPException(status_code=404, detail='Unknown channel shortcut')
+    except ValueError as exc:
+        _LOGGER.debug(
+            'Invalid shortcut', extra=log_data | {'exception': str(exc)}
+        )
+        raise HTTPException(status_code=400, detail='Invalid shortcut')
+    except Exception as exc:
+        _LOGGER.exception(f'Failed to get channel: {exc}', extra=log_data)
+        raise HTTPException(
+            status_code=502, detail='Failed to get channel'
+        )
+
+    if not edge:
+        raise HTTPException(
+            status_code=404, detail=f'Channel {creator} not found'
+        )
+
+    response.headers.update(_get_cache_headers(None, CHANNEL_MAX_AGE))
+
+    return edge
+
+
 @router.get('/channel/shortcut_by_value', status_code=200)
 def get_channel_shortcut_value(request: Request, member_id: UUID, creator: str
                                ) -> ChannelShortcutValueResponseModel:
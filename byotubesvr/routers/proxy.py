@@ -6,9 +6,15 @@ proxy APIs to enable BT Lite accounts to interact with pods
 :license    : GPLv3
 '''
 
+from uuid import UUID
 from typing import Annotated
 from logging import Logger
 from logging import getLogger
+from itertools import count
+
+import orjson
+
+from prometheus_client import Counter
 
 from fastapi import Request
 from fastapi import APIRouter
@@ -24,6 +30,9 @@ from byoda.datatypes import DataRequestType
 
 from byoda.secrets.secret import Secret
 
+from byoda.datacache.memory_cache import MemoryCache
+from byoda.datacache.single_flight import SingleFlight
+
 from byoda.util.api_client.data_api_client import DataApiClient
 from byoda.util.api_client.data_api_client import HttpResponse
 
@@ -37,6 +46,26 @@ router: APIRouter = APIRouter(prefix='/api/v1/lite', dependencies=[])
 
 AuthDep = Annotated[LiteRequestAuth, Depends(LiteRequestAuth)]
 
+# Queries are proxied with the credentials of the service so the response
+# does not depend on the BT Lite account. We cache the responses for the
+# classes that anyone can read, ie. creator data that many users request
+PROXY_CACHE_CLASSES: set[str] = {'public_assets', 'channels'}
+PROXY_CACHE_TTL: float = 10.0
+PROXY_CACHE_SIZE: int = 10000
+
+_PROXY_RESPONSES: MemoryCache = MemoryCache(
+    PROXY_CACHE_SIZE, ttl=PROXY_CACHE_TTL
+)
+_PROXY_FLIGHTS: SingleFlight = SingleFlight()
+
+# Appends to a class of a pod change the generation of the class of the pod,
+# which is part of the key for cached responses. The generations are taken
+# from a counter, also when a class of a pod is first looked up, so that a
+# class of a pod whose generation was evicted from memory gets a generation
+# that no cached response has
+_PROXY_GENERATIONS: MemoryCache = MemoryCache(PROXY_CACHE_SIZE)
+_GENERATION_COUNTER: count = count(1)
+
 
 @router.post('/proxy/query', status_code=200)
 async def query_proxy(request: Request, query: ProxyQueryModel, auth: AuthDep
@@ -51,6 +80,43 @@ async def query_proxy(request: Request, query: ProxyQueryModel, auth: AuthDep
 
     _LOGGER.debug('Received query', extra=log_data)
 
+    if query.data_class not in PROXY_CACHE_CLASSES or query.query_id:
+        return await _query_pod(query)
+
+    metrics: dict[str, Counter] = config.metrics
+    if 'proxy_cache_hits' not in metrics:
+        setup_metrics()
+
+    cache_key: tuple = _get_cache_key(query)
+    data: dict | None = _PROXY_RESPONSES.get(cache_key)
+    if data is not None:
+        metrics['proxy_cache_hits'].inc()
+        return data
+
+    metrics['proxy_cache_misses'].inc()
+
+    shared: bool
+    data, shared = await _PROXY_FLIGHTS.run(cache_key, _query_pod, query)
+    if shared:
+        metrics['proxy_cache_coalesced'].inc()
+    elif cache_key[0] == _get_generation(query.remote_member_id,
+                                         query.data_class):
+        # We don't cache the response if data was appended while the
+        # query was in progress
+        _PROXY_RESPONSES.set(cache_key, data)
+
+    return data
+
+
+async def _query_pod(query: ProxyQueryModel) -> dict:
+    '''
+    Sends the query to the pod
+
+    :param query: the query
+    :returns: the response of the pod
+    :raises: HTTPException if the pod did not return HTTP 200
+    '''
+
     secret: Secret = config.service_secret
 
     resp: HttpResponse = await DataApiClient.call(
@@ -64,6 +130,48 @@ async def query_proxy(request: Request, query: ProxyQueryModel, auth: AuthDep
     return data
 
 
+def _get_generation(member_id: UUID | None, data_class: str) -> int:
+    '''
+    Gets the generation of the cached responses for a class of a pod. If
+    the class of the pod has no generation, for example because it was
+    evicted, then it gets a new generation so that responses cached
+    before the eviction are not used
+
+    :param member_id: the member ID of the pod
+    :param data_class: the class of data
+    :returns: the generation
+    '''
+
+    key: tuple[UUID | None, str] = (member_id, data_class)
+    generation: int | None = _PROXY_GENERATIONS.get(key)
+    if generation is None:
+        generation = next(_GENERATION_COUNTER)
+        _PROXY_GENERATIONS.set(key, generation)
+
+    return generation
+
+
+def _get_cache_key(query: ProxyQueryModel) -> tuple:
+    '''
+    Gets the key for caching the response to a query
+
+    :param query: the query
+    :returns: the generation of the class of the pod, followed by the
+    parameters of the query
+    '''
+
+    return (
+        _get_generation(query.remote_member_id, query.data_class),
+        query.remote_member_id, query.data_class,
+        orjson.dumps(
+            query.model_dump(
+                mode='json', exclude={'remote_member_id', 'data_class'}
+            ),
+            option=orjson.OPT_SORT_KEYS
+        )
+    )
+
+
 @router.post('/proxy/append', status_code=201)
 async def append_proxy(request: Request, append: ProxyAppendModel,
                        auth: AuthDep) -> int:
@@ -89,5 +197,39 @@ async def append_proxy(request: Request, append: ProxyAppendModel,
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail=resp.text)
 
+    # Cached responses for the class of the pod are no longer used
+    if append.data_class in PROXY_CACHE_CLASSES:
+        _PROXY_GENERATIONS.set(
+            (append.remote_member_id, append.data_class),
+            next(_GENERATION_COUNTER)
+        )
+
     return resp.text
 
+
+def setup_metrics() -> None:
+    '''
+    Setup metrics for caching proxied queries
+    '''
+
+    metrics: dict[str, Counter] = config.metrics
+
+    metric: str = 'proxy_cache_hits'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Proxied queries answered from process memory'
+        )
+
+    metric = 'proxy_cache_misses'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Cacheable proxied queries not available in memory'
+        )
+
+    metric = 'proxy_cache_coalesced'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Proxied queries that shared the response of a '
+            'concurrent identical query'
+        )
+
@@ -6,29 +6,98 @@ API search APIs for both addressbook and byo.tube
 :license    : GPLv3
 '''
 
+import re
+
+from math import ceil
+from typing import Literal
 from logging import Logger
 from logging import getLogger
 
+from anyio import move_on_after
+from anyio import CapacityLimiter
+
+from prometheus_client import Counter
+
 from fastapi import APIRouter
 from fastapi import Request
+from fastapi import Response
+from fastapi import HTTPException
 from fastapi.responses import ORJSONResponse
 
 from byoda.datacache.asset_cache import AssetCache
+from byoda.datacache.memory_cache import MemoryCache
+from byoda.datacache.single_flight import SingleFlight
 
 from byoda.models.data_api_models import EdgeResponse as Edge
 
+from byoda.util.token_bucket import TokenBucket
+
 from byoda import config
 
 _LOGGER: Logger = getLogger(__name__)
 
 router = APIRouter(prefix='/api/v1/service', dependencies=[])
 
+# HTTP response header with the continuation token for the next page
+END_CURSOR_HEADER: str = 'X-End-Cursor'
+
+# Limits on the complexity of search queries
+MAX_SEARCH_TEXT_LENGTH: int = 256
+MAX_SEARCH_TERMS: int = 8
+MAX_WILDCARD_TERMS: int = 1
+MIN_WILDCARD_PREFIX: int = 3
+MAX_SEARCH_OFFSET: int = 1000
+MAX_SEARCH_RESULTS: int = 100
+
+# Field modifiers, ie. '@title:', and the operators of the query syntax
+RX_FIELD_MODIFIER: re.Pattern[str] = re.compile(r'@[\w|]+:')
+RX_QUERY_OPERATORS: re.Pattern[str] = re.compile(r'[\s()|~\-{}\[\]]+')
+
+# Each client gets a token bucket. A search costs one token plus extra
+# tokens for wildcards and deep offsets
+SEARCH_RATE: float = 2.0
+SEARCH_BURST: float = 20.0
+MAX_TRACKED_CLIENTS: int = 10000
+
+# Searches running concurrently in this process. Searches that can not
+# start within SEARCH_QUEUE_TIMEOUT seconds are rejected
+MAX_CONCURRENT_SEARCHES: int = 8
+SEARCH_QUEUE_TIMEOUT: float = 2.0
+
+# Recent search results are kept in process memory
+SEARCH_CACHE_SIZE: int = 1000
+SEARCH_CACHE_TTL: float = 30.0
+
+_SEARCH_LIMITER: CapacityLimiter | None = None
+_CLIENT_BUCKETS: MemoryCache = MemoryCache(
+    MAX_TRACKED_CLIENTS, ttl=SEARCH_BURST / SEARCH_RATE
+)
+_SEARCH_RESULTS: MemoryCache = MemoryCache(
+    SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL
+)
+_SEARCH_FLIGHTS: SingleFlight = SingleFlight()
+
 
 @router.get('/search/asset', response_class=ORJSONResponse)
-async def get_asset(request: Request, text: str, offset: int = 0,
-                    num: int = 10) -> list[Edge]:
+async def get_asset(request: Request, response: Response, text: str,
+                    offset: int = 0, num: int = 10,
+                    sort: Literal['relevance', 'recent'] = 'relevance',
+                    after: str | None = None) -> list[Edge]:
     '''
-    Submit an asset for adding to the search index
+    Search for assets.
+
+    With 'relevance' sorting, paging uses 'offset', which is limited to the
+    first 1000 results. With 'recent' sorting, the newest assets are
+    returned first and the continuation token for the next page is returned
+    in the 'X-End-Cursor' header. Pass that token as the 'after' parameter
+    to get the next page. The header is not included if there are no more
+    results. The 'after' parameter can not be used with 'relevance'
+    sorting.
+
+    Searches that are too complex get HTTP 400. Clients exceeding their
+    rate of searches get HTTP 429 and, when too many searches are in
+    progress, searches get HTTP 503.
+
     This API does not require authentication, it needs to be rate
     limited by the reverse proxy (TODO: security)
     '''
@@ -38,8 +107,207 @@ async def get_asset(request: Request, text: str, offset: int = 0,
         f'parameter {text}'
     )
 
-    asset_cache: AssetCache = config.asset_cache
+    metrics: dict[str, Counter] = config.metrics
+    if 'search_api_searches' not in metrics:
+        setup_metrics()
+
+    metrics['search_api_searches'].inc()
+
+    try:
+        cost: int = check_search_query(text, offset, num)
+    except ValueError as exc:
+        metrics['search_api_rejected_complexity'].inc()
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    assets: list[Edge] = await asset_cache.search(text, offset, num)
+    if sort == 'relevance' and after is not None:
+        raise HTTPException(
+            status_code=400,
+            detail='The after parameter requires sorting by recent'
+        )
+
+    bucket: TokenBucket = get_client_bucket(request.client.host)
+    if not bucket.consume(cost):
+        metrics['search_api_rejected_rate'].inc()
+        raise HTTPException(
+            status_code=429, detail='Too many searches',
+            headers={'Retry-After': str(ceil(bucket.retry_after(cost)))}
+        )
+
+    search_key: tuple = (' '.join(text.split()), offset, num, sort, after)
+    result: tuple[list[Edge], str | None] | None = \
+        _SEARCH_RESULTS.get(search_key)
+    if result is None:
+        try:
+            result, _ = await _SEARCH_FLIGHTS.run(
+                search_key, _search, text, offset, num, sort, after
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail='Invalid value for the after parameter'
+            )
+
+        _SEARCH_RESULTS.set(search_key, result)
+    else:
+        metrics['search_api_cache_hits'].inc()
+
+    assets: list[Edge]
+    token: str | None
+    assets, token = result
+
+    if token:
+        response.headers[END_CURSOR_HEADER] = token
 
     return assets
+
+
+def check_search_query(text: str, offset: int, num: int) -> int:
+    '''
+    Checks whether a search query is not too expensive to run
+
+    :param text: the search text
+    :param offset: the index of the first search result to return
+    :param num: the maximum number of search results to return
+    :returns: the number of tokens that the search costs
+    :raises: ValueError if the query is too expensive
+    '''
+
+    if len(text) > MAX_SEARCH_TEXT_LENGTH:
+        raise ValueError(
+            f'Search text is longer than {MAX_SEARCH_TEXT_LENGTH} characters'
+        )
+
+    terms: list[str] = text.split()
+    if not terms:
+        raise ValueError('No search text provided')
+
+    if len(terms) > MAX_SEARCH_TERMS:
+        raise ValueError(f'Search has more than {MAX_SEARCH_TERMS} terms')
+
+    # '*' is used for prefix matching and '%' for fuzzy matching. Field
+    # modifiers like '@title:' and the operators are not part of the
+    # words that the wildcards apply to
+    words: list[str] = RX_QUERY_OPERATORS.split(
+        RX_FIELD_MODIFIER.sub(' ', text)
+    )
+    wildcards: list[str] = [
+        word for word in words if '*' in word or '%' in word
+    ]
+    if len(wildcards) > MAX_WILDCARD_TERMS:
+        raise ValueError(
+            f'Search has more than {MAX_WILDCARD_TERMS} wildcard terms'
+        )
+
+    word: str
+    for word in wildcards:
+        prefix: str = word.split('*')[0].strip('%')
+        if len(prefix) < MIN_WILDCARD_PREFIX:
+            raise ValueError(
+                f'Wildcards must follow at least {MIN_WILDCARD_PREFIX} '
+                'characters'
+            )
+
+    if offset < 0 or offset > MAX_SEARCH_OFFSET:
+        raise ValueError(
+            f'Offset must be between 0 and {MAX_SEARCH_OFFSET}'
+        )
+
+    if num < 1 or num > MAX_SEARCH_RESULTS:
+        raise ValueError(f'Num must be between 1 and {MAX_SEARCH_RESULTS}')
+
+    return 1 + 2 * len(wildcards) + offset // 250
+
+
+def get_client_bucket(client: str) -> TokenBucket:
+    '''
+    Gets the token bucket of a client. The entry of the client is refreshed
+    on each search, so it only expires after the client has been idle for
+    long enough for its bucket to have refilled
+
+    :param client: the IP address of the client
+    :returns: the token bucket of the client
+    '''
+
+    bucket: TokenBucket | None = _CLIENT_BUCKETS.get(client)
+    if bucket is None:
+        bucket = TokenBucket(SEARCH_RATE, SEARCH_BURST)
+
+    _CLIENT_BUCKETS.set(client, bucket)
+
+    return bucket
+
+
+async def _search(text: str, offset: int, num: int, sort: str,
+                  after: str | None) -> tuple[list[Edge], str | None]:
+    '''
+    Runs the search in the asset cache, after waiting for one of the
+    MAX_CONCURRENT_SEARCHES slots to become available
+
+    :returns: the assets found and the continuation token for the next page
+    :raises: HTTPException if no slot became available in time, ValueError
+    if the continuation token is invalid
+    '''
+
+    global _SEARCH_LIMITER
+
+    metrics: dict[str, Counter] = config.metrics
+
+    # The limiter can only be created once the event loop is running
+    if _SEARCH_LIMITER is None:
+        _SEARCH_LIMITER = CapacityLimiter(MAX_CONCURRENT_SEARCHES)
+
+    with move_on_after(SEARCH_QUEUE_TIMEOUT) as scope:
+        await _SEARCH_LIMITER.acquire()
+
+    if scope.cancelled_caught:
+        metrics['search_api_rejected_overload'].inc()
+        _LOGGER.warning('Rejecting search, too many searches in progress')
+        raise HTTPException(
+            status_code=503, detail='Too many searches in progress',
+            headers={'Retry-After': str(ceil(SEARCH_QUEUE_TIMEOUT))}
+        )
+
+    asset_cache: AssetCache = config.asset_cache
+    try:
+        if sort == 'relevance':
+            return await asset_cache.search(text, offset, num), None
+
+        return await asset_cache.search_page(text, num, after)
+    finally:
+        _SEARCH_LIMITER.release()
+
+
+def setup_metrics() -> None:
+    '''
+    Setup metrics for the search API
+    '''
+
+    metrics: dict[str, Counter] = config.metrics
+
+    metric: str = 'search_api_searches'
+    if metric not in metrics:
+        metrics[metric] = Counter(metric, 'Search API requests')
+
+    metric = 'search_api_rejected_complexity'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Searches rejected because the query was too expensive'
+        )
+
+    metric = 'search_api_rejected_rate'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Searches rejected because the client exceeded its rate'
+        )
+
+    metric = 'search_api_rejected_overload'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Searches rejected because too many were in progress'
+        )
+
+    metric = 'search_api_cache_hits'
+    if metric not in metrics:
+        metrics[metric] = Counter(
+            metric, 'Searches answered from process memory'
+        )
@@ -14,6 +14,7 @@ import sys
 
 from uuid import UUID
 from random import shuffle
+from functools import partial
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
@@ -21,7 +22,10 @@ from datetime import timezone
 import orjson
 
 from anyio import run
+from anyio import Lock
+from anyio import CapacityLimiter
 from anyio import sleep
+from anyio import CancelScope
 from anyio import create_task_group
 from anyio.abc import TaskGroup
 
@@ -33,6 +37,7 @@ from prometheus_client import Counter
 from prometheus_client import Gauge
 
 from byoda.datatypes import DataRequestType
+from byoda.datatypes import MemberChangeType
 
 from byoda.datamodel.network import Network
 from byoda.datamodel.service import Service
@@ -40,6 +45,8 @@ from byoda.datamodel.schema import Schema
 from byoda.datamodel.config import ServerConfig
 
 from byoda.datastore.memberdb import MemberDb
+from byoda.datastore.memberdb import BACKFILL_COMPLETED
+from byoda.datastore.worker_membership import WorkerMembership
 
 from byoda.storage.filestorage import FileStorage
 
@@ -82,6 +89,16 @@ PROMETHEUS_EXPORTER_PORT: int = 5000
 # Only assets newer than this will be stored in the cache
 MAX_ASSET_AGE: int = 2 * 365 * 24 * 60 * 60
 
+# All processes of the updates worker use this name to find each other
+# and divide the members between them
+WORKER_NAME: str = 'updates_worker'
+
+# Maximum number of members for which we get all data concurrently
+INITIAL_SYNC_CONCURRENCY: int = 16
+
+# Maximum time for an attempt to get all data from a member
+INITIAL_SYNC_TIMEOUT: int = 10 * 60
+
 
 async def main() -> None:
     service: Service
@@ -96,20 +113,52 @@ async def main() -> None:
     member_db: MemberDb = server.member_db
     wait_time: float = 0.0
 
+    membership: WorkerMembership = WorkerMembership(
+        member_db.kvcache, WORKER_NAME,
+        worker_id=os.environ.get('WORKER_ID')
+    )
+    log_data['worker_id'] = membership.worker_id
+    await membership.heartbeat()
+
+    reconcile_lock: Lock = Lock()
+    sync_limiter: CapacityLimiter = CapacityLimiter(INITIAL_SYNC_CONCURRENCY)
+    members_seen: dict[UUID, UpdateListenerService] = {}
+
     async with create_task_group() as task_group:
         log_data['members_seen'] = 0
-        # Set up the listeners for the members that are already in the cache
+        # Set up the listeners for the members that are already in the cache.
+        # We get the position in the stream of member changes first so that
+        # we don't miss changes made during the reconciliation
         _LOGGER.debug('Start up reconciliation for members', extra=log_data)
-        members_seen: dict[UUID, UpdateListenerService] = {}
+        last_change_id: str = await member_db.get_last_member_change_id()
         await reconcile_member_listeners(
             member_db, members_seen, service, ASSET_CLASS, server.asset_cache,
-            server.channel_cache_readwrite, task_group
+            server.channel_cache_readwrite, task_group, membership,
+            reconcile_lock, sync_limiter
+        )
+        task_group.start_soon(
+            rebalance_member_listeners, member_db, members_seen, service,
+            ASSET_CLASS, server.asset_cache, server.channel_cache_readwrite,
+            task_group, membership, reconcile_lock, sync_limiter
         )
         while True:
             log_data['members_seen'] = len(members_seen)
             _LOGGER.debug('Members seen', extra=log_data)
             wait_time = MAX_WAIT
 
+            try:
+                last_change_id = await process_member_changes(
+                    member_db, last_change_id, members_seen, service,
+                    ASSET_CLASS, server.asset_cache,
+                    server.channel_cache_readwrite, task_group, membership,
+                    reconcile_lock, sync_limiter
+                )
+            except Exception as exc:
+                _LOGGER.info(
+                    'Failed to process member changes',
+                    extra=log_data | {'exception': str(exc)}
+                )
+
             member_id: UUID | None = None
             try:
                 member_id = await member_db.get_next(timeout=MAX_WAIT)
@@ -130,12 +179,6 @@ async def main() -> None:
 
                 _LOGGER.debug('Processing member_id', extra=log_data)
 
-                await reconcile_member_listeners(
-                    member_db, members_seen, service, ASSET_CLASS,
-                    server.asset_cache, server.channel_cache_readwrite,
-                    task_group
-                )
-
                 # TODO: develop logic to figure out what data to collect
                 # for each service without hardcoding
                 if service.service_id == ADDRESSBOOK_SERVICE_ID:
@@ -165,12 +208,189 @@ async def main() -> None:
             await sleep(wait_time)
 
 
+async def rebalance_member_listeners(
+        member_db: MemberDb, members_seen: dict[UUID, UpdateListenerService],
+        service: Service, asset_class_name: str, asset_cache: AssetCache,
+        channel_cache: ChannelCache, task_group: TaskGroup,
+        membership: WorkerMembership, reconcile_lock: Lock,
+        sync_limiter: CapacityLimiter) -> None:
+    '''
+    Sends heartbeats for this worker process, renews the leases for the
+    members we listen to and stops listening to members that are now
+    assigned to another worker process. When worker processes join or
+    leave, or when the previous owner of a member has released its lease,
+    the listeners for the members newly assigned to this process are set
+    up.
+
+    This function updates the 'members_seen' parameter
+
+    :param membership: the membership of this process of the worker
+    :param reconcile_lock: lock to prevent concurrent reconciliations
+    :param sync_limiter: limits the number of concurrent backfills
+    :return: (none)
+    '''
+
+    log_data: dict[str, any] = {
+        'service_id': service.service_id,
+        'worker_id': membership.worker_id,
+    }
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+    try:
+        while True:
+            await sleep(WorkerMembership.HEARTBEAT_INTERVAL)
+
+            try:
+                # Leases are renewed without waiting for a reconciliation
+                # that is in progress, as the initial sync of members may
+                # take longer than the lease TTL
+                changed: bool = await membership.heartbeat()
+                lost: set[UUID] = await membership.renew_leases()
+                metrics['svc_updates_workers'].set(len(membership.workers))
+
+                member_id: UUID
+                for member_id in list(members_seen):
+                    if (membership.owns(member_id)
+                            and member_id not in lost):
+                        continue
+
+                    log_data['remote_member_id'] = member_id
+                    _LOGGER.info(
+                        'Member is now assigned to another worker '
+                        'process, stopping the listener', extra=log_data
+                    )
+                    listener: UpdateListenerService = \
+                        members_seen.pop(member_id)
+                    listener.stop()
+                    await membership.release(member_id)
+                    metrics['svc_updates_released_members'].inc()
+
+                metrics['svc_updates_owned_members'].set(len(members_seen))
+
+                # When the worker processes change, we need the full list
+                # of members to find the members newly assigned to us.
+                # Otherwise we only retry the members for which another
+                # process held the lease
+                membership.pending = set(
+                    m_id for m_id in membership.pending
+                    if membership.owns(m_id) and m_id not in members_seen
+                )
+                member_ids: list[UUID] | None = None
+                if not changed:
+                    member_ids = list(membership.pending)
+
+                # The reconciliation runs in its own task so that it does not
+                # delay the next heartbeat
+                if ((changed or member_ids)
+                        and not reconcile_lock.locked()):
+                    task_group.start_soon(
+                        reconcile_member_listeners, member_db, members_seen,
+                        service, asset_class_name, asset_cache,
+                        channel_cache, task_group, membership, reconcile_lock,
+                        sync_limiter, member_ids
+                    )
+            except Exception as exc:
+                _LOGGER.info(
+                    'Failed to rebalance the members',
+                    extra=log_data | {'exception': str(exc)}
+                )
+    finally:
+        with CancelScope(shield=True):
+            await membership.leave()
+
+
+async def process_member_changes(
+        member_db: MemberDb, last_change_id: str,
+        members_seen: dict[UUID, UpdateListenerService], service: Service,
+        asset_class_name: str, asset_cache: AssetCache,
+        channel_cache: ChannelCache, task_group: TaskGroup,
+        membership: WorkerMembership, reconcile_lock: Lock,
+        sync_limiter: CapacityLimiter) -> str:
+    '''
+    Processes the changes of members since the last change that we
+    processed. Listeners are set up for members that joined and stopped
+    for members that left. If we have fallen so far behind that changes
+    have been trimmed from the stream of member changes, then we fall
+    back to reconciling the full list of members
+
+    This function updates the 'members_seen' parameter
+
+    :param last_change_id: the ID of the last change we processed
+    :returns: the ID of the last change processed
+    '''
+
+    log_data: dict[str, any] = {
+        'service_id': service.service_id,
+        'worker_id': membership.worker_id,
+        'last_change_id': last_change_id,
+    }
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+
+    changes: list[tuple[str, UUID, MemberChangeType]]
+    try:
+        changes = await member_db.get_member_changes(last_change_id)
+    except ValueError as exc:
+        _LOGGER.info(
+            'Member changes are no longer available, reconciling all members',
+            extra=log_data | {'exception': str(exc)}
+        )
+        last_change_id = await member_db.get_last_member_change_id()
+        await reconcile_member_listeners(
+            member_db, members_seen, service, asset_class_name, asset_cache,
+            channel_cache, task_group, membership, reconcile_lock,
+            sync_limiter
+        )
+        return last_change_id
+
+    joined: list[UUID] = []
+    change_id: str
+    member_id: UUID
+    change: MemberChangeType
+    for change_id, member_id, change in changes:
+        last_change_id = change_id
+        if change != MemberChangeType.LEAVE:
+            if change == MemberChangeType.JOIN:
+                metrics['svc_updates_total_members'].inc()
+            if member_id not in joined:
+                joined.append(member_id)
+            continue
+
+        metrics['svc_updates_total_members'].dec()
+        if member_id in joined:
+            joined.remove(member_id)
+
+        listener: UpdateListenerService | None = members_seen.pop(
+            member_id, None
+        )
+        if listener:
+            log_data['remote_member_id'] = member_id
+            _LOGGER.debug(
+                'Member left, stopping the listener', extra=log_data
+            )
+            listener.stop()
+            await membership.release(member_id)
+
+    if joined:
+        await reconcile_member_listeners(
+            member_db, members_seen, service, asset_class_name, asset_cache,
+            channel_cache, task_group, membership, reconcile_lock,
+            sync_limiter, joined
+        )
+
+    return last_change_id
+
+
 async def reconcile_member_listeners(
         member_db: MemberDb, members_seen: dict[UUID, UpdateListenerService],
         service: Service, asset_class_name: str, asset_cache: AssetCache,
-        channel_cache: ChannelCache, task_group: TaskGroup) -> None:
+        channel_cache: ChannelCache, task_group: TaskGroup,
+        membership: WorkerMembership, reconcile_lock: Lock,
+        sync_limiter: CapacityLimiter, member_ids: list[UUID] | None = None
+        ) -> None:
     '''
-    Sets up asset sync and listener for members not seen before.
+    Sets up asset sync and listener for members not seen before that are
+    assigned to this process of the worker.
 
     This function updates the 'members_seen' parameter
 
@@ -180,10 +400,43 @@ async def reconcile_member_listeners(
     :param asset_class: the data class to listen for updates to
     :param asset_cache: the cache to use for the asset
     :param task_group: the anyio task group to use for the listener
+    :param membership: the membership of this process of the worker
+    :param reconcile_lock: lock to prevent concurrent reconciliations
+    :param sync_limiter: limits the number of concurrent backfills
+    :param member_ids: the members to reconcile, if not specified then the
+    full list of members is read from the MemberDb
     :return: (none)
     '''
 
-    member_ids: list[UUID] = await member_db.get_members()
+    async with reconcile_lock:
+        try:
+            await _reconcile_member_listeners(
+                member_db, members_seen, service, asset_class_name,
+                asset_cache, channel_cache, task_group, membership,
+                sync_limiter, member_ids
+            )
+        except Exception as exc:
+            _LOGGER.info(
+                'Failed to reconcile the member listeners',
+                extra={
+                    'worker_id': membership.worker_id,
+                    'exception': str(exc)
+                }
+            )
+
+
+async def _reconcile_member_listeners(
+        member_db: MemberDb, members_seen: dict[UUID, UpdateListenerService],
+        service: Service, asset_class_name: str, asset_cache: AssetCache,
+        channel_cache: ChannelCache, task_group: TaskGroup,
+        membership: WorkerMembership, sync_limiter: CapacityLimiter,
+        member_ids: list[UUID] | None) -> None:
+
+    metrics: dict[str, Counter | Gauge] = config.metrics
+
+    if member_ids is None:
+        member_ids = await member_db.get_members()
+        metrics['svc_updates_total_members'].set(len(member_ids))
 
     log_data: dict[str, any] = {
         'asset_class': asset_class_name,
@@ -194,12 +447,10 @@ async def reconcile_member_listeners(
 
     _LOGGER.debug('Reconciling member listeners', extra=log_data)
 
-    metrics: dict[str, Counter | Gauge] = config.metrics
-    metrics['svc_updates_total_members'].set(len(member_ids))
-
     unseen_members: list[UUID] = [
         m_id for m_id in member_ids
         if m_id not in members_seen and not is_test_uuid(m_id)
+        and membership.owns(m_id)
     ]
     shuffle(unseen_members)
     log_data['members_not_yet_seen'] = len(unseen_members)
@@ -210,6 +461,15 @@ async def reconcile_member_listeners(
     member_id: UUID
     for member_id in unseen_members:
         log_data['remote_member_id'] = member_id
+        if not await membership.acquire(member_id):
+            # The previous owner of the member has not yet stopped its
+            # listener, we'll pick up the member in a later reconciliation
+            _LOGGER.debug(
+                'Member is still leased by another worker process',
+                extra=log_data
+            )
+            continue
+
         _LOGGER.debug('Adding new member to list of members', extra=log_data)
 
         listener: UpdateListenerService = await UpdateListenerService.setup(
@@ -218,14 +478,44 @@ async def reconcile_member_listeners(
             max_asset_age=MAX_ASSET_AGE
         )
 
+        # We start listening for updates right away and get the existing
+        # data in the background, resuming an earlier backfill if it did
+        # not complete. Members of which we already got all data are
+        # not backfilled again after a restart or a rebalance
         _LOGGER.debug(
             'Initiating sync and listener for member', extra=log_data
         )
-        await listener.get_all_data()
         await listener.setup_listen_assets(task_group)
 
+        cursor: str | None = await member_db.get_backfill_cursor(member_id)
+        if cursor == BACKFILL_COMPLETED:
+            _LOGGER.debug(
+                'Backfill of member already completed', extra=log_data
+            )
+        else:
+            listener.setup_backfill(
+                task_group, sync_limiter, INITIAL_SYNC_TIMEOUT, after=cursor,
+                progress=partial(
+                    store_backfill_progress, member_db, member_id
+                )
+            )
+
         members_seen[member_id] = listener
-        metrics['svc_updates_total_members'].inc()
+
+
+async def store_backfill_progress(member_db: MemberDb, member_id: UUID,
+                                  cursor: str | None, completed: bool
+                                  ) -> None:
+    '''
+    Persists the progress of the backfill of a member so that the backfill
+    resumes where it left off after a restart of the worker, or is skipped
+    if it completed
+    '''
+
+    if completed:
+        cursor = BACKFILL_COMPLETED
+
+    await member_db.set_backfill_cursor(member_id, cursor)
 
 
 def next_member_wait(last_seen: datetime) -> int:
@@ -270,6 +560,15 @@ async def setup_server() -> tuple[Service, ServiceServer]:
         global MAX_WAIT
         MAX_WAIT = 300
 
+    global INITIAL_SYNC_CONCURRENCY
+    INITIAL_SYNC_CONCURRENCY = server_config.server_config.get(
+        'initial_sync_concurrency', INITIAL_SYNC_CONCURRENCY
+    )
+    global INITIAL_SYNC_TIMEOUT
+    INITIAL_SYNC_TIMEOUT = server_config.server_config.get(
+        'initial_sync_timeout', INITIAL_SYNC_TIMEOUT
+    )
+
     network = Network(
         server_config.server_config, server_config.app_config
     )
@@ -311,7 +610,10 @@ async def setup_server() -> tuple[Service, ServiceServer]:
 
     await server.setup_asset_cache(
         server_config.server_config['asset_cache'],
-        server_config.server_config['asset_cache_readwrite']
+        server_config.server_config['asset_cache_readwrite'],
+        compress_assets=server_config.server_config.get(
+            'compress_assets', False
+        )
     )
 
     return service, server
@@ -407,7 +709,18 @@ def setup_exporter_metrics() -> None:
         ),
         'svc_updates_unseen_members': Gauge(
             'svc_updates_unseen_members', 'Number of unseen members'
-        )
+        ),
+        'svc_updates_workers': Gauge(
+            'svc_updates_workers', 'Number of live updates worker processes'
+        ),
+        'svc_updates_owned_members': Gauge(
+            'svc_updates_owned_members',
+            'Number of members assigned to this worker process'
+        ),
+        'svc_updates_released_members': Counter(
+            'svc_updates_released_members',
+            'Number of members handed over to another worker process'
+        ),
     }
 
 
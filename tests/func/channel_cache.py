@@ -96,6 +96,96 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(channel.is_family_safe)
         self.assertEqual(channel.keywords, ['test', 'channel'])
 
+    async def test_claim_channels(self) -> None:
+        channel_cache: ChannelCache = CHANNEL_CACHE
+
+        member_id: UUID = get_test_uuid()
+        creators: list[str] = [f'test_creator_{i}' for i in range(0, 5)]
+        for creator in creators:
+            await channel_cache.add_newest_channel(
+                member_id, Channel(creator=creator)
+            )
+
+        claims: list[tuple[Edge[Channel], float, str]] = \
+            await channel_cache.claim_oldest_channels(3, 300)
+        self.assertEqual(len(claims), 3)
+        self.assertEqual(
+            [edge.node.creator for edge, _, _ in claims], creators[:3]
+        )
+        for edge, _, _ in claims:
+            self.assertEqual(edge.origin, member_id)
+            self.assertGreater(edge.expires_at, 0)
+
+        # Claimed channels are not claimed again until the lease expires
+        more_claims: list[tuple[Edge[Channel], float, str]] = \
+            await channel_cache.claim_oldest_channels(10, 300)
+        self.assertEqual(
+            [edge.node.creator for edge, _, _ in more_claims], creators[3:]
+        )
+        self.assertEqual(
+            await channel_cache.claim_oldest_channels(10, 300), []
+        )
+
+        # A released channel can be claimed again right away
+        edge, timestamp, token = claims[0]
+        self.assertTrue(
+            await channel_cache.release_channel(
+                member_id, edge.node.creator, timestamp, token
+            )
+        )
+        edge, timestamp, token = claims[1]
+        self.assertTrue(
+            await channel_cache.ack_channel(
+                member_id, edge.node.creator, token
+            )
+        )
+
+        # A claim can be released or acknowledged only once
+        self.assertFalse(
+            await channel_cache.ack_channel(
+                member_id, edge.node.creator, token
+            )
+        )
+
+        claims = await channel_cache.claim_oldest_channels(10, 300)
+        self.assertEqual(
+            [edge.node.creator for edge, _, _ in claims],
+            [creators[0], creators[1]]
+        )
+
+    async def test_expired_lease(self) -> None:
+        channel_cache: ChannelCache = CHANNEL_CACHE
+
+        member_id: UUID = get_test_uuid()
+        await channel_cache.add_newest_channel(
+            member_id, Channel(creator='test_creator_lease')
+        )
+
+        # With a lease of 0 seconds, the claim expires right away and
+        # another worker can claim the channel
+        claims: list[tuple[Edge[Channel], float, str]] = \
+            await channel_cache.claim_oldest_channels(1, 0)
+        self.assertEqual(len(claims), 1)
+        edge, timestamp, token = claims[0]
+
+        new_claims: list[tuple[Edge[Channel], float, str]] = \
+            await channel_cache.claim_oldest_channels(1, 300)
+        self.assertEqual(len(new_claims), 1)
+        new_token: str = new_claims[0][2]
+        self.assertNotEqual(token, new_token)
+
+        # The worker with the expired lease can no longer move the channel
+        self.assertFalse(
+            await channel_cache.release_channel(
+                member_id, edge.node.creator, timestamp, token
+            )
+        )
+        self.assertTrue(
+            await channel_cache.ack_channel(
+                member_id, edge.node.creator, new_token
+            )
+        )
+
 
 if __name__ == '__main__':
     _LOGGER: Logger = ByodaLogger.getLogger(sys.argv[0], debug=True, json_out=False)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for hashing the passwords of BYO.Tube Lite accounts in a pool
+of worker processes.
+
+These tests are not in tests/unit as the worker processes inherit the
+sys.path of the test runner, and tests/unit/queue.py would then shadow the
+'queue' module of the standard library.
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import unittest
+
+from logging import Logger
+
+from anyio import create_task_group
+
+from byoda.util.logger import Logger as ByodaLogger
+
+from byotubesvr.auth import password as password_module
+from byotubesvr.auth.password import verify_password
+from byotubesvr.auth.password import PasswordHashingBusy
+from byotubesvr.auth.password import hash_password_async
+from byotubesvr.auth.password import verify_password_async
+
+
+class TestPasswordHashing(unittest.IsolatedAsyncioTestCase):
+    async def test_password_async(self) -> None:
+        password = 'test-password'
+        hashed_password: str = await hash_password_async(password)
+
+        self.assertTrue(verify_password(password, hashed_password))
+        self.assertTrue(
+            await verify_password_async(password, hashed_password)
+        )
+        self.assertFalse(
+            await verify_password_async('wrong-password', hashed_password)
+        )
+
+        # Requests beyond the admission limit get rejected
+        pending: int = password_module.MAX_PENDING_HASHES
+        rejected: list[int] = []
+
+        async def verify() -> None:
+            try:
+                await verify_password_async(password, hashed_password)
+            except PasswordHashingBusy:
+                rejected.append(1)
+
+        async with create_task_group() as task_group:
+            for _ in range(0, pending + 2):
+                task_group.start_soon(verify)
+
+        self.assertEqual(len(rejected), 2)
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
@@ -18,6 +18,7 @@ from uuid import UUID
 from logging import Logger
 
 from byoda.datatypes import MemberStatus
+from byoda.datatypes import MemberChangeType
 
 from byoda.datamodel.network import Network
 
@@ -144,6 +145,39 @@ class TestKVCache(unittest.IsolatedAsyncioTestCase):
         members = await member_db.get_members()
         self.assertEqual(len(members), 10)
 
+    async def test_memberdb_changes(self) -> None:
+        member_db = config.server.member_db
+
+        last_change_id: str = await member_db.get_last_member_change_id()
+
+        for status in (MemberStatus.SIGNED, MemberStatus.REGISTERED):
+            await member_db.add_meta(
+                TEST_MEMBER_UUID, '127.0.0.1', 1, 'blah', status
+            )
+        await member_db.delete_meta(TEST_MEMBER_UUID)
+
+        changes = await member_db.get_member_changes(last_change_id)
+        self.assertEqual(
+            [(member_id, change) for _, member_id, change in changes],
+            [
+                (TEST_MEMBER_UUID, MemberChangeType.JOIN),
+                (TEST_MEMBER_UUID, MemberChangeType.UPDATE),
+                (TEST_MEMBER_UUID, MemberChangeType.LEAVE),
+            ]
+        )
+
+        last_change_id = changes[-1][0]
+        self.assertEqual(
+            await member_db.get_last_member_change_id(), last_change_id
+        )
+        self.assertEqual(
+            await member_db.get_member_changes(last_change_id), []
+        )
+
+        # Changes that have been trimmed from the stream can not be read
+        with self.assertRaises(ValueError):
+            await member_db.get_member_changes('1-0')
+
 
 if __name__ == '__main__':
     _LOGGER: Logger = ByodaLogger.getLogger(sys.argv[0], debug=True, json_out=False)
@@ -116,6 +116,81 @@ class TestRedisLuaScript(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(results.total, 1)
         self.assertEqual(len(results.docs), 1)
 
+        data: list[dict[str, any]] = await cache.search('The', num=100)
+
+        # Page through the same results, newest first
+        found: list[dict[str, any]] = []
+        after: str | None = None
+        while True:
+            page: list[dict[str, any]]
+            page, after = await cache.search_page('The', num=3, after=after)
+            self.assertLessEqual(len(page), 3)
+            found.extend(page)
+            if not after:
+                break
+
+        self.assertEqual(len(found), len(data))
+        timestamps: list[datetime] = [
+            datetime.fromisoformat(item['node']['published_timestamp'])
+            for item in found
+        ]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+        with self.assertRaises(ValueError):
+            await cache.search_page('The', after='notatoken')
+
+        with self.assertRaises(ValueError):
+            await cache.search_page('The', after='nan:some_key')
+
+        await cache.close()
+
+    async def test_query_pages_with_equal_timestamps(self) -> None:
+        cache: SearchableCache = await SearchableCache.setup(REDIS_URL)
+
+        member_id: UUID = uuid4()
+        assets: list[dict] = await populate_cache(cache, TESTLIST, member_id)
+
+        # Assets published at the same time must not get skipped or
+        # repeated when paging through the results of a query
+        timestamp: float = datetime.now(tz=UTC).timestamp()
+        for asset in assets[5:30]:
+            await cache.client.json().set(
+                cache.annotate_key(
+                    SearchableCache.ASSET_KEY_PREFIX, asset['cursor']
+                ),
+                '$.published_timestamp', timestamp
+            )
+
+        search_text: str = '@ingest_status:{published|external}'
+        found: list[str] = []
+        after: str | None = None
+        while True:
+            page: str
+            page, _ = await cache.get_query_page_values(
+                search_text, SearchableCache.ASSET_KEY_PREFIX, first=4,
+                after=after
+            )
+            data: dict[str, any] = orjson.loads(page)
+            self.assertLessEqual(len(data['edges']), 4)
+            found.extend(edge['cursor'] for edge in data['edges'])
+            after = data['page_info']['end_cursor']
+            if not data['page_info']['has_next_page']:
+                break
+
+        self.assertEqual(len(found), len(set(found)))
+        self.assertEqual(
+            sorted(found), sorted(asset['cursor'] for asset in assets)
+        )
+
+        # The number of documents read for a page is bounded, also when
+        # more documents have the same timestamp
+        cache.SEARCH_MAX_SCANNED = 8
+        docs: list[tuple[str, float, dict]] = await cache._search_newest(
+            search_text, 4
+        )
+        self.assertEqual(len(docs), 4)
+        self.assertTrue(all(doc[1] == timestamp for doc in docs))
+
         await cache.close()
 
     async def test_avoid_multiple_assets_of_same_origin(self) -> None:
@@ -139,11 +214,12 @@ class TestRedisLuaScript(unittest.IsolatedAsyncioTestCase):
         # end result is 39 items, with item 0 and item 29 from the same creator
         self.assertEqual(len(data), 39)
 
+        # The list is returned with the newest asset first
         self.assertEqual(
-            data[38]['node']['creator'], data[28]['node']['creator']
+            data[0]['node']['creator'], data[10]['node']['creator']
         )
 
-        creator_list: str = f'{data[38]['origin']}_{data[38]['node']['creator']}'
+        creator_list: str = f'{data[0]['origin']}_{data[0]['node']['creator']}'
 
         data = await cache.get_list_values(
             creator_list, SearchableCache.ASSET_KEY_PREFIX,
@@ -154,6 +230,66 @@ class TestRedisLuaScript(unittest.IsolatedAsyncioTestCase):
 
         await cache.close()
 
+    async def test_json_set_many(self) -> None:
+        cache: SearchableCache = await SearchableCache.setup(REDIS_URL)
+
+        member_id: UUID = uuid4()
+
+        # Adding the assets in one batch must have the same result as
+        # adding them one by one
+        await populate_cache(
+            cache, TESTLIST, member_id, [10, 30], batch=True
+        )
+
+        data: list = await cache.get_list_values(
+            TESTLIST, SearchableCache.ASSET_KEY_PREFIX, first=40
+        )
+        self.assertEqual(len(data), 39)
+        self.assertEqual(
+            data[0]['node']['creator'], data[10]['node']['creator']
+        )
+
+        await cache.close()
+
+    async def test_sweep_expired_assets(self) -> None:
+        cache: SearchableCache = await SearchableCache.setup(REDIS_URL)
+
+        member_id: UUID = uuid4()
+        assets: list[dict] = await populate_cache(
+            cache, TESTLIST, member_id, batch=True
+        )
+        keys: list[str] = [
+            cache.annotate_key(SearchableCache.ASSET_KEY_PREFIX, a['cursor'])
+            for a in assets
+        ]
+        list_key: str = AssetList.get_key(TESTLIST)
+        self.assertEqual(await cache.client.zcard(list_key), 40)
+
+        # Nothing has expired yet
+        self.assertEqual(await cache.sweep_expired_assets(), 0)
+
+        # An asset that expired and one that was deleted by its member
+        await cache.client.delete(keys[0])
+        await cache.client.zadd(SearchableCache.SWEEP_KEY, {keys[0]: 1})
+        await cache.mark_stale(keys[1])
+
+        self.assertEqual(await cache.sweep_expired_assets(batch_size=1), 2)
+        self.assertEqual(await cache.client.zcard(list_key), 38)
+        self.assertFalse(await cache.client.exists(keys[1]))
+        self.assertFalse(
+            await cache.client.exists(cache.get_asset_lists_key(keys[1]))
+        )
+
+        # An asset that was refreshed after its sweep was scheduled
+        await cache.client.zadd(SearchableCache.SWEEP_KEY, {keys[2]: 1})
+        self.assertEqual(await cache.sweep_expired_assets(), 0)
+        self.assertGreater(
+            await cache.client.zscore(SearchableCache.SWEEP_KEY, keys[2]),
+            datetime.now(tz=UTC).timestamp()
+        )
+
+        await cache.close()
+
     async def test_pagination(self) -> None:
         cache: SearchableCache = await SearchableCache.setup(REDIS_URL)
 
@@ -187,6 +323,27 @@ class TestRedisLuaScript(unittest.IsolatedAsyncioTestCase):
         )
         self.assertEqual(len(data), 15)
 
+        # Walk the list using the cursors returned with each page
+        cursors: list[str] = []
+        after: str | None = None
+        has_next_page: bool = True
+        while has_next_page:
+            page_data: str
+            page_data, _ = await cache.get_list_page_values(
+                TESTLIST, SearchableCache.ASSET_KEY_PREFIX,
+                after=after, first=7
+            )
+            page: dict[str, any] = orjson.loads(page_data)
+            cursors.extend(edge['cursor'] for edge in page['edges'])
+
+            # The edges do not include the fields only used by the cache
+            for edge in page['edges']:
+                self.assertEqual(set(edge), {'cursor', 'origin', 'node'})
+            has_next_page = page['page_info']['has_next_page']
+            after = page['page_info']['end_cursor']
+
+        self.assertEqual(cursors, [asset['cursor'] for asset in assets])
+
         await cache.close()
 
 
@@ -214,16 +371,18 @@ def call_lua_script(test, first: int | None = None, after: str | None = None
     )
 
     test.assertTrue(result.returncode == 0)
-    data: list[dict[str, any]] = []
-    for line in result.stdout.splitlines():
-        data.append(orjson.loads(line))
 
-    return data
+    # The script returns the page and the cursor for the next page
+    lines: list[bytes] = result.stdout.splitlines()
+    page: dict[str, any] = orjson.loads(lines[0])
+    test.assertEqual(page['total_count'], len(page['edges']))
+
+    return page['edges']
 
 
 async def populate_cache(cache: SearchableCache, list_name: str,
-                         member_id: UUID, dupe_origins: list[int] = []
-                         ) -> list[dict]:
+                         member_id: UUID, dupe_origins: list[int] = [],
+                         batch: bool = False) -> list[dict]:
     titles: list[str] = [
         'Fight Club', 'The Big Short', 'The Big Lebowski', 'Donnie Darko',
         'The Bucket List', 'Downfall', 'Good Morning Vietnam',
@@ -245,6 +404,7 @@ async def populate_cache(cache: SearchableCache, list_name: str,
         'p31', 'p32', 'p33', 'p34', 'p35', 'p36', 'p37', 'p38', 'p39', 'p40',
     ]
     assets: list[dict[str, str | dict[str, any]]] = []
+    batch_assets: list[tuple[set[AssetList], dict, int]] = []
     for counter in range(0, 40):
         created: datetime = datetime.now(tz=UTC) - timedelta(days=counter)
         asset_id: UUID = uuid4()
@@ -259,9 +419,11 @@ async def populate_cache(cache: SearchableCache, list_name: str,
                 'title': titles[counter],
                 'ingest_status': ['published', 'external'][counter % 2],
                 'creator': creators[counter % len(creators)],
-                'created_timestamp': created.timestamp(),
-                'published_timestamp': created.timestamp(),
-            }
+                'created_timestamp': created.isoformat(),
+                'published_timestamp': created.isoformat(),
+            },
+            'created_timestamp': created.timestamp(),
+            'published_timestamp': created.timestamp(),
         }
         if counter in dupe_origins:
             # We create assets with duplicate origins so we can test
@@ -279,11 +441,21 @@ async def populate_cache(cache: SearchableCache, list_name: str,
                 )
             ]
         )
-        await cache.json_set(
-            asset_lists, SearchableCache.ASSET_KEY_PREFIX, asset
-        )
+        if batch:
+            batch_assets.append(
+                (asset_lists, asset, SearchableCache.DEFAULT_EXPIRATION)
+            )
+        else:
+            await cache.json_set(
+                asset_lists, SearchableCache.ASSET_KEY_PREFIX, asset
+            )
         assets.append(asset)
 
+    if batch:
+        await cache.json_set_many(
+            batch_assets, SearchableCache.ASSET_KEY_PREFIX
+        )
+
     # assets.reverse()
     return assets
 
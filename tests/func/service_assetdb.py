@@ -312,9 +312,11 @@ async def populate_cache(cache: SearchableCache, asset_list: str,
                 'title': titles[counter],
                 'ingest_status': ['published', 'external'][counter % 2],
                 'creator': creator,
-                'created_timestamp': created.timestamp(),
-                'published_timestamp': created.timestamp()
-            }
+                'created_timestamp': created.isoformat(),
+                'published_timestamp': created.isoformat()
+            },
+            'created_timestamp': created.timestamp(),
+            'published_timestamp': created.timestamp()
         }
         asset_lists: set[AssetList] = set(
             [AssetList(asset_list, redis=cache.client)]
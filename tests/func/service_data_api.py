@@ -23,16 +23,20 @@ from httpx import AsyncClient
 
 from byoda.models.data_api_models import EdgeResponse as Edge
 from byoda.models.data_api_models import Channel
+from byoda.models.data_api_models import QueryResponseModel
 
 from byoda.datatypes import MonetizationType
 
 from byoda.datacache.asset_cache import AssetCache
 from byoda.datacache.channel_cache import ChannelCache
+from byoda.datacache.asset_compressor import AssetCompressor
 
 from byoda.secrets.secret import Secret
 
 from byoda.storage.filestorage import FileStorage
 
+from byoda.servers.service_server import ServiceServer
+
 from byoda.util.fastapi import setup_api
 
 from byoda.util.api_client.api_client import ApiClient
@@ -96,6 +100,9 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
             app_config['svcserver']['asset_cache']
         )
         config.asset_cache = asset_cache
+        config.asset_cache_readwrite = await AssetCache.setup(
+            app_config['svcserver']['asset_cache_readwrite']
+        )
 
         service_secret_data: dict[str, str] = \
             app_config['svcserver']['proxy_service_secret']
@@ -132,6 +139,7 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
         await config.channel_cache.close()
         await config.channel_cache_readwrite.close()
         await config.asset_cache.close()
+        await config.asset_cache_readwrite.close()
 
     async def test_service_data_api(self) -> None:
         member_id: UUID = get_test_uuid()
@@ -196,6 +204,32 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
             self.assertEqual(asset_id, str(all_assets[0]['asset_id']))
             self.assertNotEqual(data['edges'][1]['node']['asset_id'], asset_id)
 
+            # The hash used for the ETag is not returned with the assets
+            for edge in data['edges']:
+                self.assertNotIn(AssetCache.ETAG_FIELD, edge)
+
+            # The page is assembled from the JSON stored in the cache and
+            # must be the same as when it is serialized from the models
+            QueryResponseModel(**data)
+            self.assertEqual(data['total_count'], len(data['edges']))
+            for edge in data['edges']:
+                self.assertEqual(
+                    Edge[Asset](**edge).model_dump(mode='json'), edge
+                )
+            self.assertIsInstance(
+                data['edges'][0]['node']['published_timestamp'], str
+            )
+
+            # Conditional request for the list
+            etag: str = resp.headers['etag']
+            self.assertIn('max-age', resp.headers['cache-control'])
+            resp = await client.get(
+                api_url, headers={'If-None-Match': etag}
+            )
+            self.assertEqual(resp.status_code, 304)
+            self.assertEqual(resp.headers['etag'], etag)
+            self.assertEqual(resp.content, b'')
+
             resp: HttpResponse = await client.get(
                 api_url, params={'ingest_status': 'published'}
             )
@@ -262,6 +296,21 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
                 data['node']['asset_id'], all_assets[0]['asset_id']
             )
 
+            # Conditional requests for the asset
+            etag = resp.headers['etag']
+            resp = await client.get(
+                asset_url, params=query_param,
+                headers={'If-None-Match': f'"other", W/{etag}'}
+            )
+            self.assertEqual(resp.status_code, 304)
+
+            resp = await client.get(
+                asset_url, params=query_param,
+                headers={'If-None-Match': '"other"'}
+            )
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.headers['etag'], etag)
+
             # So we've created a list of 110 items by adding items one by end
             # to the front. In the list in the cache, the first item of the
             # list is the last item added. The API returns the first item in
@@ -298,6 +347,29 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
 
                 after: str = data['page_info']['end_cursor']
 
+            # Export the whole list as newline-delimited JSON
+            resp: HttpResponse = await client.get(f'{api_url}/export')
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(
+                resp.headers['content-type'].startswith('application/x-ndjson')
+            )
+            lines: list[str] = resp.text.splitlines()
+            self.assertEqual(len(lines), all_asset_count)
+            edges: list[dict[str, any]] = [
+                orjson.loads(line) for line in lines
+            ]
+            self.assertEqual(
+                [edge['node']['asset_id'] for edge in edges],
+                [str(asset['asset_id']) for asset in reversed(all_assets)]
+            )
+
+            resp: HttpResponse = await client.get(
+                f'{api_url}/export', params={'ingest_status': 'published'}
+            )
+            self.assertEqual(resp.status_code, 200)
+            lines = resp.text.splitlines()
+            self.assertEqual(len(lines), all_asset_count // 2)
+
             # Now we test with filter
             api_url: str = 'http://localhost:8000/api/v1/service/data'
 
@@ -338,6 +410,14 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
             data = resp.json()
             self.assertTrue(len(data), 11)
 
+            resp: HttpResponse = await client.get(
+                api_url, params={
+                    'text': creators[0], 'sort': 'relevance',
+                    'after': '1700000000.0:some_key'
+                }
+            )
+            self.assertEqual(resp.status_code, 400)
+
     async def test_channel_cache(self) -> None:
         channel_cache: ChannelCache = config.channel_cache
 
@@ -425,6 +505,28 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
                 node['thirdparty_platform_views'],
                 first_channel.thirdparty_platform_views
             )
+            channel_data: dict[str, any] = data
+
+            # The pre-rendered channel is the same as the channel
+            # returned by the '/channel' API
+            resp = await client.get(
+                f'{api_url}/by_shortcut', params={'shortcut': shortcut}
+            )
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.json(), channel_data)
+            etag: str = resp.headers['ETag']
+            self.assertIsNotNone(etag)
+
+            resp = await client.get(
+                f'{api_url}/by_shortcut', params={'shortcut': shortcut},
+                headers={'If-None-Match': etag}
+            )
+            self.assertEqual(resp.status_code, 304)
+
+            resp = await client.get(
+                f'{api_url}/by_shortcut', params={'shortcut': 'unknown'}
+            )
+            self.assertEqual(resp.status_code, 404)
 
         cursor = None
         member_id = None
@@ -457,6 +559,163 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
             self.assertTrue('node' in data)
             self.assertGreaterEqual(data['node']['creator'], channel.creator)
 
+    async def test_promote_list(self) -> None:
+        asset_cache: AssetCache = config.asset_cache_readwrite
+
+        list_name: str = 'promotiontest'
+        list_key: str = AssetList.get_key(list_name)
+        await asset_cache.client.delete(list_key)
+        await asset_cache.client.hdel(
+            AssetCache.PROMOTING_LISTS_KEY, list_name
+        )
+        await asset_cache.client.srem(
+            AssetCache.MATERIALIZED_LISTS_KEY, list_name
+        )
+        asset_cache.materialized_lists = None
+
+        member_id: UUID = get_test_uuid()
+        assets: list[Asset] = []
+        asset_keys: list[str] = []
+        for _ in range(0, 2):
+            asset: Asset = get_asset(get_test_uuid())
+            asset.categories = [list_name]
+            asset.keywords = []
+            asset.annotations = []
+            assets.append(asset)
+            asset_keys.append(
+                AssetCache.ASSET_KEY_PREFIX
+                + asset_cache.get_cursor(member_id, asset.asset_id)
+            )
+
+        # Unpopular lists are answered by the search index
+        await asset_cache.add_newest_asset(member_id, assets[0].model_dump())
+        self.assertFalse(await asset_cache.client.exists(list_key))
+
+        await asset_cache.client.zadd(
+            AssetCache.get_list_reads_key(windows_ago=1),
+            {list_name: AssetCache.POPULAR_LIST_THRESHOLD}
+        )
+        await asset_cache.review_materialized_lists()
+        self.assertTrue(
+            await asset_cache.client.hexists(
+                AssetCache.PROMOTING_LISTS_KEY, list_name
+            )
+        )
+
+        # Once the list is being promoted, assets get added to its sorted
+        # set but readers still use the search index
+        asset_cache.materialized_lists = None
+        await asset_cache.add_newest_asset(member_id, assets[1].model_dump())
+        self.assertIsNotNone(
+            await asset_cache.client.zscore(list_key, asset_keys[1])
+        )
+        self.assertTrue(
+            await asset_cache.get_query_list_definition(list_name)
+        )
+
+        # Readers switch to the sorted set once the sorted set has been
+        # backfilled after all processes learned about the promotion
+        promoting_since: float = (
+            datetime.now(tz=UTC).timestamp()
+            - AssetCache.MATERIALIZED_LISTS_REFRESH - 1
+        )
+        await asset_cache.client.hset(
+            AssetCache.PROMOTING_LISTS_KEY, list_name, str(promoting_since)
+        )
+        promoted: int
+        promoted, _ = await asset_cache.review_materialized_lists()
+        self.assertGreaterEqual(promoted, 1)
+        self.assertEqual(await asset_cache.client.zcard(list_key), 2)
+        self.assertFalse(
+            await asset_cache.client.hexists(
+                AssetCache.PROMOTING_LISTS_KEY, list_name
+            )
+        )
+
+        asset_cache.materialized_lists = None
+        self.assertEqual(
+            await asset_cache.get_query_list_definition(list_name), {}
+        )
+
+    async def test_query_list_versions(self) -> None:
+        asset_cache: AssetCache = config.asset_cache_readwrite
+        asset_cache.materialized_lists = None
+
+        list_name: str = 'versiontest'
+        asset_list: AssetList = AssetList(list_name, redis=asset_cache.client)
+
+        # Adding an asset changes the version of a list answered by the
+        # search index
+        version: int = await asset_list.get_version()
+        member_id: UUID = get_test_uuid()
+        asset: Asset = get_asset(get_test_uuid())
+        asset.categories = [list_name]
+        asset.keywords = []
+        asset.annotations = []
+        await asset_cache.add_newest_asset(member_id, asset.model_dump())
+        self.assertTrue(
+            await asset_cache.get_query_list_definition(list_name)
+        )
+        self.assertGreater(await asset_list.get_version(), version)
+
+        # and so does removing the asset
+        version = await asset_list.get_version()
+        await asset_cache.delete_asset_from_cache(member_id, asset.asset_id)
+        await asset_cache.sweep_expired_assets()
+        self.assertGreater(await asset_list.get_version(), version)
+
+    async def test_compressed_assets(self) -> None:
+        config_file: str = os.environ.get('CONFIG_FILE', 'config.yml-byotube')
+        with open(config_file) as file_desc:
+            app_config: dict[str, dict[str, any]] = yaml.safe_load(file_desc)
+
+        # The workers write assets through the caches of the ServiceServer
+        server: ServiceServer = ServiceServer.__new__(ServiceServer)
+        await server.setup_asset_cache(
+            app_config['svcserver']['asset_cache'],
+            app_config['svcserver']['asset_cache_readwrite'],
+            compress_assets=True
+        )
+
+        member_id: UUID = get_test_uuid()
+        asset: Asset = get_asset(get_test_uuid())
+        added: int = await server.asset_cache.add_newest_assets(
+            [(member_id, asset.model_dump())]
+        )
+        self.assertEqual(added, 1)
+
+        key: str = server.asset_cache.annotate_key(
+            AssetCache.ASSET_KEY_PREFIX,
+            server.asset_cache.get_cursor(member_id, asset.asset_id)
+        )
+        stored: dict[str, any] = await server.asset_cache.client.json().get(
+            key
+        )
+        self.assertIn(AssetCompressor.BLOB_FIELD, stored)
+
+        # Compressed assets are returned as they were before compression
+        edge: Edge = await config.asset_cache.get_asset_by_key(key)
+        self.assertEqual(edge.node.asset_id, asset.asset_id)
+        self.assertEqual(edge.node.video_thumbnails, asset.video_thumbnails)
+
+        # Pages with compressed assets get decompressed before they are
+        # returned
+        list_name: str = (
+            f'{member_id}_{asset.creator}'
+            f'{AssetCache.get_short_appendix(asset)}'
+        )
+        page: str = await config.asset_cache.get_list_page(list_name)
+        data: dict[str, any] = orjson.loads(page)
+        self.assertEqual(len(data['edges']), 1)
+        self.assertNotIn(AssetCompressor.BLOB_FIELD, data['edges'][0])
+        self.assertEqual(
+            Edge[Asset](**data['edges'][0]).node.video_thumbnails,
+            asset.video_thumbnails
+        )
+
+        await server.asset_cache.close()
+        await server.asset_cache_readwrite.close()
+
 
 def get_asset(asset_id: str = TEST_ASSET_ID) -> Asset:
     '''
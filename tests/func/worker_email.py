@@ -26,6 +26,7 @@ from anyio import sleep
 import redis.asyncio as redis
 
 from byoda.storage.message_queue import Queue
+from byoda.storage.message_queue import QueueMessage
 
 from byoda.util.logger import Logger as ByodaLogger
 
@@ -81,6 +82,30 @@ class Test(IsolatedAsyncioTestCase):
         mails_sent_now: int = get_mails_sent()
         self.assertEqual(mails_sent_now, mails_sent + 1)
 
+    async def test_delayed_retry(self) -> None:
+        queue: Queue = QUEUE
+        queue_name: str = 'test_email_retry'
+        await queue.queue.delete(
+            queue.get_key(queue_name), queue.get_delayed_key(queue_name)
+        )
+
+        message = QueueMessage(
+            1, 'tests/func/worker_email.py', {'test': 'retry'}, attempts=1
+        )
+        await queue.push_delayed(queue_name, message, 2)
+
+        # The delay has not yet passed
+        self.assertEqual(await queue.requeue(queue_name), 0)
+        self.assertEqual(await queue.queue.llen(queue.get_key(queue_name)), 0)
+
+        await sleep(2)
+        self.assertEqual(await queue.requeue(queue_name), 1)
+        self.assertEqual(await queue.requeue(queue_name), 0)
+
+        received: QueueMessage = await queue.bpop(queue_name)
+        self.assertEqual(received.contents, {'test': 'retry'})
+        self.assertEqual(received.attempts, 1)
+
 
 def get_mails_sent() -> int:
     resp: httpx.Response = httpx.get('http://localhost:5020/metrics')
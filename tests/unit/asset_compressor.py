@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for compressing the non-indexed fields of assets
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import unittest
+
+from copy import deepcopy
+from logging import Logger
+
+from byoda.datacache.asset_compressor import AssetCompressor
+from byoda.datacache.asset_compressor import UnknownDictionaryError
+
+from byoda.util.logger import Logger as ByodaLogger
+
+KEPT_FIELDS: set[str] = {'asset_id', 'title', 'creator', 'ingest_status'}
+
+
+def get_asset(index: int) -> dict[str, any]:
+    return {
+        'cursor': f'cursor-{index}',
+        'origin': 'b0f1c2d3-0000-0000-0000-000000000000',
+        'node': {
+            'asset_id': f'asset-{index}',
+            'title': f'Video {index}',
+            'creator': 'Some creator',
+            'ingest_status': 'external',
+            'video_thumbnails': [
+                {
+                    'url': f'https://i.ytimg.com/vi/{index}/hqdefault.jpg',
+                    'width': 480,
+                    'height': 360,
+                    'size': 'hqdefault'
+                }
+            ],
+            'monetizations': [{'monetization_type': 'free'}],
+        }
+    }
+
+
+class TestAssetCompressor(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        compressor: AssetCompressor = AssetCompressor(KEPT_FIELDS)
+        asset: dict[str, any] = get_asset(1)
+        original: dict[str, any] = deepcopy(asset)
+
+        compressor.compress(asset)
+        self.assertEqual(set(asset['node']), KEPT_FIELDS)
+        self.assertTrue(
+            asset[AssetCompressor.BLOB_FIELD].startswith('0:')
+        )
+
+        compressor.decompress(asset)
+        self.assertEqual(asset, original)
+
+        # Assets that were not compressed are returned unmodified
+        self.assertEqual(compressor.decompress(asset), original)
+
+    def test_dictionary(self) -> None:
+        compressor: AssetCompressor = AssetCompressor(KEPT_FIELDS)
+        compressor.dictionaries[1] = AssetCompressor.build_dictionary(
+            [
+                compressor._serialize_compressible(get_asset(i)['node'])
+                for i in range(0, 10)
+            ]
+        )
+
+        plain: dict[str, any] = compressor.compress(get_asset(20))
+        compressor.dictionary_id = 1
+        asset: dict[str, any] = compressor.compress(get_asset(20))
+        self.assertTrue(asset[AssetCompressor.BLOB_FIELD].startswith('1:'))
+        self.assertLess(
+            len(asset[AssetCompressor.BLOB_FIELD]),
+            len(plain[AssetCompressor.BLOB_FIELD])
+        )
+
+        reader: AssetCompressor = AssetCompressor(KEPT_FIELDS)
+        with self.assertRaises(UnknownDictionaryError):
+            reader.decompress(deepcopy(asset))
+
+        reader.dictionaries[1] = compressor.dictionaries[1]
+        self.assertEqual(reader.decompress(asset), get_asset(20))
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
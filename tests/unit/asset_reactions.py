@@ -150,6 +150,45 @@ class TestAccountManager(unittest.IsolatedAsyncioTestCase):
             await store.get_reactions(lite_id, first=17, after=after)
         self.assertEqual(len(results), 18)
 
+    async def test_reactions_for_assets(self) -> None:
+        store: AssetReactionStore = ASSET_REACTION_STORE
+        lite_id: UUID = get_test_uuid()
+
+        assets: list[tuple[UUID, UUID]] = []
+        for counter in range(0, 10):
+            member_id: UUID = get_test_uuid()
+            asset_id: UUID = get_test_uuid()
+            assets.append((member_id, asset_id))
+            if counter % 2:
+                continue
+
+            reaction_model = AssetReactionRequestModel(
+                member_id=member_id, asset_id=asset_id,
+                asset_url=f'https://video-{counter}/',
+                asset_class='public_assets', relation=f'like-{counter}'
+            )
+            await store.add_reaction(lite_id, reaction_model)
+
+        results: list[AssetReactionResponseModel] = \
+            await store.get_reactions_for_assets(lite_id, assets)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(
+            [result.asset_id for result in results],
+            [asset_id for _, asset_id in assets[0::2]]
+        )
+        self.assertEqual(results[2].relation, 'like-4')
+
+        # Reactions of other accounts are not returned
+        results = await store.get_reactions_for_assets(
+            get_test_uuid(), assets
+        )
+        self.assertEqual(results, [])
+
+        with self.assertRaises(ValueError):
+            await store.get_reactions_for_assets(
+                lite_id, assets * AssetReactionStore.MAX_BATCH_SIZE
+            )
+
     async def test_asset_reaction_store(self) -> None:
         store: AssetReactionStore = ASSET_REACTION_STORE
         lite_id: UUID = get_test_uuid()
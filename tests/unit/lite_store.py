@@ -114,15 +114,10 @@ class TestLiteStore(unittest.IsolatedAsyncioTestCase):
 
         # Test de-dupe
         link = results[0]
-        data: dict[str, str | list[str]] = {
-            'created_timestamp': link.created_timestamp.timestamp(),
-            'member_id': str(link.member_id),
-            'relation': link.relation,
-            'annotations': ['dummy'],
-            'network_link_id': str(uuid4())
-        }
-        key: str = NetworkLinkStore.get_key(lite_id)
-        await lite.client.json().arrappend(key, '$', data)
+        await lite._set_link(
+            lite_id, link.created_timestamp.timestamp() + 1, link.member_id,
+            link.relation, set(['dummy']), None
+        )
         results: list[NetworkLinkResponseModel] = await lite.get_links(lite_id)
         self.assertEqual(len(results), 9)
         filtered_results: list[NetworkLinkResponseModel] = [
@@ -147,6 +142,57 @@ class TestLiteStore(unittest.IsolatedAsyncioTestCase):
 
         print('hoi')
 
+    async def test_followers(self) -> None:
+        lite: NetworkLinkStore = LITE
+
+        member_id: UUID = uuid4()
+        lite_ids: list[UUID] = [uuid4() for _ in range(0, 3)]
+        for lite_id in lite_ids:
+            await lite.add_link(lite_id, member_id, 'follow', set(['channel']))
+
+        self.assertEqual(
+            await lite.get_followers(member_id, 'follow'), set(lite_ids)
+        )
+        self.assertTrue(await lite.is_linked(lite_ids[0], member_id, 'follow'))
+        self.assertFalse(await lite.is_linked(uuid4(), member_id, 'follow'))
+
+        await lite.remove_creator(lite_ids[0], member_id, 'follow', 'channel')
+        self.assertFalse(
+            await lite.is_linked(lite_ids[0], member_id, 'follow')
+        )
+        self.assertEqual(
+            await lite.get_followers(member_id, 'follow'), set(lite_ids[1:])
+        )
+
+    async def test_migrate_legacy_links(self) -> None:
+        lite: NetworkLinkStore = LITE
+
+        lite_id: UUID = uuid4()
+        member_ids: list[UUID] = [uuid4() for _ in range(0, 3)]
+        legacy_links: list[dict[str, str | list[str]]] = [
+            {
+                'created_timestamp': datetime.now(tz=UTC).timestamp(),
+                'member_id': str(member_id),
+                'relation': 'follow',
+                'annotations': ['channel'],
+                'network_link_id': str(uuid4())
+            } for member_id in member_ids
+        ]
+        key: str = NetworkLinkStore.get_key(lite_id)
+        await lite.client.json().set(key, '$', legacy_links)
+
+        results: list[NetworkLinkResponseModel] = await lite.get_links(lite_id)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(
+            [link.member_id for link in results], member_ids
+        )
+        self.assertFalse(await lite.client.exists(key))
+
+        self.assertTrue(await lite.is_linked(lite_id, member_ids[1], 'follow'))
+        self.assertIn(
+            lite_id, await lite.get_followers(member_ids[1], 'follow')
+        )
+
 
 if __name__ == '__main__':
     _LOGGGER: Logger = ByodaLogger.getLogger(
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for the in-process memory cache
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import time
+import unittest
+
+from logging import Logger
+
+from byoda.datacache.memory_cache import MemoryCache
+
+from byoda.util.logger import Logger as ByodaLogger
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_lru_eviction(self) -> None:
+        cache: MemoryCache = MemoryCache(3)
+        for key in ['a', 'b', 'c']:
+            cache.set(key, key.upper())
+
+        # Reading 'a' makes 'b' the least recently used entry
+        self.assertEqual(cache.get('a'), 'A')
+        cache.set('d', 'D')
+
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertEqual(cache.get('d'), 'D')
+
+        self.assertTrue(cache.delete('a'))
+        self.assertFalse(cache.delete('a'))
+        self.assertNotIn('a', cache)
+
+        with self.assertRaises(ValueError):
+            cache.set('e', None)
+
+        with self.assertRaises(ValueError):
+            MemoryCache(0)
+
+    def test_ttl(self) -> None:
+        cache: MemoryCache = MemoryCache(10, ttl=0.1)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=10)
+        self.assertEqual(cache.get('a'), 1)
+
+        time.sleep(0.2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        self.assertEqual(len(cache), 1)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for the generations of the responses cached by the proxy of
+BYO.Tube Lite
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import unittest
+
+from uuid import UUID
+from uuid import uuid4
+from logging import Logger
+from unittest.mock import patch
+
+from byoda.datacache.memory_cache import MemoryCache
+
+from byoda.util.logger import Logger as ByodaLogger
+
+from byotubesvr.routers.proxy import _get_generation
+
+
+class TestProxyCache(unittest.TestCase):
+    def test_evicted_generation(self) -> None:
+        generations: MemoryCache = MemoryCache(1)
+        with patch(
+            'byotubesvr.routers.proxy._PROXY_GENERATIONS', generations
+        ):
+            member_id: UUID = uuid4()
+            generation: int = _get_generation(member_id, 'public_assets')
+            self.assertEqual(
+                _get_generation(member_id, 'public_assets'), generation
+            )
+
+            # Looking up another pod evicts the generation of the first
+            _get_generation(uuid4(), 'public_assets')
+
+            # Responses cached before the eviction are not used again
+            self.assertNotEqual(
+                _get_generation(member_id, 'public_assets'), generation
+            )
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
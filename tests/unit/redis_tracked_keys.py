@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for the in-process cache of keys tracked by Redis
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import unittest
+
+from logging import Logger
+
+from byoda.datacache.redis_pool import TrackedKeys
+from byoda.datacache.redis_pool import get_redis_client
+
+from byoda.util.logger import Logger as ByodaLogger
+
+REDIS_URL: str = 'redis://localhost:6379'
+
+
+class TestTrackedKeys(unittest.IsolatedAsyncioTestCase):
+    async def test_shared_pool(self) -> None:
+        client = get_redis_client(REDIS_URL, decode_responses=True)
+        same_client = get_redis_client(REDIS_URL, decode_responses=True)
+        other_client = get_redis_client(REDIS_URL)
+
+        self.assertIs(client.connection_pool, same_client.connection_pool)
+        self.assertIsNot(client.connection_pool, other_client.connection_pool)
+
+        # Closing a client does not close the shared pool
+        await client.aclose()
+        self.assertIs(
+            get_redis_client(REDIS_URL, decode_responses=True).connection_pool,
+            same_client.connection_pool
+        )
+
+    def test_tracked_keys(self) -> None:
+        tracked: TrackedKeys = TrackedKeys(REDIS_URL, ['channel_shortcuts:'])
+
+        # Keys are not cached until Redis tracks the keys for us
+        generation: int = tracked.generation
+        tracked.set('channel_shortcuts:a', 'value', generation)
+        self.assertIsNone(tracked.get('channel_shortcuts:a'))
+
+        tracked.is_tracking = True
+        tracked.set('channel_shortcuts:a', 'value', generation)
+        self.assertEqual(tracked.get('channel_shortcuts:a'), 'value')
+
+        tracked.invalidate(['channel_shortcuts:a'])
+        self.assertIsNone(tracked.get('channel_shortcuts:a'))
+
+        # A value read before an invalidation arrived is not cached
+        tracked.set('channel_shortcuts:a', 'value', generation)
+        self.assertIsNone(tracked.get('channel_shortcuts:a'))
+
+        generation = tracked.generation
+        tracked.set('channel_shortcuts:a', 'value', generation)
+        tracked.set('channel_shortcuts:b', 'value', generation)
+        tracked.invalidate(None)
+        self.assertEqual(len(tracked.cache), 0)
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for the limits on the search API
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import time
+import unittest
+
+from logging import Logger
+from unittest.mock import patch
+
+from byoda.datacache.memory_cache import MemoryCache
+
+from byoda.util.token_bucket import TokenBucket
+
+from byoda.util.logger import Logger as ByodaLogger
+
+from byotubesvr.routers.search import check_search_query
+from byotubesvr.routers.search import get_client_bucket
+from byotubesvr.routers.search import MAX_SEARCH_OFFSET
+
+
+class TestSearchAdmission(unittest.TestCase):
+    def test_token_bucket(self) -> None:
+        bucket: TokenBucket = TokenBucket(rate=10, capacity=3)
+        for _ in range(0, 3):
+            self.assertTrue(bucket.consume())
+
+        self.assertFalse(bucket.consume())
+        self.assertGreater(bucket.retry_after(), 0)
+
+        # A request that the bucket can not serve takes no tokens
+        self.assertFalse(bucket.consume(3))
+
+        time.sleep(0.25)
+        self.assertTrue(bucket.consume(2))
+        self.assertFalse(bucket.consume(2))
+
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+    def test_client_bucket(self) -> None:
+        buckets: MemoryCache = MemoryCache(10, ttl=0.3)
+        with patch('byotubesvr.routers.search._CLIENT_BUCKETS', buckets):
+            bucket: TokenBucket = get_client_bucket('10.0.0.1')
+            self.assertTrue(bucket.consume())
+
+            # The bucket of a client that keeps searching does not expire
+            for _ in range(0, 3):
+                time.sleep(0.2)
+                self.assertIs(get_client_bucket('10.0.0.1'), bucket)
+
+            # The bucket of an idle client does
+            time.sleep(0.4)
+            self.assertIsNot(get_client_bucket('10.0.0.1'), bucket)
+
+    def test_check_search_query(self) -> None:
+        self.assertEqual(check_search_query('chess', 0, 10), 1)
+        self.assertEqual(check_search_query('chess open*', 0, 10), 3)
+        self.assertEqual(check_search_query('%chess%', 500, 10), 5)
+        self.assertEqual(check_search_query('@title:chess*', 0, 10), 3)
+        self.assertEqual(check_search_query('(@title:chess*)', 0, 10), 3)
+
+        for text, offset, num in [
+            ('', 0, 10),
+            ('a' * 300, 0, 10),
+            (' '.join(['chess'] * 9), 0, 10),
+            ('*', 0, 10),
+            ('*chess', 0, 10),
+            ('ch*', 0, 10),
+            ('chess* open*', 0, 10),
+            ('@title:*a', 0, 10),
+            ('@title:a*', 0, 10),
+            ('(@title:*chess)', 0, 10),
+            ('@title|description:ch*', 0, 10),
+            ('chess|*ess', 0, 10),
+            ('chess', MAX_SEARCH_OFFSET + 1, 10),
+            ('chess', -1, 10),
+            ('chess', 0, 0),
+            ('chess', 0, 101),
+        ]:
+            with self.assertRaises(ValueError):
+                check_search_query(text, offset, num)
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
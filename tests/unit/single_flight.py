@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for coalescing concurrent identical calls
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import unittest
+
+from logging import Logger
+
+from anyio import sleep
+from anyio import create_task_group
+
+from byoda.datacache.single_flight import SingleFlight
+
+from byoda.util.logger import Logger as ByodaLogger
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_coalescing(self) -> None:
+        flights: SingleFlight = SingleFlight()
+        calls: list[str] = []
+        results: list[tuple[str, bool]] = []
+
+        async def fetch(key: str) -> str:
+            calls.append(key)
+            await sleep(0.1)
+            return key.upper()
+
+        async def request(key: str) -> None:
+            results.append(await flights.run(key, fetch, key))
+
+        async with create_task_group() as tg:
+            for key in ['a', 'a', 'a', 'b']:
+                tg.start_soon(request, key)
+
+        self.assertEqual(sorted(calls), ['a', 'b'])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(
+            sorted(result for result, _ in results), ['A', 'A', 'A', 'B']
+        )
+        self.assertEqual(len([shared for _, shared in results if shared]), 2)
+        self.assertEqual(len(flights), 0)
+
+        # Once the call has completed, the next call does the work again
+        result: str
+        shared: bool
+        result, shared = await flights.run('a', fetch, 'a')
+        self.assertEqual(result, 'A')
+        self.assertFalse(shared)
+        self.assertEqual(len(calls), 3)
+
+    async def test_exception(self) -> None:
+        flights: SingleFlight = SingleFlight()
+        errors: list[Exception] = []
+
+        async def fetch() -> None:
+            await sleep(0.1)
+            raise ValueError('failed')
+
+        async def request() -> None:
+            try:
+                await flights.run('key', fetch)
+            except ValueError as exc:
+                errors.append(exc)
+
+        async with create_task_group() as tg:
+            for _ in range(0, 3):
+                tg.start_soon(request)
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(len(flights), 0)
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
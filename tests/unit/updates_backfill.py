@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for the backfill of the data of members by the updates worker
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import unittest
+
+from uuid import UUID
+from uuid import uuid4
+from typing import Callable
+from typing import Awaitable
+from logging import Logger
+
+from anyio import sleep
+from anyio import CancelScope
+from anyio import CapacityLimiter
+
+from byoda.datastore.memberdb import BACKFILL_COMPLETED
+
+from byoda.util.updates_listener import UpdatesListener
+
+from byoda.util.logger import Logger as ByodaLogger
+
+from byotubesvr.updates_worker import store_backfill_progress
+
+CURSORS: list[str] = [f'cursor-{i}' for i in range(0, 5)]
+
+
+class Listener:
+    '''
+    Stands in for the UpdatesListener, serving one cursor per page. The
+    first 'stalls' attempts stop responding after 'stall_after' pages
+    '''
+
+    def __init__(self, stall_after: int = 0, stalls: int = 0) -> None:
+        self.remote_member_id: UUID = uuid4()
+        self.log_extra: dict[str, str | UUID | int] = {
+            'remote_member_id': self.remote_member_id
+        }
+        self.stall_after: int = stall_after
+        self.stalls: int = stalls
+        self.attempts: list[str | None] = []
+
+    async def get_all_data(
+            self, after: str | None = None,
+            progress: Callable[[str | None, bool], Awaitable[None]] | None
+            = None) -> int:
+        self.attempts.append(after)
+
+        start: int = 0
+        if after:
+            start = CURSORS.index(after) + 1
+
+        cursor: str
+        for pages, cursor in enumerate(CURSORS[start:]):
+            if self.stalls and pages == self.stall_after:
+                self.stalls -= 1
+                await sleep(60)
+
+            await progress(cursor, cursor == CURSORS[-1])
+
+        return len(CURSORS) - start
+
+
+class MemberDb:
+    def __init__(self) -> None:
+        self.cursors: dict[UUID, str] = {}
+
+    async def set_backfill_cursor(self, member_id: UUID, cursor: str | None
+                                  ) -> None:
+        if cursor:
+            self.cursors[member_id] = cursor
+        else:
+            self.cursors.pop(member_id, None)
+
+
+class TestUpdatesBackfill(unittest.IsolatedAsyncioTestCase):
+    async def test_backfill_resume(self) -> None:
+        listener: Listener = Listener()
+        progress: list[tuple[str | None, bool]] = []
+
+        async def track(cursor: str | None, completed: bool) -> None:
+            progress.append((cursor, completed))
+
+        await UpdatesListener._backfill(
+            listener, CancelScope(), CapacityLimiter(1), 5, CURSORS[1],
+            track, 3
+        )
+
+        self.assertEqual(listener.attempts, [CURSORS[1]])
+        self.assertEqual(
+            progress, [(cursor, False) for cursor in CURSORS[2:-1]]
+            + [(CURSORS[-1], True)]
+        )
+
+    async def test_backfill_timeout(self) -> None:
+        listener: Listener = Listener(stall_after=2, stalls=1)
+        progress: list[tuple[str | None, bool]] = []
+
+        async def track(cursor: str | None, completed: bool) -> None:
+            progress.append((cursor, completed))
+
+        await UpdatesListener._backfill(
+            listener, CancelScope(), CapacityLimiter(1), 0.2, None,
+            track, 3
+        )
+
+        # The second attempt resumes after the last page of the first
+        self.assertEqual(listener.attempts, [None, CURSORS[1]])
+        self.assertEqual(progress[-1], (CURSORS[-1], True))
+        self.assertEqual(len(progress), len(CURSORS))
+
+        # The backfill gives up after the last attempt
+        listener = Listener(stall_after=0, stalls=3)
+        await UpdatesListener._backfill(
+            listener, CancelScope(), CapacityLimiter(1), 0.1, None,
+            None, 3
+        )
+        self.assertEqual(listener.attempts, [None, None, None])
+
+    async def test_backfill_failure(self) -> None:
+        listener: Listener = Listener()
+        progress: list[tuple[str | None, bool]] = []
+        failures: list[str] = []
+
+        async def track(cursor: str | None, completed: bool) -> None:
+            if cursor == CURSORS[2] and not failures:
+                failures.append(cursor)
+                raise ConnectionError('Redis went away')
+
+            progress.append((cursor, completed))
+
+        await UpdatesListener._backfill(
+            listener, CancelScope(), CapacityLimiter(1), 0.2, None, track, 3
+        )
+
+        # The second attempt resumes after the last page that was stored
+        self.assertEqual(listener.attempts, [None, CURSORS[1]])
+        self.assertEqual(
+            progress, [(cursor, False) for cursor in CURSORS[:-1]]
+            + [(CURSORS[-1], True)]
+        )
+
+        # The backfill gives up after the last attempt without raising
+        async def fail(cursor: str | None, completed: bool) -> None:
+            raise ConnectionError('Redis went away')
+
+        listener = Listener()
+        await UpdatesListener._backfill(
+            listener, CancelScope(), CapacityLimiter(1), 0.1, None, fail, 3
+        )
+        self.assertEqual(listener.attempts, [None, None, None])
+
+    async def test_backfill_completion(self) -> None:
+        member_db: MemberDb = MemberDb()
+        member_id: UUID = uuid4()
+
+        await store_backfill_progress(member_db, member_id, CURSORS[0], False)
+        self.assertEqual(member_db.cursors[member_id], CURSORS[0])
+
+        # A completed backfill is recorded so that it does not restart
+        await store_backfill_progress(member_db, member_id, CURSORS[-1], True)
+        self.assertEqual(member_db.cursors[member_id], BACKFILL_COMPLETED)
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()
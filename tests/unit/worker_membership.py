@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+'''
+Test cases for assigning members to the processes of a worker
+
+:maintainer : Steven Hessing <steven@byoda.org>
+:copyright  : Copyright 2024
+:license    : GPLv3
+'''
+
+import sys
+import unittest
+
+from uuid import UUID
+from uuid import uuid4
+from logging import Logger
+
+from byoda.datastore.worker_membership import WorkerMembership
+
+from byoda.util.logger import Logger as ByodaLogger
+
+
+class RedisDriver:
+    def register_script(self, script: str) -> None:
+        return None
+
+
+class KVCache:
+    driver: RedisDriver = RedisDriver()
+
+    def get_annotated_key(self, key: str) -> str:
+        return f'test-{key}'
+
+
+class TestWorkerMembership(unittest.TestCase):
+    def test_member_assignment(self) -> None:
+        worker_ids: list[str] = [f'worker-{i}' for i in range(0, 4)]
+        memberships: list[WorkerMembership] = [
+            WorkerMembership(KVCache(), 'test', worker_id=worker_id)
+            for worker_id in worker_ids
+        ]
+        for membership in memberships:
+            membership.workers = worker_ids
+
+        member_ids: list[UUID] = [uuid4() for _ in range(0, 1000)]
+        owners: dict[UUID, str] = {}
+        for member_id in member_ids:
+            owned_by: list[str] = [
+                membership.worker_id for membership in memberships
+                if membership.owns(member_id)
+            ]
+            # Each member is assigned to exactly one process
+            self.assertEqual(len(owned_by), 1)
+            owners[member_id] = owned_by[0]
+
+        # The members are spread over all processes
+        self.assertEqual(set(owners.values()), set(worker_ids))
+
+        # When a process leaves, only its members get reassigned
+        remaining: list[str] = worker_ids[1:]
+        for membership in memberships[1:]:
+            membership.workers = remaining
+
+        for member_id in member_ids:
+            owned_by: list[str] = [
+                membership.worker_id for membership in memberships[1:]
+                if membership.owns(member_id)
+            ]
+            self.assertEqual(len(owned_by), 1)
+            if owners[member_id] != worker_ids[0]:
+                self.assertEqual(owned_by[0], owners[member_id])
+
+
+if __name__ == '__main__':
+    _LOGGER: Logger = ByodaLogger.getLogger(
+        sys.argv[0], debug=True, json_out=False
+    )
+
+    unittest.main()